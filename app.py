@@ -2,30 +2,34 @@
 
 App web (Streamlit) para coordenadores dos cursos técnicos de nível médio (EPTNM).
 O coordenador informa seu e-mail institucional, faz o upload do Mapa de Turma
-(.xls) e recebe o relatório de acompanhamento acadêmico (PDF) por e-mail.
+(.xls ou .xlsx) e recebe o relatório de acompanhamento acadêmico (PDF) por e-mail.
 
 Caso especial: o Curso integrado **Trânsito + Estradas (1ª série)** exige 2
 arquivos (mapa de Trânsito + mapa de Estradas) e produz **2 PDFs**, um para
 cada curso.
 """
+import importlib
 import os
 import re
-import subprocess
+import threading
 
 import streamlit as st
 
-# Versão "humana" do app. Incremente ao publicar mudanças relevantes; o commit
-# do Git (mostrado ao lado) é o identificador exato do que está no ar.
-APP_VERSION = "1.1.0"
-
-from core import relatorios
-from core.email_sender import DOMINIO_INSTITUCIONAL, email_valido, enviar_relatorio
-from core.manipulacao import (
-    ArquivoInvalidoError,
-    processar_curso_generico,
-    processar_transito_estradas,
-)
+from core.email_sender import DOMINIO_INSTITUCIONAL, email_valido
 from core.usage_tracker import registrar_uso
+from core.versao import APP_VERSION, build_info
+
+# Módulos pesados (pandas, matplotlib, seaborn, reportlab, babel, requests...).
+# Não são importados no carregamento da página: uma thread os importa logo
+# depois da primeira pintura (``_aquecimento``) e a geração do relatório os
+# importa localmente.
+_MODULOS_PESADOS = (
+    'core.relatorios',
+    'core.manipulacao',
+    'core.cache_mapas',
+    'core.acumulado',
+    'core.agregados',
+)
 
 st.set_page_config(
     page_title="Gestão Acadêmica EPTNM — CEFET-MG",
@@ -46,6 +50,90 @@ def _secret(nome, default=""):
     return os.environ.get(nome, default)
 
 
+@st.cache_resource(show_spinner=False)
+def _cache_mapas():
+    """Cache em disco dos mapas processados (opcional).
+
+    Ativado só se ``CACHE_MAPAS_DIR`` estiver configurado; o limite de disco
+    vem de ``CACHE_MAPAS_MB`` (padrão: 256 MB)."""
+    diretorio = _secret("CACHE_MAPAS_DIR")
+    if not diretorio:
+        return None
+    from core.cache_mapas import CacheMapas
+    try:
+        limite_mb = float(_secret("CACHE_MAPAS_MB", "256"))
+        return CacheMapas(diretorio, limite_bytes=limite_mb * 1024 * 1024)
+    except Exception:
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _caixa_saida(remetente, senha_app):
+    """Caixa de saída dos e-mails (uma por processo), com a thread de envio.
+
+    O diretório vem de ``CAIXA_SAIDA_DIR`` (padrão: pasta temporária do
+    sistema); as mensagens pendentes de uma execução anterior saem quando o
+    app sobe de novo. As falhas são apagadas após ``CAIXA_SAIDA_FALHAS_DIAS``
+    dias (padrão: 7)."""
+    from core.caixa_saida import DIRETORIO_PADRAO, FALHAS_DIAS_PADRAO, CaixaSaida
+    from core.email_sender import SessaoSMTP
+    diretorio = _secret("CAIXA_SAIDA_DIR") or DIRETORIO_PADRAO
+    try:
+        falhas_dias = float(_secret("CAIXA_SAIDA_FALHAS_DIAS", FALHAS_DIAS_PADRAO))
+    except (TypeError, ValueError):
+        falhas_dias = FALHAS_DIAS_PADRAO
+    return CaixaSaida(diretorio, SessaoSMTP(remetente, senha_app),
+                      falhas_dias=falhas_dias).iniciar()
+
+
+@st.cache_resource(show_spinner=False)
+def _historico():
+    """Histórico local dos relatórios (SQLite), se ``HISTORICO_DB`` estiver
+    configurado. Com ``HISTORICO_EXPORTAR_MIN`` e a planilha de uso
+    configurada, os jobs novos são copiados para a aba "Jobs" nesse
+    intervalo. O e-mail dos jobs é apagado após ``HISTORICO_EMAIL_DIAS`` dias
+    (padrão: 180)."""
+    caminho = _secret("HISTORICO_DB")
+    if not caminho:
+        return None
+    from core.historico import ABA_PLANILHA, EMAIL_DIAS_PADRAO, HistoricoJobs
+    from core.usage_tracker import abridor_aba
+    try:
+        email_dias = float(_secret("HISTORICO_EMAIL_DIAS", EMAIL_DIAS_PADRAO))
+    except (TypeError, ValueError):
+        email_dias = EMAIL_DIAS_PADRAO
+    try:
+        historico = HistoricoJobs(caminho, email_dias=email_dias)
+    except Exception:
+        return None
+    try:
+        minutos = float(_secret("HISTORICO_EXPORTAR_MIN", "0"))
+    except (TypeError, ValueError):
+        minutos = 0
+    abrir_aba = abridor_aba(st.secrets, ABA_PLANILHA) if minutos > 0 else None
+    if abrir_aba is not None:
+        historico.iniciar_exportacao(abrir_aba, minutos * 60)
+    return historico
+
+
+def _registrar_jobs(jobs, email_coordenador, erro=None):
+    """Grava no histórico (se configurado) os jobs [(conjunto, cronômetro,
+    bytes do PDF), ...]; falhas são silenciosas, como no registro de uso."""
+    historico = _historico()
+    if historico is None:
+        return
+    try:
+        for (df_notas, _, disciplinas_dict, metadados), cron, anexo_bytes in jobs:
+            historico.registrar(
+                metadados.get('curso_amigavel') or metadados.get('curso') or 'Curso',
+                bimestre=metadados.get('bimestre_num'), serie=metadados.get('serie'),
+                turma=metadados.get('turma'), email=email_coordenador,
+                alunos=len(df_notas), disciplinas=len(disciplinas_dict),
+                anexo_bytes=anexo_bytes, duracoes=cron.total(), erro=erro)
+    except Exception:
+        pass
+
+
 def _slug(texto):
     return re.sub(r'\W+', '_', (texto or 'curso').strip().lower()).strip('_') or 'curso'
 
@@ -54,23 +142,9 @@ def _slug(texto):
 def _build_info():
     """Identifica o build em execução (commit + data) para conferir o deploy.
 
-    Lê do Git no diretório do app — funciona no Streamlit Cloud, que publica a
-    partir de um clone do repositório. Retorna ('', '') se o Git não estiver
-    disponível (ex.: execução fora de um repositório)."""
-    base = os.path.dirname(os.path.abspath(__file__))
-
-    def _git(*args):
-        try:
-            return subprocess.check_output(
-                ["git", *args], cwd=base,
-                stderr=subprocess.DEVNULL, text=True, timeout=3,
-            ).strip()
-        except Exception:
-            return ""
-
-    commit = _git("rev-parse", "--short", "HEAD")
-    data_commit = _git("show", "-s", "--format=%cd", "--date=short", "HEAD")
-    return commit, data_commit
+    Vem de ``core/_build.py``, gerado no deploy (``python -m core.versao``); sem
+    ele, do Git, uma vez por processo (ver ``core.versao``)."""
+    return build_info()
 
 
 def _versao_label():
@@ -84,6 +158,44 @@ def _versao_label():
     return " · ".join(partes)
 
 
+def _dados_guardados():
+    """Itens do aviso de privacidade sobre os dados de alunos que ficam em
+    disco no servidor, conforme os diretórios configurados (lista vazia se
+    nenhum estiver)."""
+    itens = []
+    if _secret("CACHE_MAPAS_DIR"):
+        try:
+            limite_mb = float(_secret("CACHE_MAPAS_MB", "256"))
+        except (TypeError, ValueError):
+            limite_mb = 256
+        itens.append(
+            "**Cache de mapas**: o mapa já lido (nomes, matrículas, notas e faltas) "
+            "fica gravado para acelerar reenvios do mesmo arquivo. Não há prazo: "
+            f"os mapas usados há mais tempo são apagados quando o cache passa de "
+            f"{limite_mb:.0f} MB.")
+    if _secret("ACUMULADO_DIR"):
+        itens.append(
+            "**Acumulado do ano letivo**: as notas de cada aluno (matrícula, nome e "
+            "nota por disciplina) em cada bimestre já enviado ficam gravadas por "
+            "turma, para somar o ano sem reenviar os mapas anteriores. A turma é "
+            f"apagada {_acumulado_dias():.0f} dias depois do último envio.")
+    if _secret("PARCIAIS_DIR"):
+        itens.append(
+            "**Parciais para o relatório consolidado**: só resumos da turma "
+            "(contagens, médias e distribuição das notas e faltas), **sem nomes "
+            "nem matrículas**. Ficam guardados até o administrador apagá-los.")
+    return itens
+
+
+def _acumulado_dias():
+    """``ACUMULADO_DIAS``: dias sem envio até o acumulado da turma ser apagado."""
+    from core.acumulado import DIAS_PADRAO
+    try:
+        return float(_secret("ACUMULADO_DIAS", DIAS_PADRAO))
+    except (TypeError, ValueError):
+        return DIAS_PADRAO
+
+
 # --------------------------------
 # Cabeçalho
 # --------------------------------
@@ -92,7 +204,7 @@ st.caption("Educação Profissional Técnica de Nível Médio · Centro Federal
            "Educação Tecnológica de Minas Gerais")
 st.caption(f"🏷️ {_versao_label()}")
 st.markdown(
-    "Informe seu e-mail institucional e envie o **Mapa de Turma** (`.xls`). "
+    "Informe seu e-mail institucional e envie o **Mapa de Turma** (`.xls` ou `.xlsx`). "
     "O relatório de acompanhamento acadêmico será gerado e **enviado para o seu "
     f"e-mail `@{DOMINIO_INSTITUCIONAL}`**."
 )
@@ -136,14 +248,27 @@ with st.sidebar:
         "notas individuais**."
     )
     with st.expander("Saiba mais sobre o tratamento dos dados"):
+        guardados = _dados_guardados()
+        if guardados:
+            armazenamento = (
+                "- Esses dados vão no **PDF** enviado à sua caixa institucional "
+                "`@cefetmg.br`. Além disso, este servidor está configurado para "
+                "**guardar em disco**:\n" + "".join(f"    - {item}\n" for item in guardados))
+        else:
+            armazenamento = (
+                "- Esses dados ficam apenas no **processamento interno** e no **PDF** "
+                "enviado à sua caixa institucional `@cefetmg.br`.\n"
+                "- O mapa de turma é processado **em memória** e **não é armazenado** "
+                "no servidor.\n")
         st.markdown(
             "- **Nomes e notas** são *dados pessoais* protegidos pela **LGPD**. "
             "Notas escolares **não** são *dados sensíveis* no sentido legal "
             "(art. 5º, II), mas seguem protegidas como dados pessoais.\n"
-            "- Esses dados ficam apenas no **processamento interno** e no **PDF** "
-            "enviado à sua caixa institucional `@cefetmg.br`.\n"
-            "- O mapa de turma e o PDF são processados **em memória** e **não são "
-            "armazenados** no servidor.\n"
+            + armazenamento +
+            "- O **PDF** fica gravado no servidor, na fila de envio, **só até o "
+            "e-mail ser aceito** pelo servidor de e-mail. Se o envio falhar de vez, "
+            "ele é guardado por alguns dias para conferência do administrador e "
+            "depois **apagado automaticamente**.\n"
             "- Pela política da **API da OpenAI**, os dados enviados **não são "
             "usados para treinar** os modelos — ainda assim, por isso, **nenhum "
             "nome ou nota individual** é compartilhado."
@@ -164,14 +289,14 @@ if eh_transito_estradas:
     c1, c2 = st.columns(2)
     with c1:
         arquivo_transito = st.file_uploader(
-            "📄 Mapa — Trânsito (.xls)", type=["xls"], key="up_transito")
+            "📄 Mapa — Trânsito (.xls/.xlsx)", type=["xls", "xlsx"], key="up_transito")
     with c2:
         arquivo_estradas = st.file_uploader(
-            "📄 Mapa — Estradas (.xls)", type=["xls"], key="up_estradas")
+            "📄 Mapa — Estradas (.xls/.xlsx)", type=["xls", "xlsx"], key="up_estradas")
     arquivos_ok = bool(arquivo_transito and arquivo_estradas)
 else:
     arquivo_unico = st.file_uploader(
-        "📄 Mapa de Turma (.xls)", type=["xls"], key="up_unico")
+        "📄 Mapa de Turma (.xls/.xlsx)", type=["xls", "xlsx"], key="up_unico")
     arquivos_ok = bool(arquivo_unico)
 
 st.caption("ℹ️ O nome do curso e o bimestre são lidos automaticamente do cabeçalho "
@@ -183,21 +308,102 @@ enviar = st.button("📨 Gerar e enviar relatório por e-mail", type="primary")
 # --------------------------------
 # Processamento
 # --------------------------------
-def _gerar_pdf_para_conjunto(conjunto, usar_ia, api_key):
-    """Gera (nome_arquivo, pdf_buffer, nome_curso) para um conjunto (df, df, disc, meta)."""
+def _processos_graficos():
+    """Processos do pool dos gráficos (``GRAFICOS_PROCESSOS``); 0 = sem pool.
+    Os gráficos vetoriais do backend 'reportlab' não passam pelo pool."""
+    try:
+        processos = int(_secret("GRAFICOS_PROCESSOS", "0") or 0)
+    except ValueError:
+        return 0
+    if processos <= 0 or _backend_graficos() == "reportlab":
+        return 0
+    return processos
+
+
+def _backend_graficos():
+    """Backend dos gráficos (``GRAFICOS_BACKEND``): 'seaborn' (padrão),
+    'matplotlib' (mais leve, sem seaborn) ou 'reportlab' (vetorial, PDF menor)."""
+    from core.relatorios import BACKENDS_GRAFICOS
+    backend = _secret("GRAFICOS_BACKEND", "seaborn") or "seaborn"
+    return backend if backend in BACKENDS_GRAFICOS else "seaborn"
+
+
+def _png_paleta():
+    """``GRAFICOS_PNG_PALETA``: grava os gráficos como PNG de 256 cores."""
+    valor = _secret("GRAFICOS_PNG_PALETA", False)
+    return valor is True or str(valor).strip().lower() in ("1", "true", "sim")
+
+
+def _pdf_memoria_max():
+    """``PDF_MEMORIA_MB``: tamanho até o qual cada PDF fica em memória (acima
+    disso, vai para um arquivo temporário); None = padrão do relatório."""
+    try:
+        return int(float(_secret("PDF_MEMORIA_MB")) * 1024 * 1024)
+    except (TypeError, ValueError):
+        return None
+
+
+def _aquecer():
+    """Importa os módulos pesados e sobe o pool dos gráficos (se configurado)."""
+    for modulo in _MODULOS_PESADOS:
+        importlib.import_module(modulo)
+    processos = _processos_graficos()
+    if processos:
+        from core import relatorios
+        relatorios.preaquecer_graficos(processos, backend=_backend_graficos())
+
+
+@st.cache_resource(show_spinner=False)
+def _aquecimento():
+    """Dispara (uma vez por processo) o aquecimento em segundo plano e devolve
+    a thread; quem precisa dos módulos pesados espera com ``join()``."""
+    thread = threading.Thread(target=_aquecer, name="aquecimento", daemon=True)
+    thread.start()
+    return thread
+
+
+def _gerar_pdf_para_conjunto(conjunto, usar_ia, api_key, cron):
+    """Gera (nome_arquivo, pdf_buffer, nome_curso) para um conjunto (df, df, disc, meta),
+    medindo as etapas em ``cron`` (``core.historico.Cronometro``)."""
+    from core import relatorios
+    from core.acumulado import registrar_e_resumir
+    from core.agregados import Parcial, gravar_parcial
+
     df_notas, df_faltas, disciplinas_dict, metadados = conjunto
     nome_curso = metadados.get('curso_amigavel') or metadados.get('curso') or 'Curso'
 
-    estat = relatorios.calcular_estatisticas(
-        df_notas, disciplinas_dict, df_faltas=df_faltas, metadados=metadados)
+    with cron('estatisticas'):
+        estat = relatorios.calcular_estatisticas(
+            df_notas, disciplinas_dict, df_faltas=df_faltas, metadados=metadados)
+        diretorio_acumulado = _secret("ACUMULADO_DIR")
+        if diretorio_acumulado:
+            try:
+                estat.acumulado = registrar_e_resumir(
+                    diretorio_acumulado, df_notas, disciplinas_dict, metadados,
+                    dias=_acumulado_dias())
+            except Exception:
+                pass  # o acumulado é complementar; não impede o relatório do bimestre
+        diretorio_parciais = _secret("PARCIAIS_DIR")
+        if diretorio_parciais:
+            try:
+                gravar_parcial(diretorio_parciais,
+                               Parcial.da_turma(estat, disciplinas_dict, metadados))
+            except Exception:
+                pass  # idem: o consolidado não impede o relatório da turma
     if usar_ia:
-        estat['comentario_ia'] = relatorios.gerar_comentario_ia(
-            estat, nome_curso, api_key)
-    figuras = relatorios.gerar_todos_graficos(
-        df_notas, nome_curso, disciplinas_dict, estat, df_faltas=df_faltas)
+        with cron('ia'):
+            estat.comentario_ia = relatorios.gerar_comentario_ia(
+                estat, nome_curso, api_key)
+    with cron('graficos'):
+        figuras = relatorios.gerar_todos_graficos(
+            df_notas, nome_curso, disciplinas_dict, estat, df_faltas=df_faltas,
+            paralelo=_processos_graficos() > 0, backend=_backend_graficos(),
+            png_paleta=_png_paleta())
     logo = LOGO_PATH if os.path.exists(LOGO_PATH) else None
-    pdf_buffer = relatorios.criar_relatorio_pdf(
-        nome_curso, estat, figuras, logo_path=logo)
+    with cron('pdf'):
+        pdf_buffer = relatorios.criar_relatorio_pdf(
+            nome_curso, estat, figuras, logo_path=logo, png_paleta=_png_paleta(),
+            memoria_max=_pdf_memoria_max())
 
     bim = metadados.get('bimestre_num') or 'X'
     serie = metadados.get('serie')
@@ -206,13 +412,40 @@ def _gerar_pdf_para_conjunto(conjunto, usar_ia, api_key):
     return nome_arquivo, pdf_buffer, nome_curso
 
 
+def _fechar_anexos(anexos):
+    """Fecha os PDFs (``SpooledTemporaryFile``): libera a memória ou apaga o
+    arquivo temporário."""
+    for _, pdf_buffer in anexos:
+        pdf_buffer.close()
+
+
 def processar_e_enviar():
+    _aquecimento().join()  # em geral já concluído enquanto o formulário é preenchido
+    from core.cache_mapas import processar_com_cache
+    from core.historico import Cronometro
+    from core.manipulacao import (
+        ArquivoInvalidoError,
+        processar_curso_generico,
+        processar_transito_estradas,
+        validar_mapa,
+    )
+
     if not email_valido(email):
         st.error(f"Informe um e-mail válido terminado em `@{DOMINIO_INSTITUCIONAL}`. "
                  "Só professores do CEFET-MG podem usar este serviço.")
         return
     if not arquivos_ok:
-        st.error("Envie o(s) arquivo(s) `.xls` necessário(s).")
+        st.error("Envie o(s) arquivo(s) `.xls`/`.xlsx` necessário(s).")
+        return
+
+    # Validação rápida (formato + cabeçalho) antes da leitura completa: mapas
+    # com vários bimestres ou arquivos que não são mapas são recusados aqui.
+    try:
+        enviados = [arquivo_transito, arquivo_estradas] if eh_transito_estradas else [arquivo_unico]
+        for arquivo in enviados:
+            validar_mapa(arquivo)
+    except ArquivoInvalidoError as e:
+        st.error(str(e))
         return
 
     remetente = _secret("GMAIL_USER")
@@ -225,12 +458,17 @@ def processar_e_enviar():
     api_key = _secret("OPENAI_API_KEY") if usar_ia else ""
 
     # 1. Processa dados
+    cron_processamento = Cronometro()
     try:
-        with st.spinner("Processando o(s) mapa(s) de turma..."):
+        with st.spinner("Processando o(s) mapa(s) de turma..."), \
+                cron_processamento('processamento'):
             if eh_transito_estradas:
-                conjuntos = processar_transito_estradas(arquivo_transito, arquivo_estradas)
+                conjuntos = processar_com_cache(
+                    _cache_mapas(), processar_transito_estradas,
+                    arquivo_transito, arquivo_estradas)
             else:
-                conjuntos = [processar_curso_generico(arquivo_unico)]
+                conjuntos = processar_com_cache(
+                    _cache_mapas(), processar_curso_generico, arquivo_unico)
     except ArquivoInvalidoError as e:
         st.error(str(e))
         return
@@ -244,41 +482,48 @@ def processar_e_enviar():
         return
 
     # 2. Gera PDFs
+    anexos = []
+    cursos = []
+    jobs = []  # (conjunto, cronômetro, bytes do PDF) para o histórico
     try:
         with st.spinner("Gerando o(s) relatório(s)..."):
-            anexos = []
-            cursos = []
             for conjunto in conjuntos_validos:
+                cron = Cronometro(cron_processamento.duracoes)
                 nome_arquivo, pdf_buffer, nome_curso = _gerar_pdf_para_conjunto(
-                    conjunto, usar_ia, api_key)
+                    conjunto, usar_ia, api_key, cron)
                 anexos.append((nome_arquivo, pdf_buffer))
                 cursos.append(nome_curso)
+                jobs.append((conjunto, cron, pdf_buffer.seek(0, 2)))
     except Exception as e:
+        _fechar_anexos(anexos)
+        _registrar_jobs([(conjunto, cron, None)], email.strip(), erro=f"{type(e).__name__}: {e}")
         st.error(f"Erro ao gerar o(s) relatório(s): {e}")
         return
 
-    # 3. Envia por e-mail
+    # 3. Põe o e-mail na caixa de saída (enviado em segundo plano)
     try:
-        with st.spinner(f"Enviando para {email}..."):
-            enviar_relatorio(
-                destinatario=email.strip(),
-                remetente=remetente,
-                senha_app=senha_app,
-                anexos=anexos,
-                cursos=cursos,
-            )
+        _caixa_saida(remetente, senha_app).enfileirar(email.strip(), anexos, cursos)
     except Exception as e:
-        st.error(f"Não foi possível enviar o e-mail: {e}")
+        _registrar_jobs(jobs, email.strip(), erro=f"{type(e).__name__}: {e}")
+        st.error(f"Não foi possível preparar o envio do e-mail: {e}")
         return
+    finally:
+        _fechar_anexos(anexos)
+    _registrar_jobs(jobs, email.strip())
 
     bim = conjuntos_validos[0][3].get('bimestre_num') if conjuntos_validos else None
     registrar_uso(cursos, bim, email.strip(), st.secrets)
 
     cursos_fmt = " e ".join(f"**{c}**" for c in cursos)
-    st.success(f"✅ Relatório(s) — {cursos_fmt} — enviado(s) para **{email.strip()}**.")
-    st.info("Verifique sua caixa de entrada (e a pasta de spam). "
-            "Nenhum arquivo fica armazenado nesta página.")
+    st.success(f"✅ Relatório(s) — {cursos_fmt} — gerado(s); o e-mail para "
+               f"**{email.strip()}** sai em instantes.")
+    st.info("Verifique sua caixa de entrada (e a pasta de spam) em alguns minutos. "
+            "Os PDFs ficam no servidor só até o e-mail ser enviado.")
+
 
+# Depois da primeira pintura: o formulário já está na tela enquanto os módulos
+# pesados são importados.
+_aquecimento()
 
 if enviar:
     processar_e_enviar()
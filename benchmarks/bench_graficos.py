@@ -0,0 +1,163 @@
+"""Benchmark dos backends de gráficos do relatório (seaborn × matplotlib puro
+× reportlab vetorial).
+
+Mede, lado a lado:
+
+- o tempo de importação (processo novo) do seaborn e do backend leve
+  (``core.graficos_mpl``), além do ``matplotlib.pyplot`` que ambos usam;
+- o custo de cada gráfico do relatório (desenho + PNG a 150 dpi, como no
+  PDF) nos dois backends matplotlib;
+- a rasterização: o caminho antigo (``tight_layout`` + ``savefig`` com
+  ``bbox_inches='tight'``) contra o layout fixo com um único desenho
+  (``core.figuras``), com e sem paleta de 256 cores;
+- o relatório PDF completo (gráficos + PDF) em cada backend: tempo e tamanho;
+- o KDE por binning + FFT contra a soma direta dos núcleos (tempo e erro).
+
+Os dados são os de um ``.xls`` real, se informado, ou os de uma turma
+sintética típica (45 alunos, 14 disciplinas).
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.bench_graficos [caminho/mapa.xls]
+"""
+import subprocess
+import sys
+import timeit
+
+import matplotlib
+matplotlib.use('Agg')
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from core import relatorios
+from core.figuras import png_da_figura
+from core.kde import banda_scott, kde_binned
+
+# Backends que produzem figuras matplotlib (o 'reportlab' não passa por PNG).
+RASTER = ('seaborn', 'matplotlib')
+
+
+def turma_sintetica(n_alunos=45, n_disciplinas=14, semente=7):
+    rng = np.random.default_rng(semente)
+    codigos = [f"D{j:02d}" for j in range(n_disciplinas)]
+    disciplinas = {c: f"DISCIPLINA {j + 1} - 2ª SÉRIE" for j, c in enumerate(codigos)}
+    nomes = [f"ALUNO {i + 1:02d}" for i in range(n_alunos)]
+    notas = np.clip(rng.normal(17, 6, (n_alunos, n_disciplinas)).round(1), 0, 30)
+    faltas = rng.poisson(4, (n_alunos, n_disciplinas)).astype(float)
+    df_notas = pd.DataFrame(notas, columns=codigos).assign(nome=nomes)
+    df_faltas = pd.DataFrame(faltas, columns=codigos).assign(nome=nomes)
+    return df_notas, df_faltas, disciplinas, {'bimestre_num': 2}
+
+
+def tempo_importacao(modulos):
+    """Segundos para importar ``modulos`` em um interpretador novo (mínimo de 3)."""
+    codigo = ("import time; t = time.perf_counter(); "
+              + "; ".join(f"import {m}" for m in modulos)
+              + "; print(time.perf_counter() - t)")
+    return min(float(subprocess.run([sys.executable, '-c', codigo], capture_output=True,
+                                    text=True, check=True).stdout) for _ in range(3))
+
+
+def kde_direto(valores, grade, banda):
+    z = (grade[:, None] - valores[None, :]) / banda
+    return np.exp(-0.5 * z ** 2).sum(axis=1) / (len(valores) * banda * np.sqrt(2 * np.pi))
+
+
+def main(argv):
+    if argv:
+        from core.manipulacao import processar_curso_generico
+        df_notas, df_faltas, disciplinas, metadados = processar_curso_generico(argv[0])
+    else:
+        df_notas, df_faltas, disciplinas, metadados = turma_sintetica()
+    estat = relatorios.calcular_estatisticas(df_notas, disciplinas, df_faltas=df_faltas,
+                                             metadados=metadados)
+    specs = relatorios.especificacoes_graficos(df_notas, 'Curso', disciplinas, estat,
+                                               df_faltas=df_faltas)
+    print(f"{len(df_notas)} alunos, {len(estat.disciplinas_com_notas)} disciplinas com notas")
+
+    print("\nImportação (processo novo):")
+    base = tempo_importacao(['matplotlib.pyplot'])
+    for rotulo, modulos in [('matplotlib.pyplot', ['matplotlib.pyplot']),
+                            ('+ seaborn', ['matplotlib.pyplot', 'seaborn']),
+                            ('+ core.graficos_mpl', ['matplotlib.pyplot', 'core.graficos_mpl'])]:
+        t = base if len(modulos) == 1 else tempo_importacao(modulos)
+        print(f"{rotulo:>22}: {t * 1e3:7.1f} ms")
+
+    def png(spec, backend):
+        fig = relatorios.desenhar_grafico(spec, backend)
+        relatorios._fig_para_imagem(fig)
+        plt.close(fig)
+
+    print("\nGráfico (desenho + PNG 150 dpi), ms:")
+    print(f"{'':>28}{'seaborn':>10}{'matplotlib':>12}")
+    totais = dict.fromkeys(RASTER, 0.0)
+    for chave, spec in specs.items():
+        if spec is None:
+            continue
+        linha = f"{chave:>28}"
+        for backend in RASTER:
+            png(spec, backend)  # aquecimento (fontes, caches)
+            t = min(timeit.repeat(lambda: png(spec, backend), number=1, repeat=5))
+            totais[backend] += t
+            linha += f"{t * 1e3:{10 if backend == 'seaborn' else 12}.1f}"
+        print(linha)
+    print(f"{'total':>28}{totais['seaborn'] * 1e3:10.1f}{totais['matplotlib'] * 1e3:12.1f}")
+
+    def png_antigo(fig):
+        fig.set_dpi(100)
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
+        return buf.getvalue()
+
+    modos = {'antigo': png_antigo, 'fixo': png_da_figura,
+             'fixo+paleta': lambda fig: png_da_figura(fig, paleta=True)}
+    print("\nRasterização dos gráficos (desenho + PNG, soma do relatório):")
+    for backend in RASTER:
+        for nome, rasterizar in modos.items():
+            def todos():
+                tamanho = 0
+                for spec in specs.values():
+                    if spec is not None:
+                        fig = relatorios.desenhar_grafico(spec, backend)
+                        tamanho += len(rasterizar(fig))
+                        plt.close(fig)
+                return tamanho
+            tamanho = todos()
+            t = min(timeit.repeat(todos, number=1, repeat=3))
+            print(f"{backend:>12} {nome:>12}: {t * 1e3:8.1f} ms | {tamanho / 1024:7.1f} KB")
+
+    def relatorio(backend, png_paleta=False):
+        figuras = relatorios.gerar_todos_graficos(df_notas, 'Curso', disciplinas, estat,
+                                                  df_faltas=df_faltas, backend=backend)
+        with relatorios.criar_relatorio_pdf('Curso', estat, figuras,
+                                            png_paleta=png_paleta) as pdf:
+            return pdf.seek(0, 2)
+
+    print("\nRelatório completo (gráficos + PDF):")
+    for backend, paleta in [(b, False) for b in relatorios.BACKENDS_GRAFICOS] + [('matplotlib', True)]:
+        tamanho = relatorio(backend, paleta)
+        t = min(timeit.repeat(lambda: relatorio(backend, paleta), number=1, repeat=3))
+        rotulo = backend + (' + paleta' if paleta else '')
+        print(f"{rotulo:>21}: {t * 1e3:8.1f} ms | {tamanho / 1024:7.1f} KB")
+
+    print("\nKDE (200 pontos, banda de Scott):")
+    rng = np.random.default_rng(1)
+    for n in (45, 1_000, 100_000):
+        valores = rng.normal(15, 5, n)
+        banda = banda_scott(valores)
+        grade = np.linspace(valores.min(), valores.max(), 200)
+        exato = kde_direto(valores, grade, banda)
+        aprox = kde_binned(valores, grade, banda)
+        erro = np.abs(aprox - exato).max() / exato.max()
+        t_direto = min(timeit.repeat(lambda: kde_direto(valores, grade, banda), number=3, repeat=3)) / 3
+        t_fft = min(timeit.repeat(lambda: kde_binned(valores, grade, banda), number=3, repeat=3)) / 3
+        print(f"n={n:>7}: direto {t_direto * 1e3:8.2f} ms | binning+FFT {t_fft * 1e3:6.2f} ms"
+              f" | erro máx. relativo {erro:.1e}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
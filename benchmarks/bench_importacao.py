@@ -0,0 +1,69 @@
+"""Benchmark da partida a frio do app: custo de importação (``-X importtime``).
+
+Compara, em interpretadores novos, o que o ``app.py`` importa antes da
+primeira pintura da página com os módulos pesados do relatório, que ficam
+para a thread de aquecimento / primeira geração (``app._MODULOS_PESADOS``).
+O ``streamlit`` entra nas duas contas e não é medido (nem precisa estar
+instalado).
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.bench_importacao [-n REPETIÇÕES] [--top N]
+"""
+import argparse
+import subprocess
+import sys
+
+# O que ``app.py`` importa no carregamento.
+PRIMEIRA_PINTURA = ['core.email_sender', 'core.usage_tracker', 'core.versao']
+# Mantido igual a ``app._MODULOS_PESADOS`` (o app não é importado aqui: exige
+# o streamlit).
+PESADOS = ['core.relatorios', 'core.manipulacao', 'core.cache_mapas', 'core.acumulado',
+           'core.agregados']
+
+
+def importtime(modulos):
+    """{módulo: (próprio, cumulativo) em µs} do ``-X importtime`` ao importar
+    ``modulos`` em um interpretador novo."""
+    codigo = "; ".join(f"import {m}" for m in modulos)
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                           capture_output=True, text=True, check=True).stderr
+    tempos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, cumulativo, nome = linha[len('import time:'):].split('|')
+        tempos[nome.strip()] = (int(proprio), int(cumulativo))
+    return tempos
+
+
+def total_ms(modulos, repeticoes):
+    """Menor soma dos cumulativos de ``modulos`` (ms) em ``repeticoes`` processos."""
+    return min(sum(importtime(modulos)[m][1] for m in modulos)
+               for _ in range(repeticoes)) / 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_importacao')
+    parser.add_argument('-n', '--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10,
+                        help="pacotes mais caros listados (padrão: 10)")
+    args = parser.parse_args(argv)
+
+    antes = total_ms(PRIMEIRA_PINTURA + PESADOS, args.repeticoes)
+    depois = total_ms(PRIMEIRA_PINTURA, args.repeticoes)
+    print(f"Importações no carregamento da página (mínimo de {args.repeticoes}):")
+    print(f"  tudo no topo do app.py: {antes:7.1f} ms")
+    print(f"  só a primeira pintura : {depois:7.1f} ms")
+
+    partida = importtime([])  # o que o interpretador já importa ao subir (site...)
+    tempos = importtime(PESADOS)
+    raizes = {nome: cum for nome, (_, cum) in tempos.items()
+              if '.' not in nome and nome not in partida}
+    print("\nPacotes mais caros entre os pesados (ms, cumulativo: inclui dependências):")
+    for nome, cum in sorted(raizes.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"  {nome:>20}: {cum / 1e3:7.1f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
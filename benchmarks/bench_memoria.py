@@ -0,0 +1,141 @@
+"""Benchmark de memória do relatório: PDF + e-mail, com orçamento por relatório.
+
+Mede o pico de memória alocada (``tracemalloc``) de ``criar_relatorio_pdf``
+seguido do envio por e-mail a um servidor SMTP nulo (descarta os dados, sem
+rede), em três caminhos:
+
+- antigo: o PDF inteiro copiado (``getvalue``) para um ``EmailMessage`` e
+  enviado com ``send_message`` (base64, mensagem serializada, pontos
+  escapados: várias cópias do anexo);
+- em memória: o ``SpooledTemporaryFile`` abaixo do limite, com o anexo
+  codificado bloco a bloco no DATA (``core.email_sender``);
+- em disco: o mesmo com ``memoria_max=0`` (o PDF vai logo para o arquivo).
+
+O pico total costuma vir da montagem do PDF (rasterização dos gráficos);
+o do envio é mostrado à parte. As figuras são geradas fora da medição, e
+cada caminho roda uma vez antes (imports e caches de primeira chamada não
+entram no pico). Termina com status 1 se o pico do caminho em memória
+passar de ``--orcamento-mb`` (padrão: 48 MB). O pico do envio em si é
+verificado em ``tests/test_memoria.py``.
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.bench_memoria [caminho/mapa.xls] [--backend B] [--orcamento-mb N]
+"""
+import argparse
+import smtplib
+import sys
+import tracemalloc
+from email.message import EmailMessage
+
+import matplotlib
+matplotlib.use('Agg')
+
+from core import email_sender, relatorios
+
+from .bench_graficos import turma_sintetica
+
+REMETENTE, DESTINATARIO = 'relatorios@gmail.com', 'coordenador@cefetmg.br'
+
+
+class ServidorNulo(smtplib.SMTP):
+    """SMTP sem conexão: aceita todos os comandos e descarta a mensagem."""
+
+    def __init__(self):
+        super().__init__()
+        self.enviados = 0
+        self._em_data = False
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def send(self, s):
+        self.enviados += len(s)
+
+    def putcmd(self, cmd, args=""):
+        self._em_data = cmd.lower() == 'data'
+
+    def getreply(self):
+        if self._em_data:
+            self._em_data = False
+            return 354, b'Manda'
+        return 250, b'OK'
+
+
+def enviar_antigo(pdf):
+    msg = EmailMessage()
+    msg['From'], msg['To'], msg['Subject'] = REMETENTE, DESTINATARIO, 'Relatório'
+    msg.set_content('Segue em anexo.')
+    msg.add_attachment(pdf.read(), maintype='application', subtype='pdf',
+                       filename='relatorio.pdf')
+    ServidorNulo().send_message(msg)
+
+
+def enviar_novo(pdf):
+    partes = email_sender._partes_mensagem(REMETENTE, DESTINATARIO, 'Relatório',
+                                           'Segue em anexo.', [('relatorio.pdf', pdf)])
+    email_sender._enviar_partes(ServidorNulo(), REMETENTE, DESTINATARIO, partes)
+
+
+CAMINHOS = {
+    'antigo': (enviar_antigo, relatorios.PDF_MEMORIA_MAX),
+    'em memória': (enviar_novo, relatorios.PDF_MEMORIA_MAX),
+    'em disco': (enviar_novo, 0),
+}
+
+
+def pico(caminho, estat, figuras):
+    """(pico total, pico do envio, tamanho do PDF) de gerar e enviar um
+    relatório, em bytes. O pico do envio é o que ele aloca além do que já
+    estava alocado ao começar (o PDF pronto)."""
+    enviar, memoria_max = CAMINHOS[caminho]
+    tracemalloc.start()
+    with relatorios.criar_relatorio_pdf('Curso', estat, figuras,
+                                        memoria_max=memoria_max) as pdf:
+        antes, pico_pdf = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        enviar(pdf)
+        _, pico_envio = tracemalloc.get_traced_memory()
+        tamanho = pdf.seek(0, 2)
+    tracemalloc.stop()
+    return max(pico_pdf, pico_envio), pico_envio - antes, tamanho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_memoria')
+    parser.add_argument('mapa', nargs='?', help="Mapa de Turma (.xls/.xlsx)")
+    parser.add_argument('--backend', choices=relatorios.BACKENDS_GRAFICOS, default='seaborn')
+    parser.add_argument('--orcamento-mb', type=float, default=48,
+                        help="pico máximo aceito por relatório (padrão: 48 MB)")
+    args = parser.parse_args(argv)
+
+    if args.mapa:
+        from core.manipulacao import processar_curso_generico
+        df_notas, df_faltas, disciplinas, metadados = processar_curso_generico(args.mapa)
+    else:
+        df_notas, df_faltas, disciplinas, metadados = turma_sintetica()
+    estat = relatorios.calcular_estatisticas(df_notas, disciplinas, df_faltas=df_faltas,
+                                             metadados=metadados)
+
+    def figuras():
+        return relatorios.gerar_todos_graficos(df_notas, 'Curso', disciplinas, estat,
+                                               df_faltas=df_faltas, backend=args.backend)
+
+    for caminho in CAMINHOS:  # aquecimento: imports e caches de primeira chamada
+        pico(caminho, estat, figuras())
+    print(f"Pico por relatório (PDF + e-mail), backend {args.backend}:")
+    picos = {}
+    for caminho in CAMINHOS:
+        picos[caminho], envio, tamanho = pico(caminho, estat, figuras())
+        print(f"{caminho:>12}: {picos[caminho] / 2**20:6.1f} MB | envio "
+              f"{envio / 2**20:6.2f} MB (PDF de {tamanho / 1024:.0f} KB)")
+
+    if picos['em memória'] > args.orcamento_mb * 2**20:
+        print(f"ACIMA do orçamento de {args.orcamento_mb:g} MB.", file=sys.stderr)
+        return 1
+    print(f"Dentro do orçamento de {args.orcamento_mb:g} MB.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
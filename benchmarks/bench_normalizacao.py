@@ -0,0 +1,98 @@
+"""Micro-benchmark da remoção de acentos (``core.texto``).
+
+Compara a implementação antiga (NFD + gerador por caractere, a cada chamada)
+com a atual (atalho ASCII + ``str.translate`` + memo LRU) sobre a população
+de células de um mapa de turma: a de um ``.xls`` real, se informado, ou a de
+um mapa sintético típico (45 alunos, 14 disciplinas, cabeçalho e legenda).
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.bench_normalizacao [caminho/mapa.xls]
+"""
+import random
+import sys
+import timeit
+import unicodedata
+
+from core.texto import _remover_acentos_unicode, remover_acentos
+
+_NOMES = ['JOÃO', 'MARIA', 'JOSÉ', 'ANA', 'LUÍSA', 'GABRIEL', 'BEATRIZ',
+          'VINÍCIUS', 'LETÍCIA', 'PEDRO', 'CAIO', 'HELENA', 'ÍCARO']
+_SOBRENOMES = ['SILVA', 'SOUZA', 'ARAÚJO', 'CONCEIÇÃO', 'GONÇALVES', 'LIMA',
+               'FALCÃO', 'BRANDÃO', 'MOREIRA', 'ASSUNÇÃO', 'PEREIRA']
+_DISCIPLINAS = [
+    ('1MAT.006', 'MATEMÁTICA - 2ª SÉRIE'), ('1QUI.003', 'QUÍMICA - 2ª SÉRIE'),
+    ('1TFIL2.1', 'FILOSOFIA - 2ª SÉRIE'), ('1TLP2.1', 'LÍNGUA PORTUGUESA - 2ª SÉRIE'),
+    ('GEO.2', 'GEOGRAFIA - 2ª SÉRIE'), ('HIST.2', 'HISTÓRIA - 2ª SÉRIE'),
+    ('1CIE.010', 'BIOLOGIA - 2ª SÉRIE'), ('1CIE.011', 'FÍSICA - 2ª SÉRIE'),
+    ('SOC.2', 'SOCIOLOGIA - 2ª SÉRIE'), ('1TT.009', 'PLANEJAMENTO DE TRANSPORTES'),
+    ('1TT.35', 'LABORATÓRIO DE PESQUISA DE TRANSPORTES E TRÂNSITO'),
+    ('1TT.37', 'LABORATÓRIO DE TOPOGRAFIA URBANA'),
+    ('1TT.62', 'LABORATÓRIO DE SEGURANÇA VIÁRIA'),
+    ('4929', 'INTRODUÇÃO À ENGENHARIA DE TRÁFEGO'),
+]
+
+
+def remover_acentos_antigo(txt):
+    """Implementação anterior, para comparação."""
+    if not isinstance(txt, str):
+        txt = str(txt)
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', txt)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def celulas_sinteticas(n_alunos=45, semente=7):
+    """Textos de um mapa típico, na forma em que as células são comparadas."""
+    rnd = random.Random(semente)
+    celulas = ['Curso:', 'TÉCNICO EM TRÂNSITO - BH-1TT (INTEGRADO - MTN)',
+               'Etapa:', '2º Bimestre', 'Período Letivo:', '2025',
+               'Turma:', 'TT2A', 'Nº', 'Matrícula', 'Nome do Aluno',
+               'Situação', 'Total Faltas', 'LEGENDA']
+    for codigo, nome in _DISCIPLINAS:
+        celulas += [codigo, 'N', 'F', codigo, nome]
+    for i in range(n_alunos):
+        nome = (f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} "
+                f"{rnd.choice(_SOBRENOMES)}")
+        celulas += [str(i + 1), f"2024{rnd.randrange(10**7):07d}", nome, 'APR']
+        celulas += [f"{rnd.uniform(0, 30):.1f}" for _ in _DISCIPLINAS]
+        celulas += [str(rnd.randrange(12)) for _ in _DISCIPLINAS]
+    return celulas
+
+
+def celulas_do_arquivo(caminho):
+    from core.manipulacao import _ler_xls_bruto, _texto_celula
+    df = _ler_xls_bruto(caminho)
+    return [_texto_celula(v) for v in df.to_numpy(dtype=object).ravel()]
+
+
+def main(argv):
+    celulas = celulas_do_arquivo(argv[0]) if argv else celulas_sinteticas()
+    assert [remover_acentos(c) for c in celulas] == \
+        [remover_acentos_antigo(c) for c in celulas]
+    n_ascii = sum(c.isascii() for c in celulas)
+    print(f"{len(celulas)} células ({n_ascii} ASCII, "
+          f"{len(celulas) - n_ascii} com acentos)")
+
+    def antigo():
+        return [remover_acentos_antigo(c) for c in celulas]
+
+    def atual_frio():
+        _remover_acentos_unicode.cache_clear()
+        return [remover_acentos(c) for c in celulas]
+
+    def atual_quente():
+        return [remover_acentos(c) for c in celulas]
+
+    repeticoes = 50
+    for rotulo, func in [('antigo', antigo),
+                         ('atual (memo frio)', atual_frio),
+                         ('atual (memo quente)', atual_quente)]:
+        t = min(timeit.repeat(func, number=repeticoes, repeat=5))
+        print(f"{rotulo:>20}: {t / repeticoes * 1e3:7.3f} ms por mapa")
+    print(f"memo: {_remover_acentos_unicode.cache_info()}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,87 @@
+"""Benchmark da montagem do PDF: passada única × ``multiBuild``.
+
+``criar_relatorio_pdf`` monta o documento em uma passada e desenha o sumário
+no espaço reservado ao final (``_DocComSumario.montar``). O caminho antigo,
+``multiBuild`` com o ``TableOfContents`` no story, monta e desenha o
+documento inteiro, imagens incluídas, ao menos duas vezes. Aqui os dois são
+comparados no mesmo story: tempo de ``criar_relatorio_pdf`` (as figuras são
+geradas fora da medição) e pico de memória alocada (``tracemalloc``).
+
+Os dados são os de um ``.xls`` real, se informado, ou os de uma turma
+sintética típica (ver ``bench_graficos``).
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.bench_pdf [caminho/mapa.xls] [-n REPETIÇÕES]
+"""
+import argparse
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+
+from core import relatorios
+
+from .bench_graficos import turma_sintetica
+
+_montar = relatorios._DocComSumario.montar
+
+
+def _montar_em_passadas(doc, story):
+    reservado = next(f for f in story if isinstance(f, relatorios._SumarioReservado))
+    doc._montar_em_passadas([reservado.toc if f is reservado else f for f in story])
+
+
+MODOS = {'passada única': _montar, 'multiBuild': _montar_em_passadas}
+
+
+def medir(modo, estat, gerar_figuras, repeticoes):
+    """(menor tempo em s, pico de memória em bytes, tamanho do PDF) de
+    ``criar_relatorio_pdf`` montando com ``modo``."""
+    relatorios._DocComSumario.montar = MODOS[modo]
+    try:
+        tempos = []
+        for _ in range(repeticoes):
+            figuras = gerar_figuras()
+            inicio = time.perf_counter()
+            with relatorios.criar_relatorio_pdf('Curso', estat, figuras) as pdf:
+                tempos.append(time.perf_counter() - inicio)
+                tamanho = pdf.seek(0, 2)
+        figuras = gerar_figuras()
+        tracemalloc.start()
+        relatorios.criar_relatorio_pdf('Curso', estat, figuras).close()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        relatorios._DocComSumario.montar = _montar
+    return min(tempos), pico, tamanho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_pdf')
+    parser.add_argument('mapa', nargs='?', help="Mapa de Turma (.xls/.xlsx)")
+    parser.add_argument('-n', '--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.mapa:
+        from core.manipulacao import processar_curso_generico
+        df_notas, df_faltas, disciplinas, metadados = processar_curso_generico(args.mapa)
+    else:
+        df_notas, df_faltas, disciplinas, metadados = turma_sintetica()
+    estat = relatorios.calcular_estatisticas(df_notas, disciplinas, df_faltas=df_faltas,
+                                             metadados=metadados)
+
+    print(f"criar_relatorio_pdf (mínimo de {args.repeticoes}; pico pelo tracemalloc):")
+    for backend in relatorios.BACKENDS_GRAFICOS:
+        def gerar_figuras():
+            return relatorios.gerar_todos_graficos(df_notas, 'Curso', disciplinas, estat,
+                                                   df_faltas=df_faltas, backend=backend)
+        for modo in MODOS:
+            t, pico, tamanho = medir(modo, estat, gerar_figuras, args.repeticoes)
+            print(f"{backend:>10} {modo:>14}: {t * 1e3:8.1f} ms | pico {pico / 2**20:6.1f} MB"
+                  f" | {tamanho / 1024:6.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""Acumulado do ano letivo: soma dos bimestres já processados de uma turma.
+
+Cada mapa cobre um único bimestre, mas a aprovação é sobre os 100 pontos do
+ano. ``AcumuladoTurma`` guarda, por turma, as notas de cada bimestre já
+processado (por matrícula) e mantém **incrementalmente**:
+
+- o total de pontos de cada aluno em cada disciplina;
+- a média da turma por disciplina em cada bimestre (tendência);
+- os pontos já distribuídos e o limiar de aprovação acumulado (60% deles).
+
+Registrar um novo bimestre só lê o mapa novo: a contribuição dele é somada
+aos totais guardados (e, se o bimestre for reenviado, a versão anterior é
+subtraída antes). Os mapas anteriores nunca são relidos.
+
+O estado de cada turma fica em um JSON no diretório configurado em
+``ACUMULADO_DIR``. Como guarda notas de alunos em disco, o recurso é opcional
+e o estado tem prazo: a cada registro, as turmas sem bimestre novo há mais de
+``dias`` dias (padrão: ``DIAS_PADRAO``, um ano letivo com folga) são apagadas.
+Pela linha de comando (na raiz do repositório):
+
+    python -m core.acumulado DIR                # turmas guardadas
+    python -m core.acumulado DIR --apagar 0     # apaga todas
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from .relatorios import MAX_PONTOS_BIMESTRE, PERCENTUAL_APROVACAO
+from .texto import remover_acentos
+
+_VERSAO_ESTADO = 1
+DIAS_PADRAO = 400
+
+
+def chave_turma(metadados):
+    """Identificador da turma no ano: período letivo + curso + turma."""
+    partes = [metadados.get('periodo_letivo'), metadados.get('curso'),
+              metadados.get('turma')]
+    texto = '_'.join(str(p) for p in partes if p) or 'turma'
+    return re.sub(r'\W+', '_', remover_acentos(texto).strip().lower()).strip('_')
+
+
+@contextmanager
+def _travado(caminho):
+    """Trava exclusiva do arquivo de estado (lotes paralelos podem registrar
+    bimestres da mesma turma ao mesmo tempo). Sem ``fcntl``, não trava."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(caminho + '.lock', 'w') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+class AcumuladoTurma:
+    """Estado acumulado de uma turma (ver docstring do módulo)."""
+
+    def __init__(self, chave, estado=None):
+        self.chave = chave
+        estado = estado or {}
+        self.disciplinas = estado.get('disciplinas', {})
+        self.alunos = estado.get('alunos', {})
+        # {bim (str): {'notas': {mat: {disc: nota}}, 'medias': {disc: média},
+        #              'processado_em': iso}}
+        self.bimestres = estado.get('bimestres', {})
+        # {mat: {disc: total de pontos}}
+        self.totais = estado.get('totais', {})
+
+    # ----- persistência -----
+    @staticmethod
+    def _caminho(diretorio, chave):
+        return os.path.join(diretorio, f"{chave}.json")
+
+    @classmethod
+    def carregar(cls, diretorio, chave):
+        caminho = cls._caminho(diretorio, chave)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            return cls(chave)
+        if estado.get('versao') != _VERSAO_ESTADO:
+            return cls(chave)
+        return cls(chave, estado)
+
+    def salvar(self, diretorio):
+        caminho = self._caminho(diretorio, self.chave)
+        temp = caminho + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'versao': _VERSAO_ESTADO,
+                'disciplinas': self.disciplinas,
+                'alunos': self.alunos,
+                'bimestres': self.bimestres,
+                'totais': self.totais,
+            }, f, ensure_ascii=False)
+        os.replace(temp, caminho)
+
+    # ----- atualização incremental -----
+    def _somar(self, notas, sinal):
+        for mat, por_disc in notas.items():
+            totais_aluno = self.totais.setdefault(mat, {})
+            for disc, nota in por_disc.items():
+                totais_aluno[disc] = totais_aluno.get(disc, 0.0) + sinal * nota
+
+    def registrar_bimestre(self, bimestre, df_notas, disciplinas_dict):
+        """Incorpora as notas de um bimestre (substitui o mesmo bimestre se já
+        registrado). Notas ausentes não somam pontos."""
+        bim = str(int(bimestre))
+        anterior = self.bimestres.get(bim)
+        if anterior:
+            self._somar(anterior['notas'], -1)
+
+        codigos = [c for c in disciplinas_dict if c in df_notas.columns]
+        valores = df_notas[codigos].apply(pd.to_numeric, errors='coerce')
+        notas = {}
+        for mat, nome, linha in zip(df_notas['matricula'], df_notas['nome'],
+                                    valores.itertuples(index=False, name=None)):
+            mat = str(mat)
+            self.alunos[mat] = str(nome)
+            notas[mat] = {c: float(v) for c, v in zip(codigos, linha) if pd.notna(v)}
+
+        # Tendência: média só das disciplinas com notas lançadas no bimestre.
+        medias = {}
+        for c in codigos:
+            col = valores[c].dropna()
+            if not col.empty and col.max() > 0:
+                medias[c] = float(col.mean())
+
+        self._somar(notas, +1)
+        self.disciplinas.update({c: disciplinas_dict[c] for c in codigos})
+        self.bimestres[bim] = {
+            'notas': notas,
+            'medias': medias,
+            'processado_em': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    # ----- resumo para o relatório -----
+    def resumo(self):
+        """Indicadores acumulados (dict) para a seção do relatório."""
+        bims = sorted(int(b) for b in self.bimestres)
+        pontos = sum(MAX_PONTOS_BIMESTRE.get(b, 0) for b in bims)
+        limiar = pontos * PERCENTUAL_APROVACAO
+
+        # Só disciplinas com notas em algum bimestre entram no acumulado.
+        codigos = [c for c in self.disciplinas
+                   if any(c in self.bimestres[str(b)]['medias'] for b in bims)]
+        totais = pd.DataFrame.from_dict(self.totais, orient='index').reindex(
+            columns=codigos).fillna(0.0)
+
+        tendencia = []
+        for c in codigos:
+            tendencia.append({
+                'codigo': c,
+                'disciplina': self.disciplinas[c],
+                'medias_bimestre': {b: self.bimestres[str(b)]['medias'].get(c) for b in bims},
+                'media_total': float(totais[c].mean()) if len(totais) else 0.0,
+                'alunos_abaixo': int((totais[c] < limiar).sum()),
+            })
+
+        abaixo = (totais < limiar).sum(axis=1)
+        criticos = abaixo[abaixo > 0].sort_values(ascending=False, kind='stable').head(10)
+        return {
+            'bimestres': bims,
+            'pontos_distribuidos': pontos,
+            'limiar_acumulado': limiar,
+            'total_alunos': len(totais),
+            'media_geral_total': float(totais.mean(axis=1).mean()) if len(totais) else 0.0,
+            'tendencia': tendencia,
+            'alunos_criticos': [(self.alunos.get(m, m), int(n)) for m, n in criticos.items()],
+        }
+
+
+def registrar_e_resumir(diretorio, df_notas, disciplinas_dict, metadados,
+                        dias=DIAS_PADRAO):
+    """Registra o bimestre do mapa no acumulado da turma e devolve o resumo.
+
+    Carrega o estado, soma o bimestre novo, salva e devolve ``resumo()`` —
+    tudo sob trava do arquivo da turma. Depois apaga as turmas paradas há
+    mais de ``dias`` dias (None: guarda para sempre).
+    """
+    bim = (metadados or {}).get('bimestre_num')
+    if bim not in MAX_PONTOS_BIMESTRE:
+        return None
+    os.makedirs(diretorio, exist_ok=True)
+    chave = chave_turma(metadados)
+    with _travado(AcumuladoTurma._caminho(diretorio, chave)):
+        acumulado = AcumuladoTurma.carregar(diretorio, chave)
+        acumulado.registrar_bimestre(bim, df_notas, disciplinas_dict)
+        acumulado.salvar(diretorio)
+    if dias is not None:
+        apagar_antigos(diretorio, dias)
+    return acumulado.resumo()
+
+
+def turmas_guardadas(diretorio):
+    """[(chave, dias desde o último registro)] das turmas em ``diretorio``."""
+    agora = time.time()
+    turmas = []
+    for nome in sorted(os.listdir(diretorio)):
+        if not nome.endswith('.json'):
+            continue
+        try:
+            idade = (agora - os.path.getmtime(os.path.join(diretorio, nome))) / 86400
+        except OSError:
+            continue
+        turmas.append((nome[:-len('.json')], idade))
+    return turmas
+
+
+def apagar_antigos(diretorio, dias):
+    """Apaga o estado das turmas sem registro há mais de ``dias`` dias
+    (períodos letivos encerrados); devolve quantas."""
+    n = 0
+    for chave, idade in turmas_guardadas(diretorio):
+        if idade <= dias:
+            continue
+        caminho = AcumuladoTurma._caminho(diretorio, chave)
+        with _travado(caminho):
+            try:
+                os.remove(caminho)
+                n += 1
+            except OSError:
+                continue
+        try:
+            os.remove(caminho + '.lock')
+        except OSError:
+            pass
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.acumulado',
+        description="Turmas guardadas no acumulado do ano letivo.")
+    parser.add_argument('diretorio', help="diretório do acumulado (ACUMULADO_DIR)")
+    parser.add_argument('--apagar', type=float, metavar='DIAS',
+                        help="apaga as turmas sem registro há mais de DIAS dias (0: todas)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.diretorio):
+        print(f"Diretório não encontrado: {args.diretorio}", file=sys.stderr)
+        return 1
+    if args.apagar is not None:
+        print(f"{apagar_antigos(args.diretorio, args.apagar)} turma(s) apagada(s).")
+    for chave, idade in turmas_guardadas(args.diretorio):
+        print(f"  {chave}: último registro há {idade:.0f} dia(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,617 @@
+"""Estatísticas parciais por turma, combináveis, e o relatório consolidado.
+
+Cada relatório de turma é calculado isoladamente. Para comparar turmas, ou
+para ter números do campus, seria preciso reprocessar todos os mapas e manter
+todos os alunos na memória, porque mediana e P90 não se somam. Aqui, cada
+turma deixa um **parcial** pequeno, com resumos que se combinam de forma
+associativa:
+
+- ``Momentos``: contagem, soma, soma dos quadrados, mínimo e máximo (média e
+  σ exatos);
+- ``Histograma``: contagens em faixas fixas de 0,5 ponto sobre a escala
+  0–``max_pts`` do bimestre;
+- ``Sketch``: centróides (valor, peso) no estilo *t-digest* para quantis.
+  Enquanto há poucos valores distintos (notas com uma casa decimal, faltas
+  inteiras), os centróides são os próprios valores e os quantis saem
+  exatos; acima de ``compressao`` centróides, eles são fundidos pela função
+  de escala do t-digest (mais resolução nas caudas).
+
+Um ``Parcial`` guarda esses resumos para a média por aluno, o total de faltas
+por aluno e, por disciplina, as notas e as faltas. ``consolidar`` agrupa e
+funde parciais por campus, curso ou série. ``criar_relatorio_consolidado_pdf``
+monta o PDF a partir do resultado.
+
+Os parciais são gravados em JSON (``gravar_parcial``): ``--parciais DIR`` no
+lote ou ``PARCIAIS_DIR`` no app. O consolidado é gerado pela linha de comando:
+
+    python -m core.agregados parciais/ -o consolidado.pdf --nivel curso
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+_VERSAO_PARCIAL = 1
+
+# Largura das faixas do histograma de notas (em pontos).
+LARGURA_FAIXA = 0.5
+
+# Limite de centróides do sketch antes de comprimir (cobre todas as notas de
+# uma casa decimal em 0–30, que ficam exatas).
+COMPRESSAO_PADRAO = 400
+
+NIVEIS = ('campus', 'curso', 'serie')
+
+
+# --------------------------------
+# Resumos combináveis
+# --------------------------------
+class Momentos:
+    """Contagem, soma, soma dos quadrados, mínimo e máximo."""
+
+    __slots__ = ('n', 'soma', 'soma2', 'minimo', 'maximo')
+
+    def __init__(self, n=0, soma=0.0, soma2=0.0, minimo=np.inf, maximo=-np.inf):
+        self.n = int(n)
+        self.soma = float(soma)
+        self.soma2 = float(soma2)
+        self.minimo = float(minimo)
+        self.maximo = float(maximo)
+
+    @classmethod
+    def de_valores(cls, valores):
+        v = valores[~np.isnan(valores)]
+        if not len(v):
+            return cls()
+        return cls(len(v), v.sum(), np.dot(v, v), v.min(), v.max())
+
+    def mesclar(self, outro):
+        return Momentos(self.n + outro.n, self.soma + outro.soma, self.soma2 + outro.soma2,
+                        min(self.minimo, outro.minimo), max(self.maximo, outro.maximo))
+
+    @property
+    def media(self):
+        return self.soma / self.n if self.n else float('nan')
+
+    @property
+    def desvio(self):
+        """Desvio padrão amostral (ddof=1), como no pandas."""
+        if self.n < 2:
+            return float('nan')
+        var = (self.soma2 - self.soma * self.soma / self.n) / (self.n - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+    def para_dict(self):
+        if not self.n:
+            return {'n': 0}
+        return {'n': self.n, 'soma': self.soma, 'soma2': self.soma2,
+                'minimo': self.minimo, 'maximo': self.maximo}
+
+    @classmethod
+    def de_dict(cls, d):
+        return cls(**d) if d.get('n') else cls()
+
+
+class Histograma:
+    """Contagens em faixas de ``LARGURA_FAIXA`` sobre 0–``max_pts`` (valores
+    fora da escala vão para a primeira/última faixa)."""
+
+    __slots__ = ('max_pts', 'contagens')
+
+    def __init__(self, max_pts, contagens=None):
+        self.max_pts = max_pts
+        n_faixas = int(np.ceil(max_pts / LARGURA_FAIXA))
+        self.contagens = (np.zeros(n_faixas, dtype=np.int64) if contagens is None
+                          else np.asarray(contagens, dtype=np.int64))
+
+    @classmethod
+    def de_valores(cls, valores, max_pts):
+        h = cls(max_pts)
+        v = valores[~np.isnan(valores)]
+        if len(v):
+            faixas = np.clip((v / LARGURA_FAIXA).astype(np.int64), 0, len(h.contagens) - 1)
+            h.contagens += np.bincount(faixas, minlength=len(h.contagens))
+        return h
+
+    def mesclar(self, outro):
+        if self.max_pts != outro.max_pts:
+            raise ValueError("Histogramas de escalas diferentes não podem ser combinados.")
+        return Histograma(self.max_pts, self.contagens + outro.contagens)
+
+    @property
+    def bordas(self):
+        return np.arange(len(self.contagens) + 1) * LARGURA_FAIXA
+
+    def para_dict(self):
+        return {'max_pts': self.max_pts, 'contagens': self.contagens.tolist()}
+
+    @classmethod
+    def de_dict(cls, d):
+        return cls(d['max_pts'], d['contagens'])
+
+
+class Sketch:
+    """Centróides (média, peso) para quantis aproximados, no estilo t-digest."""
+
+    __slots__ = ('medias', 'pesos', 'compressao', 'exato')
+
+    def __init__(self, medias=(), pesos=(), compressao=COMPRESSAO_PADRAO, exato=True):
+        self.medias = np.asarray(medias, dtype=np.float64)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.compressao = compressao
+        # Cada centróide ainda é um único valor (nenhuma compressão ocorreu).
+        self.exato = exato
+
+    @classmethod
+    def de_valores(cls, valores, compressao=COMPRESSAO_PADRAO):
+        v = valores[~np.isnan(valores)]
+        return cls._comprimido(v, np.ones(len(v)), compressao)
+
+    @classmethod
+    def _comprimido(cls, medias, pesos, compressao, exato=True):
+        # Valores iguais viram um único centróide (sem perda).
+        medias, inverso = np.unique(medias, return_inverse=True)
+        pesos = np.bincount(inverso, weights=pesos, minlength=len(medias))
+        if len(medias) > compressao:
+            exato = False
+            # Escala k1 do t-digest: centróides estreitos perto de q=0 e q=1.
+            total = pesos.sum()
+            q_centro = (np.cumsum(pesos) - pesos / 2) / total
+            k = compressao / (2 * np.pi) * np.arcsin(2 * q_centro - 1)
+            grupos = np.floor(k - k[0]).astype(np.int64)
+            inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+            soma_pesos = np.add.reduceat(pesos, inicios)
+            medias = np.add.reduceat(medias * pesos, inicios) / soma_pesos
+            pesos = soma_pesos
+        return cls(medias, pesos, compressao, exato)
+
+    def mesclar(self, outro):
+        return Sketch._comprimido(np.concatenate([self.medias, outro.medias]),
+                                  np.concatenate([self.pesos, outro.pesos]),
+                                  max(self.compressao, outro.compressao),
+                                  self.exato and outro.exato)
+
+    @property
+    def n(self):
+        return int(round(self.pesos.sum()))
+
+    def quantil(self, q):
+        """Quantil ``q``. Exato (mesma interpolação linear de ``np.quantile``)
+        enquanto cada centróide é um único valor; depois, interpola entre os
+        centros dos centróides, como no t-digest."""
+        if not len(self.medias):
+            return float('nan')
+        acumulado = np.cumsum(self.pesos)
+        if self.exato:
+            h = (acumulado[-1] - 1) * q
+            baixo = np.floor(h)
+            i = min(np.searchsorted(acumulado, baixo, side='right'), len(self.medias) - 1)
+            j = min(np.searchsorted(acumulado, baixo + 1, side='right'), len(self.medias) - 1)
+            return float(self.medias[i] + (h - baixo) * (self.medias[j] - self.medias[i]))
+        centros = acumulado - self.pesos / 2
+        return float(np.interp(q * acumulado[-1], centros, self.medias))
+
+    def para_dict(self):
+        return {'medias': self.medias.tolist(), 'pesos': self.pesos.tolist(),
+                'compressao': self.compressao, 'exato': self.exato}
+
+    @classmethod
+    def de_dict(cls, d):
+        return cls(d['medias'], d['pesos'], d.get('compressao', COMPRESSAO_PADRAO),
+                   d.get('exato', True))
+
+
+class Resumo:
+    """``Momentos`` + ``Sketch`` (+ ``Histograma`` se houver escala) de uma
+    variável."""
+
+    __slots__ = ('momentos', 'sketch', 'histograma')
+
+    def __init__(self, momentos, sketch, histograma=None):
+        self.momentos = momentos
+        self.sketch = sketch
+        self.histograma = histograma
+
+    @classmethod
+    def de_valores(cls, valores, max_pts=None):
+        valores = np.asarray(valores, dtype=np.float64)
+        return cls(Momentos.de_valores(valores), Sketch.de_valores(valores),
+                   None if max_pts is None else Histograma.de_valores(valores, max_pts))
+
+    def mesclar(self, outro):
+        histograma = None
+        if self.histograma is not None and outro.histograma is not None:
+            histograma = self.histograma.mesclar(outro.histograma)
+        return Resumo(self.momentos.mesclar(outro.momentos),
+                      self.sketch.mesclar(outro.sketch), histograma)
+
+    def para_dict(self):
+        d = {'momentos': self.momentos.para_dict(), 'sketch': self.sketch.para_dict()}
+        if self.histograma is not None:
+            d['histograma'] = self.histograma.para_dict()
+        return d
+
+    @classmethod
+    def de_dict(cls, d):
+        h = d.get('histograma')
+        return cls(Momentos.de_dict(d['momentos']), Sketch.de_dict(d['sketch']),
+                   None if h is None else Histograma.de_dict(h))
+
+
+# --------------------------------
+# Parcial de uma turma (ou de um grupo já combinado)
+# --------------------------------
+class Parcial:
+    """Resumos combináveis de uma turma; ``mesclar`` combina duas turmas (ou
+    grupos). Mesmo bimestre e período: a escala de notas precisa ser a mesma.
+
+    - ``turmas``: chaves das turmas incluídas;
+    - ``alunos``/``aprovados``: alunos e alunos com nota ≥ limiar em todas as
+      disciplinas com notas;
+    - ``media_aluno``/``faltas_aluno``: ``Resumo`` da média de notas e do
+      total de faltas de cada aluno;
+    - ``disciplinas``: {código: {'nome', 'notas', 'faltas', 'abaixo'}}, com
+      ``abaixo`` = notas abaixo do limiar.
+    """
+
+    __slots__ = ('periodo', 'bimestre', 'max_pts', 'limiar', 'curso', 'serie',
+                 'turmas', 'alunos', 'aprovados', 'media_aluno', 'faltas_aluno',
+                 'disciplinas')
+
+    def __init__(self, periodo, bimestre, max_pts, limiar, curso, serie, turmas,
+                 alunos, aprovados, media_aluno, faltas_aluno, disciplinas):
+        self.periodo = periodo
+        self.bimestre = bimestre
+        self.max_pts = max_pts
+        self.limiar = limiar
+        self.curso = curso
+        self.serie = serie
+        self.turmas = list(turmas)
+        self.alunos = int(alunos)
+        self.aprovados = int(aprovados)
+        self.media_aluno = media_aluno
+        self.faltas_aluno = faltas_aluno
+        self.disciplinas = disciplinas
+
+    @classmethod
+    def da_turma(cls, estatisticas, disciplinas_dict, metadados, chave=None):
+        """Parcial a partir do resultado de ``calcular_estatisticas`` (usa os
+        perfis já calculados; não relê o mapa). Um ``EstatisticasTurma``
+        desserializado não traz os perfis e não serve aqui."""
+        from .acumulado import chave_turma
+        from .relatorios import get_simplified_name
+
+        perfil = estatisticas.perfil_notas
+        if perfil is None:
+            raise ValueError("As estatísticas não trazem o perfil das notas "
+                             "(resultado desserializado?); recalcule-as a partir do mapa.")
+        perfil_faltas = estatisticas.perfil_faltas
+        max_pts = estatisticas.max_pontos_bimestre
+        limiar = estatisticas.limiar_aprovacao
+        notas = perfil.submatriz(perfil.com_notas)
+
+        disciplinas = {}
+        for c in perfil.com_notas:
+            coluna = perfil.coluna(c)
+            disciplinas[c] = {
+                'nome': get_simplified_name(c, disciplinas_dict),
+                'notas': Resumo.de_valores(coluna, max_pts),
+                'faltas': None,
+                'abaixo': int((coluna < limiar).sum()),
+            }
+        faltas_aluno = Resumo.de_valores(np.array([]))
+        if perfil_faltas is not None and perfil_faltas.com_dados:
+            for c in perfil_faltas.com_dados:
+                if c in disciplinas:
+                    disciplinas[c]['faltas'] = Resumo.de_valores(perfil_faltas.coluna(c))
+            faltas_aluno = Resumo.de_valores(
+                np.nansum(perfil_faltas.submatriz(perfil_faltas.com_dados), axis=1))
+
+        metadados = metadados or {}
+        return cls(
+            periodo=metadados.get('periodo_letivo'),
+            bimestre=estatisticas.bimestre_num,
+            max_pts=max_pts,
+            limiar=limiar,
+            curso=metadados.get('curso_amigavel') or metadados.get('curso'),
+            serie=metadados.get('serie'),
+            turmas=[chave or chave_turma(metadados)],
+            alunos=len(perfil),
+            aprovados=int((notas >= limiar).all(axis=1).sum()) if notas.shape[1] else len(perfil),
+            media_aluno=Resumo.de_valores(perfil.media_por_aluno(), max_pts),
+            faltas_aluno=faltas_aluno,
+            disciplinas=disciplinas,
+        )
+
+    def mesclar(self, outro):
+        if (self.periodo, self.bimestre) != (outro.periodo, outro.bimestre):
+            raise ValueError("Só é possível combinar parciais do mesmo período e bimestre.")
+        disciplinas = {c: dict(d) for c, d in self.disciplinas.items()}
+        for c, d in outro.disciplinas.items():
+            atual = disciplinas.get(c)
+            if atual is None:
+                disciplinas[c] = dict(d)
+                continue
+            atual['notas'] = atual['notas'].mesclar(d['notas'])
+            if atual['faltas'] is None or d['faltas'] is None:
+                atual['faltas'] = atual['faltas'] or d['faltas']
+            else:
+                atual['faltas'] = atual['faltas'].mesclar(d['faltas'])
+            atual['abaixo'] += d['abaixo']
+        return Parcial(
+            self.periodo, self.bimestre, self.max_pts, self.limiar,
+            self.curso if self.curso == outro.curso else None,
+            self.serie if self.serie == outro.serie else None,
+            self.turmas + outro.turmas,
+            self.alunos + outro.alunos,
+            self.aprovados + outro.aprovados,
+            self.media_aluno.mesclar(outro.media_aluno),
+            self.faltas_aluno.mesclar(outro.faltas_aluno),
+            disciplinas,
+        )
+
+    @property
+    def taxa_aprovacao(self):
+        return 100.0 * self.aprovados / self.alunos if self.alunos else float('nan')
+
+    # ----- serialização -----
+    def para_dict(self):
+        return {
+            'versao': _VERSAO_PARCIAL,
+            'periodo': self.periodo, 'bimestre': self.bimestre,
+            'max_pts': self.max_pts, 'limiar': self.limiar,
+            'curso': self.curso, 'serie': self.serie, 'turmas': self.turmas,
+            'alunos': self.alunos, 'aprovados': self.aprovados,
+            'media_aluno': self.media_aluno.para_dict(),
+            'faltas_aluno': self.faltas_aluno.para_dict(),
+            'disciplinas': {
+                c: {'nome': d['nome'], 'notas': d['notas'].para_dict(),
+                    'faltas': None if d['faltas'] is None else d['faltas'].para_dict(),
+                    'abaixo': d['abaixo']}
+                for c, d in self.disciplinas.items()
+            },
+        }
+
+    @classmethod
+    def de_dict(cls, d):
+        if d.get('versao') != _VERSAO_PARCIAL:
+            raise ValueError(f"Versão de parcial não suportada: {d.get('versao')}")
+        disciplinas = {
+            c: {'nome': x['nome'], 'notas': Resumo.de_dict(x['notas']),
+                'faltas': None if x['faltas'] is None else Resumo.de_dict(x['faltas']),
+                'abaixo': x['abaixo']}
+            for c, x in d['disciplinas'].items()
+        }
+        return cls(d['periodo'], d['bimestre'], d['max_pts'], d['limiar'], d['curso'],
+                   d['serie'], d['turmas'], d['alunos'], d['aprovados'],
+                   Resumo.de_dict(d['media_aluno']), Resumo.de_dict(d['faltas_aluno']),
+                   disciplinas)
+
+
+# --------------------------------
+# Armazenamento e consolidação
+# --------------------------------
+def gravar_parcial(diretorio, parcial):
+    """Grava o parcial em ``<diretorio>/<turma>_bim<N>.json`` (substitui o
+    anterior da mesma turma/bimestre). Devolve o caminho."""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"{parcial.turmas[0]}_bim{parcial.bimestre}.json")
+    temp = caminho + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(parcial.para_dict(), f, ensure_ascii=False)
+    os.replace(temp, caminho)
+    return caminho
+
+
+def carregar_parciais(entradas):
+    """Carrega os parciais de diretórios e/ou globs de arquivos ``.json``."""
+    caminhos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            caminhos.update(glob.glob(os.path.join(entrada, '*.json')))
+        else:
+            caminhos.update(glob.glob(entrada))
+    parciais = []
+    for caminho in sorted(caminhos):
+        with open(caminho, encoding='utf-8') as f:
+            parciais.append(Parcial.de_dict(json.load(f)))
+    return parciais
+
+
+def _grupo(parcial, nivel):
+    if nivel == 'campus':
+        return 'Campus'
+    if nivel == 'curso':
+        return parcial.curso or 'Curso não identificado'
+    serie = f"{parcial.serie}ª série" if parcial.serie else 'Série não identificada'
+    return f"{parcial.curso or 'Curso não identificado'} — {serie}"
+
+
+def consolidar(parciais, nivel='curso'):
+    """{(período, bimestre): {grupo: Parcial combinado}} para ``nivel`` em
+    ``NIVEIS``. Bimestres diferentes nunca se misturam."""
+    if nivel not in NIVEIS:
+        raise ValueError(f"Nível inválido: {nivel!r} (use {', '.join(NIVEIS)}).")
+    resultado = {}
+    for p in parciais:
+        grupos = resultado.setdefault((p.periodo, p.bimestre), {})
+        chave = _grupo(p, nivel)
+        grupos[chave] = grupos[chave].mesclar(p) if chave in grupos else p
+    return {k: dict(sorted(g.items())) for k, g in sorted(
+        resultado.items(), key=lambda kv: (str(kv[0][0]), kv[0][1] or 0))}
+
+
+def resumo_consolidado(parcial):
+    """Indicadores (dict) de um grupo para tabelas e JSON."""
+    m = parcial.media_aluno
+    f = parcial.faltas_aluno
+    disciplinas = []
+    for c, d in parcial.disciplinas.items():
+        notas = d['notas']
+        faltas = d['faltas']
+        disciplinas.append({
+            'codigo': c,
+            'disciplina': d['nome'],
+            'alunos': notas.momentos.n,
+            'media': notas.momentos.media,
+            'mediana': notas.sketch.quantil(0.5),
+            'desvio': notas.momentos.desvio,
+            'abaixo_limiar': d['abaixo'],
+            'faltas_media': faltas.momentos.media if faltas else None,
+            'faltas_p90': faltas.sketch.quantil(0.9) if faltas else None,
+        })
+    return {
+        'turmas': len(parcial.turmas),
+        'alunos': parcial.alunos,
+        'media_geral': m.momentos.media,
+        'mediana_medias': m.sketch.quantil(0.5),
+        'desvio_medias': m.momentos.desvio,
+        'taxa_aprovacao': parcial.taxa_aprovacao,
+        'faltas_media': f.momentos.media,
+        'faltas_mediana': f.sketch.quantil(0.5),
+        'faltas_p90': f.sketch.quantil(0.9),
+        'disciplinas': disciplinas,
+    }
+
+
+# --------------------------------
+# Relatório consolidado (PDF)
+# --------------------------------
+def _fmt(valor, casas=2):
+    if valor is None or valor != valor:
+        return '—'
+    return f"{valor:.{casas}f}"
+
+
+def criar_relatorio_consolidado_pdf(consolidado, nivel, logo_path=None):
+    """PDF do consolidado (saída de ``consolidar``); devolve um BytesIO."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (
+        BaseDocTemplate, Frame, PageBreak, PageTemplate, Paragraph, Spacer, Table,
+        TableStyle,
+    )
+
+    from .relatorios import _cabecalho_factory
+
+    buffer = io.BytesIO()
+    doc = BaseDocTemplate(buffer, pagesize=A4)
+    largura, altura = A4
+    frame = Frame(2 * cm, 2.5 * cm, largura - 4 * cm, altura - 6 * cm, id='normal')
+    doc.addPageTemplates([PageTemplate(id='principal', frames=[frame],
+                                       onPage=_cabecalho_factory(logo_path))])
+    styles = getSampleStyleSheet()
+    style_titulo = ParagraphStyle(name='TituloConsolidado', fontSize=18, leading=22,
+                                  alignment=1, fontName='Times-Bold',
+                                  textColor=colors.HexColor('#002060'), spaceAfter=0.6 * cm)
+    style_h1 = ParagraphStyle(name='H1Consolidado', parent=styles['h1'],
+                              fontName='Times-Bold', textColor=colors.HexColor('#002060'))
+    style_h2 = ParagraphStyle(name='H2Consolidado', parent=styles['h2'], fontName='Times-Bold')
+    style_caption = ParagraphStyle(name='CaptionConsolidado', parent=styles['BodyText'],
+                                   fontName='Times-Italic', fontSize=9, textColor=colors.grey)
+    style_celula = ParagraphStyle(name='CelulaConsolidado', parent=styles['BodyText'],
+                                  fontName='Times-Roman', fontSize=8, leading=10)
+    estilo_tabela = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#002060')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ])
+
+    titulo_nivel = {'campus': 'Campus', 'curso': 'por Curso', 'serie': 'por Curso e Série'}[nivel]
+    story = [Spacer(1, 2 * cm),
+             Paragraph(f"RELATÓRIO CONSOLIDADO — {titulo_nivel.upper()}", style_titulo),
+             Paragraph(f"Gerado em {datetime.now():%d/%m/%Y %H:%M} a partir dos parciais "
+                       "das turmas (sem reprocessar os mapas). Medianas e P90 são "
+                       "estimados por sketches combináveis.", style_caption),
+             Spacer(1, 0.6 * cm)]
+
+    for n_secao, ((periodo, bim), grupos) in enumerate(consolidado.items()):
+        if n_secao:
+            story.append(PageBreak())
+        amostra = next(iter(grupos.values()))
+        story.append(Paragraph(
+            f"Período {periodo or 'n/d'} · {bim or '?'}º Bimestre "
+            f"(pontuação {amostra.max_pts}, limiar {amostra.limiar:.1f})", style_h1))
+        linhas = [['Grupo', 'Turmas', 'Alunos', 'Média', 'Mediana', 'σ', 'Aprov. (%)',
+                   'Faltas (méd.)', 'Faltas P90']]
+        resumos = {}
+        for nome, parcial in grupos.items():
+            r = resumos[nome] = resumo_consolidado(parcial)
+            linhas.append([Paragraph(nome, style_celula), r['turmas'], r['alunos'],
+                           _fmt(r['media_geral']), _fmt(r['mediana_medias']),
+                           _fmt(r['desvio_medias']), _fmt(r['taxa_aprovacao'], 1),
+                           _fmt(r['faltas_media'], 1), _fmt(r['faltas_p90'], 1)])
+        tabela = Table(linhas, colWidths=[5 * cm] + [1.5 * cm] * 8, repeatRows=1)
+        tabela.setStyle(estilo_tabela)
+        story += [tabela, Spacer(1, 0.6 * cm)]
+
+        for nome, r in resumos.items():
+            if not r['disciplinas']:
+                continue
+            story.append(Paragraph(nome, style_h2))
+            linhas = [['Disciplina', 'Notas', 'Média', 'Mediana', 'σ',
+                       f'< {amostra.limiar:.1f}', 'Faltas (méd.)', 'Faltas P90']]
+            for d in sorted(r['disciplinas'], key=lambda d: d['media']):
+                linhas.append([Paragraph(d['disciplina'], style_celula), d['alunos'],
+                               _fmt(d['media']), _fmt(d['mediana']), _fmt(d['desvio']),
+                               d['abaixo_limiar'], _fmt(d['faltas_media'], 1),
+                               _fmt(d['faltas_p90'], 1)])
+            tabela = Table(linhas, colWidths=[6 * cm] + [1.57 * cm] * 7, repeatRows=1)
+            tabela.setStyle(estilo_tabela)
+            story += [tabela, Spacer(1, 0.5 * cm)]
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.agregados',
+        description="Relatório consolidado (campus/curso/série) a partir dos parciais das turmas.")
+    parser.add_argument('entradas', nargs='+',
+                        help="diretórios e/ou globs com os parciais (.json)")
+    parser.add_argument('-o', '--saida', default='consolidado.pdf',
+                        help="PDF de saída (padrão: ./consolidado.pdf)")
+    parser.add_argument('--nivel', choices=NIVEIS, default='curso',
+                        help="agrupamento (padrão: curso)")
+    parser.add_argument('--periodo', default=None, help="só este período letivo")
+    parser.add_argument('--bimestre', type=int, default=None, help="só este bimestre")
+    parser.add_argument('--json', metavar='ARQ', default=None,
+                        help="grava também os indicadores em JSON")
+    args = parser.parse_args(argv)
+
+    parciais = [p for p in carregar_parciais(args.entradas)
+                if (args.periodo is None or str(p.periodo) == args.periodo)
+                and (args.bimestre is None or p.bimestre == args.bimestre)]
+    if not parciais:
+        print("Nenhum parcial encontrado.", file=sys.stderr)
+        return 1
+    consolidado = consolidar(parciais, args.nivel)
+    with open(args.saida, 'wb') as f:
+        f.write(criar_relatorio_consolidado_pdf(consolidado, args.nivel).getbuffer())
+    if args.json:
+        dados = [{'periodo': periodo, 'bimestre': bim, 'grupo': nome,
+                  **resumo_consolidado(parcial)}
+                 for (periodo, bim), grupos in consolidado.items()
+                 for nome, parcial in grupos.items()]
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+    print(f"{len(parciais)} turma(s) consolidada(s) -> {os.path.abspath(args.saida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
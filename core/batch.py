@@ -0,0 +1,222 @@
+"""Geração de relatórios em lote (linha de comando), sem o Streamlit.
+
+Processa um diretório (ou glob) de Mapas de Turma em paralelo, um processo por
+núcleo, e grava para cada mapa o PDF do relatório e um JSON com o resumo da
+turma. Os maiores arquivos são agendados primeiro, para que o lote não termine
+esperando por um mapa grande que começou por último.
+
+Uso (na raiz do repositório):
+
+    python -m core.batch mapas/ -o relatorios/
+    python -m core.batch "mapas/2025-bim2/*.xls" -o relatorios/ -j 4
+
+Cada mapa é tratado pelo fluxo padrão (``processar_curso_generico``); o caso
+Trânsito + Estradas, que exige dois arquivos combinados, continua pelo app.
+Com ``--ia`` o comentário por IA usa a variável de ambiente ``OPENAI_API_KEY``;
+com ``--acumulado DIR`` cada bimestre é somado ao acumulado do ano da turma
+(ver ``acumulado.py``) e o relatório ganha a seção do acumulado; com
+``--parciais DIR`` cada turma grava seu parcial para o relatório consolidado
+(ver ``agregados.py``); com ``--historico DB`` cada relatório (tempos por
+etapa, tamanho, erro) entra no histórico local (ver ``historico.py``).
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import relatorios
+from .acumulado import registrar_e_resumir
+from .agregados import Parcial, gravar_parcial
+from .historico import Cronometro, HistoricoJobs
+from .manipulacao import ArquivoInvalidoError, processar_curso_generico
+
+_EXTENSOES = ('.xls', '.xlsx')
+_LOGO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'assets', 'logo_cefet.png')
+
+
+def listar_mapas(entradas):
+    """Expande diretórios e globs em caminhos de mapas, do maior para o menor."""
+    caminhos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, n) for n in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada)
+        caminhos.update(os.path.abspath(c) for c in candidatos
+                        if os.path.isfile(c) and c.lower().endswith(_EXTENSOES))
+    return sorted(caminhos, key=lambda c: (-os.path.getsize(c), c))
+
+
+def nomes_de_saida(caminhos):
+    """{caminho: nome base do PDF/JSON}, sem colisões entre mapas de mesmo
+    nome (ex.: ``mapa.xls`` e ``mapa.xlsx``, ou diretórios diferentes)."""
+    nomes = {}
+    usados = set()
+    for caminho in caminhos:
+        base, ext = os.path.splitext(os.path.basename(caminho))
+        nome = base
+        if nome in usados:
+            nome = f"{base}_{ext.lstrip('.').lower()}"
+        n = 2
+        while nome in usados:
+            nome = f"{base}_{n}"
+            n += 1
+        usados.add(nome)
+        nomes[caminho] = nome
+    return nomes
+
+
+def resumo_turma(estatisticas, nome_curso):
+    """Resumo serializável (JSON) das estatísticas de uma turma: o dict de
+    ``EstatisticasTurma.para_dict`` (recarregável com ``de_dict``) + o curso."""
+    return {'curso': nome_curso, **estatisticas.para_dict()}
+
+
+def processar_arquivo(caminho, saida, nome=None, logo_path=None, api_key='',
+                      diretorio_acumulado=None, diretorio_parciais=None,
+                      backend_graficos='seaborn', png_paleta=False):
+    """Gera ``<saida>/<nome>.pdf`` e ``<saida>/<nome>.json`` para um mapa
+    (``nome`` padrão: o nome do arquivo sem extensão).
+
+    Devolve um dict com o resultado (``ok``, caminhos, duração por etapa ou
+    erro); nunca levanta exceção, para que um mapa ruim não derrube o lote.
+    """
+    inicio = time.perf_counter()
+    cron = Cronometro()
+    base = nome or os.path.splitext(os.path.basename(caminho))[0]
+    resultado = {'arquivo': caminho, 'ok': False}
+    try:
+        with cron('processamento'):
+            df_notas, df_faltas, disciplinas_dict, metadados = processar_curso_generico(caminho)
+        if df_notas.empty:
+            raise ArquivoInvalidoError("Nenhum aluno válido foi encontrado no arquivo.")
+        nome_curso = metadados.get('curso_amigavel') or metadados.get('curso') or 'Curso'
+        resultado.update(curso=nome_curso, turma=metadados.get('turma'),
+                         bimestre=metadados.get('bimestre_num'), serie=metadados.get('serie'),
+                         alunos=len(df_notas), disciplinas=len(disciplinas_dict))
+        with cron('estatisticas'):
+            acumulado = None
+            if diretorio_acumulado:
+                acumulado = registrar_e_resumir(
+                    diretorio_acumulado, df_notas, disciplinas_dict, metadados)
+            estat = relatorios.calcular_estatisticas(df_notas, disciplinas_dict,
+                                                     df_faltas=df_faltas, metadados=metadados)
+            if acumulado:
+                estat.acumulado = acumulado
+            if diretorio_parciais:
+                gravar_parcial(diretorio_parciais,
+                               Parcial.da_turma(estat, disciplinas_dict, metadados))
+        if api_key:
+            with cron('ia'):
+                estat.comentario_ia = relatorios.gerar_comentario_ia(estat, nome_curso, api_key)
+        with cron('graficos'):
+            figuras = relatorios.gerar_todos_graficos(df_notas, nome_curso, disciplinas_dict, estat,
+                                                      df_faltas=df_faltas, backend=backend_graficos)
+        caminho_pdf = os.path.join(saida, f"{base}.pdf")
+        with cron('pdf'), \
+                relatorios.criar_relatorio_pdf(nome_curso, estat, figuras, logo_path=logo_path,
+                                               png_paleta=png_paleta) as pdf, \
+                open(caminho_pdf, 'wb') as f:
+            shutil.copyfileobj(pdf, f)
+            resultado['anexo_bytes'] = f.tell()
+        caminho_json = os.path.join(saida, f"{base}.json")
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(resumo_turma(estat, nome_curso), f, ensure_ascii=False, indent=2)
+
+        resultado.update(ok=True, pdf=caminho_pdf, json=caminho_json)
+    except ArquivoInvalidoError as e:
+        resultado['erro'] = str(e)
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    resultado['etapas'] = cron.total()
+    return resultado
+
+
+def registrar_no_historico(historico, resultado):
+    """Grava o ``resultado`` de ``processar_arquivo`` como job do lote."""
+    historico.registrar(
+        resultado.get('curso') or os.path.basename(resultado['arquivo']), origem='lote',
+        bimestre=resultado.get('bimestre'), serie=resultado.get('serie'),
+        turma=resultado.get('turma'), alunos=resultado.get('alunos'),
+        disciplinas=resultado.get('disciplinas'), anexo_bytes=resultado.get('anexo_bytes'),
+        duracoes=resultado['etapas'], erro=resultado.get('erro'))
+
+
+def executar_lote(caminhos, saida, processos=None, logo_path=None, api_key='',
+                  diretorio_acumulado=None, diretorio_parciais=None,
+                  backend_graficos='seaborn', png_paleta=False, historico=None):
+    """Processa ``caminhos`` em um pool de processos e devolve os resultados
+    na ordem de conclusão (imprimindo o progresso). Com ``historico``
+    (``HistoricoJobs``), cada resultado é gravado nele."""
+    os.makedirs(saida, exist_ok=True)
+    processos = processos or os.cpu_count() or 1
+    nomes = nomes_de_saida(caminhos)
+    resultados = []
+    with ProcessPoolExecutor(max_workers=min(processos, max(len(caminhos), 1))) as pool:
+        # Submetidos do maior para o menor: os maiores começam primeiro.
+        futuros = [pool.submit(processar_arquivo, c, saida, nomes[c], logo_path, api_key,
+                               diretorio_acumulado, diretorio_parciais, backend_graficos,
+                               png_paleta)
+                   for c in caminhos]
+        for n, futuro in enumerate(as_completed(futuros), start=1):
+            r = futuro.result()
+            resultados.append(r)
+            if historico is not None:
+                registrar_no_historico(historico, r)
+            status = 'ok' if r['ok'] else f"ERRO: {r['erro']}"
+            print(f"[{n}/{len(caminhos)}] {os.path.basename(r['arquivo'])} "
+                  f"({r['segundos']:.1f}s) {status}", flush=True)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.batch',
+        description="Gera os relatórios (PDF + JSON) de vários Mapas de Turma em paralelo.")
+    parser.add_argument('entradas', nargs='+',
+                        help="diretórios e/ou globs com os mapas (.xls/.xlsx)")
+    parser.add_argument('-o', '--saida', default='relatorios',
+                        help="diretório de saída (padrão: ./relatorios)")
+    parser.add_argument('-j', '--processos', type=int, default=None,
+                        help="processos em paralelo (padrão: núcleos da máquina)")
+    parser.add_argument('--logo', default=_LOGO_PADRAO,
+                        help="logo da capa (padrão: assets/logo_cefet.png)")
+    parser.add_argument('--ia', action='store_true',
+                        help="inclui o comentário por IA (usa OPENAI_API_KEY)")
+    parser.add_argument('--acumulado', metavar='DIR', default=None,
+                        help="soma cada bimestre ao acumulado do ano da turma, em DIR")
+    parser.add_argument('--parciais', metavar='DIR', default=None,
+                        help="grava o parcial de cada turma em DIR (relatório consolidado)")
+    parser.add_argument('--graficos', choices=relatorios.BACKENDS_GRAFICOS, default='seaborn',
+                        help="backend dos gráficos (padrão: seaborn; 'matplotlib' é mais leve)")
+    parser.add_argument('--png-paleta', action='store_true',
+                        help="grava os gráficos como PNG de 256 cores (PDF menor)")
+    parser.add_argument('--historico', metavar='DB', default=None,
+                        help="grava cada relatório no histórico SQLite DB (ver core.historico)")
+    args = parser.parse_args(argv)
+
+    caminhos = listar_mapas(args.entradas)
+    if not caminhos:
+        print("Nenhum mapa (.xls/.xlsx) encontrado.", file=sys.stderr)
+        return 1
+    logo = args.logo if args.logo and os.path.exists(args.logo) else None
+    api_key = os.environ.get('OPENAI_API_KEY', '') if args.ia else ''
+
+    inicio = time.perf_counter()
+    resultados = executar_lote(caminhos, args.saida, args.processos, logo, api_key,
+                               args.acumulado, args.parciais, args.graficos, args.png_paleta,
+                               HistoricoJobs(args.historico) if args.historico else None)
+    erros = [r for r in resultados if not r['ok']]
+    print(f"{len(resultados) - len(erros)} relatório(s) gerado(s), {len(erros)} erro(s) "
+          f"em {time.perf_counter() - inicio:.1f}s -> {os.path.abspath(args.saida)}")
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Cache em disco dos mapas já processados, endereçado pelo conteúdo.
+
+Coordenadores costumam reenviar o mesmo mapa (falha no e-mail, IA ligada ou
+desligada...). Com o cache, o resultado de ``processar_curso_generico`` /
+``processar_transito_estradas`` é reaproveitado sem reler o ``.xls``.
+
+- A chave é o SHA-256 dos bytes enviados, salgado com a função de leitura e
+  com ``VERSAO_PARSER``: mudar a lógica de leitura invalida as entradas
+  antigas (que deixam de ser encontradas e saem pelo LRU).
+- Cada entrada é um diretório com ``notas_<i>.parquet``, ``faltas_<i>.parquet``
+  e ``meta.json`` (dicionário de disciplinas e metadados de cada conjunto).
+- O uso de disco é limitado por ``limite_bytes``; ao gravar, as entradas
+  acessadas há mais tempo são removidas até caber no limite.
+
+Como o cache guarda dados de alunos em disco, ele é **opcional** e só é
+ativado quando o administrador configura ``CACHE_MAPAS_DIR``. Falhas do cache
+nunca interrompem o app: ele apenas deixa de acelerar.
+
+Requer ``pyarrow`` (em ``requirements.txt``) para o Parquet.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from .manipulacao import VERSAO_PARSER, _conteudo_xls
+
+LIMITE_PADRAO_BYTES = 256 * 1024 * 1024
+_ARQUIVO_META = 'meta.json'
+
+
+def _bytes_do_arquivo(arquivo_xls):
+    """Conteúdo bruto de um caminho, upload ou ``bytes``."""
+    filename, conteudo = _conteudo_xls(arquivo_xls)
+    if filename is not None:
+        with open(filename, 'rb') as f:
+            return f.read()
+    return bytes(conteudo)
+
+
+class CacheMapas:
+    """Cache LRU em disco de conjuntos ``(df_notas, df_faltas,
+    disciplinas_dict, metadados)``, limitado a ``limite_bytes``."""
+
+    def __init__(self, diretorio, limite_bytes=LIMITE_PADRAO_BYTES):
+        self.diretorio = diretorio
+        self.limite_bytes = int(limite_bytes)
+        os.makedirs(diretorio, exist_ok=True)
+
+    @staticmethod
+    def chave(rotulo, *conteudos):
+        """SHA-256 de ``conteudos`` (bytes), salgado por ``rotulo`` e pela
+        versão do parser."""
+        h = hashlib.sha256(f"v{VERSAO_PARSER}:{rotulo}".encode())
+        for conteudo in conteudos:
+            h.update(len(conteudo).to_bytes(8, 'little'))
+            h.update(conteudo)
+        return h.hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave)
+
+    def obter(self, chave):
+        """Lista de conjuntos guardada em ``chave`` ou ``None``."""
+        caminho = self._caminho(chave)
+        try:
+            with open(os.path.join(caminho, _ARQUIVO_META), encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('versao_parser') != VERSAO_PARSER:
+                return None
+            conjuntos = []
+            for i, item in enumerate(meta['conjuntos']):
+                df_notas = pd.read_parquet(os.path.join(caminho, f'notas_{i}.parquet'))
+                df_faltas = pd.read_parquet(os.path.join(caminho, f'faltas_{i}.parquet'))
+                disciplinas = dict(item['disciplinas'])
+                conjuntos.append((df_notas, df_faltas, disciplinas, item['metadados']))
+            os.utime(caminho)  # marca o acesso para o LRU
+            return conjuntos
+        except Exception:
+            return None
+
+    def gravar(self, chave, conjuntos):
+        """Grava a lista de conjuntos e aplica o limite de bytes. Falhas são
+        silenciosas (o cache é só uma otimização)."""
+        try:
+            temp = tempfile.mkdtemp(prefix='.tmp-', dir=self.diretorio)
+            try:
+                itens = []
+                for i, (df_notas, df_faltas, disciplinas, metadados) in enumerate(conjuntos):
+                    df_notas.to_parquet(os.path.join(temp, f'notas_{i}.parquet'), index=False)
+                    df_faltas.to_parquet(os.path.join(temp, f'faltas_{i}.parquet'), index=False)
+                    itens.append({
+                        # Lista de pares preserva a ordem das disciplinas.
+                        'disciplinas': [[str(c), n] for c, n in disciplinas.items()],
+                        'metadados': metadados,
+                    })
+                with open(os.path.join(temp, _ARQUIVO_META), 'w', encoding='utf-8') as f:
+                    json.dump({'versao_parser': VERSAO_PARSER, 'conjuntos': itens},
+                              f, ensure_ascii=False)
+                destino = self._caminho(chave)
+                if os.path.isdir(destino):
+                    shutil.rmtree(destino, ignore_errors=True)
+                os.replace(temp, destino)
+            except Exception:
+                shutil.rmtree(temp, ignore_errors=True)
+                raise
+            self._aplicar_limite()
+        except Exception:
+            pass
+
+    def _entradas(self):
+        """[(último acesso, bytes, caminho)] das entradas completas."""
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            if nome.startswith('.') or not os.path.isdir(caminho):
+                continue
+            try:
+                tamanho = sum(e.stat().st_size for e in os.scandir(caminho))
+                entradas.append((os.stat(caminho).st_mtime, tamanho, caminho))
+            except OSError:
+                continue
+        return entradas
+
+    def _aplicar_limite(self):
+        entradas = sorted(self._entradas())
+        total = sum(t for _, t, _ in entradas)
+        for _, tamanho, caminho in entradas:
+            if total <= self.limite_bytes:
+                break
+            shutil.rmtree(caminho, ignore_errors=True)
+            total -= tamanho
+        # Temporários órfãos (gravação interrompida) com mais de 1 hora.
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            if nome.startswith('.tmp-'):
+                try:
+                    if time.time() - os.stat(caminho).st_mtime > 3600:
+                        shutil.rmtree(caminho, ignore_errors=True)
+                except OSError:
+                    pass
+
+
+def processar_com_cache(cache, processar, *arquivos):
+    """Executa ``processar(*arquivos)`` consultando o cache antes.
+
+    ``processar`` é ``processar_curso_generico`` (devolve um conjunto) ou
+    ``processar_transito_estradas`` (devolve a lista de conjuntos); o retorno
+    é sempre a **lista** de conjuntos. Com ``cache=None`` apenas processa.
+    """
+    if cache is None:
+        resultado = processar(*arquivos)
+        return resultado if isinstance(resultado, list) else [resultado]
+
+    conteudos = [_bytes_do_arquivo(a) for a in arquivos]
+    chave = cache.chave(processar.__name__, *conteudos)
+    conjuntos = cache.obter(chave)
+    if conjuntos is not None:
+        return conjuntos
+
+    resultado = processar(*conteudos)
+    conjuntos = resultado if isinstance(resultado, list) else [resultado]
+    cache.gravar(chave, conjuntos)
+    return conjuntos
@@ -0,0 +1,343 @@
+"""Caixa de saída persistente dos e-mails com os relatórios.
+
+O app não envia o e-mail durante a requisição: ``CaixaSaida.enfileirar``
+grava a mensagem (destinatário, cursos e PDFs) em disco e volta na hora; uma
+thread em segundo plano envia as pendentes em ordem de chegada, várias por
+conexão SMTP (``SessaoSMTP``, reaproveitada enquanto houver fila).
+
+- Cada mensagem é um diretório ``pendentes/<id>/`` com ``mensagem.json`` e
+  os anexos, apagado só depois que o servidor aceita o e-mail. Se o processo
+  cair, as pendentes saem quando o app subir de novo (uma mensagem
+  interrompida no meio do envio pode chegar duas vezes).
+- Falha transitória (conexão, timeout, login, respostas 4xx): a fila para e
+  a mensagem é tentada de novo com espera exponencial (30 s, 1 min, 2 min...
+  até 30 min), no máximo ``tentativas_max`` vezes.
+- Falha permanente (respostas 5xx, destinatário recusado) ou tentativas
+  esgotadas: a mensagem vai para ``falhas/`` com o último erro, para o
+  administrador conferir e reenviar (``--reenviar``). Passados
+  ``falhas_dias`` dias (padrão: 7), a thread apaga a falha com seus PDFs.
+
+Só um processo envia por diretório (trava em ``enviando.lock``); os demais
+apenas enfileiram. Uso pela linha de comando (na raiz do repositório):
+
+    python -m core.caixa_saida DIR              # situação da fila
+    python -m core.caixa_saida DIR --reenviar   # falhas voltam para a fila
+    python -m core.caixa_saida DIR --enviar     # envia as pendentes agora
+    python -m core.caixa_saida DIR --limpar 0   # apaga as falhas (e os PDFs)
+
+``--enviar`` usa ``GMAIL_USER`` e ``GMAIL_APP_PASSWORD`` do ambiente.
+"""
+import argparse
+import json
+import os
+import secrets
+import shutil
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .email_sender import SessaoSMTP, mensagem_relatorio
+
+DIRETORIO_PADRAO = os.path.join(tempfile.gettempdir(), 'gestao_eptnm_caixa_saida')
+_ARQUIVO_MENSAGEM = 'mensagem.json'
+_TEMPORARIO_MAX = 3600  # segundos até um ``.tmp-*`` órfão (enfileiramento interrompido) ser apagado
+_LIMPEZA_INTERVALO = 3600  # segundos entre as limpezas com a fila parada
+FALHAS_DIAS_PADRAO = 7
+
+
+@contextmanager
+def _travado(caminho):
+    """Trava exclusiva (bloqueante) de ``caminho``. Sem ``fcntl``, não trava."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(caminho, 'w') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def _gravar_anexo(arquivo, destino):
+    """Copia o anexo (arquivo aberto, bytes ou ``memoryview``) para ``destino``."""
+    with open(destino, 'wb') as f:
+        if hasattr(arquivo, 'read'):
+            arquivo.seek(0)
+            shutil.copyfileobj(arquivo, f)
+        else:
+            f.write(memoryview(arquivo))
+
+
+def _permanente(erro):
+    """A falha não se resolve tentando de novo (resposta 5xx, destinatário
+    recusado). Login recusado conta como transitória: costuma ser a senha
+    de app trocada, e a fila espera o administrador corrigir."""
+    if isinstance(erro, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in erro.recipients.values())
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return erro.smtp_code >= 500
+    return not isinstance(erro, (smtplib.SMTPException, OSError))
+
+
+class CaixaSaida:
+    """Fila em disco de e-mails com relatórios + thread de envio (ver
+    docstring do módulo)."""
+
+    def __init__(self, diretorio, sessao, *, espera_base=30, espera_max=1800,
+                 tentativas_max=8, fechar_ociosa=60, falhas_dias=FALHAS_DIAS_PADRAO):
+        self.diretorio = diretorio
+        self.sessao = sessao
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.tentativas_max = tentativas_max
+        self.fechar_ociosa = fechar_ociosa
+        self.falhas_dias = falhas_dias  # None: guarda as falhas até o administrador apagar
+        self.pendentes = os.path.join(diretorio, 'pendentes')
+        self.falhas = os.path.join(diretorio, 'falhas')
+        os.makedirs(self.pendentes, exist_ok=True)
+        os.makedirs(self.falhas, exist_ok=True)
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    # --- Enfileiramento (requisição do app) ---
+    def enfileirar(self, destinatario, anexos, cursos=None):
+        """Grava a mensagem com os ``anexos`` ([(nome, arquivo), ...]) e acorda
+        a thread de envio; devolve o id da mensagem."""
+        id_mensagem = f"{time.time_ns():020d}-{secrets.token_hex(4)}"
+        temp = tempfile.mkdtemp(prefix='.tmp-', dir=self.diretorio)
+        try:
+            for i, (_, arquivo) in enumerate(anexos):
+                _gravar_anexo(arquivo, os.path.join(temp, f'anexo_{i}.pdf'))
+            mensagem = {
+                'destinatario': destinatario,
+                'cursos': list(cursos or []),
+                'anexos': [nome for nome, _ in anexos],
+                'criada_em': datetime.now().isoformat(timespec='seconds'),
+                'tentativas': 0,
+                'proxima_tentativa': 0,
+                'ultimo_erro': None,
+            }
+            with open(os.path.join(temp, _ARQUIVO_MENSAGEM), 'w', encoding='utf-8') as f:
+                json.dump(mensagem, f, ensure_ascii=False, indent=2)
+            os.replace(temp, os.path.join(self.pendentes, id_mensagem))
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+        self._acordar.set()
+        return id_mensagem
+
+    # --- Envio ---
+    @staticmethod
+    def _ler(caminho):
+        with open(os.path.join(caminho, _ARQUIVO_MENSAGEM), encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _gravar(caminho, mensagem):
+        temp = os.path.join(caminho, _ARQUIVO_MENSAGEM + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(mensagem, f, ensure_ascii=False, indent=2)
+        os.replace(temp, os.path.join(caminho, _ARQUIVO_MENSAGEM))
+
+    def _enviar(self, caminho, mensagem):
+        arquivos = []
+        try:
+            for i in range(len(mensagem['anexos'])):
+                try:
+                    arquivos.append(open(os.path.join(caminho, f'anexo_{i}.pdf'), 'rb'))
+                except OSError as e:
+                    # Anexo perdido não volta tentando de novo (falha permanente).
+                    raise RuntimeError(f"anexo ilegível: {e}") from e
+            partes = mensagem_relatorio(self.sessao.remetente, mensagem['destinatario'],
+                                        mensagem['cursos'], list(zip(mensagem['anexos'], arquivos)))
+            self.sessao.enviar(mensagem['destinatario'], partes)
+        finally:
+            for f in arquivos:
+                f.close()
+
+    def _mover_para_falhas(self, caminho):
+        destino = os.path.join(self.falhas, os.path.basename(caminho))
+        os.replace(caminho, destino)
+        os.utime(destino)  # o prazo de ``falhas_dias`` conta a partir daqui
+
+    def enviar_pendentes(self, ignorar_espera=False):
+        """Envia as mensagens vencidas, em ordem, pela mesma sessão SMTP.
+
+        Devolve os segundos até a próxima tentativa agendada, 0 se parou no
+        meio (pedido de parada) ou None se a fila ficou vazia.
+        """
+        proxima = None
+        for id_mensagem in sorted(os.listdir(self.pendentes)):
+            if self._parar.is_set():
+                return 0
+            caminho = os.path.join(self.pendentes, id_mensagem)
+            try:
+                mensagem = self._ler(caminho)
+            except (OSError, ValueError):
+                self._mover_para_falhas(caminho)
+                continue
+            espera = mensagem['proxima_tentativa'] - time.time()
+            if espera > 0 and not ignorar_espera:
+                proxima = espera if proxima is None else min(proxima, espera)
+                continue
+            try:
+                self._enviar(caminho, mensagem)
+            except Exception as e:
+                mensagem['tentativas'] += 1
+                mensagem['ultimo_erro'] = f"{type(e).__name__}: {e}"
+                if _permanente(e) or mensagem['tentativas'] >= self.tentativas_max:
+                    self._gravar(caminho, mensagem)
+                    self._mover_para_falhas(caminho)
+                    continue
+                espera = min(self.espera_base * 2 ** (mensagem['tentativas'] - 1),
+                             self.espera_max)
+                mensagem['proxima_tentativa'] = time.time() + espera
+                self._gravar(caminho, mensagem)
+                # Falha transitória: as seguintes falhariam igual; a fila
+                # inteira espera por esta mensagem.
+                return espera
+            shutil.rmtree(caminho, ignore_errors=True)
+        return proxima
+
+    def _limpar_antigos(self):
+        """Apaga os ``.tmp-*`` órfãos e as falhas com mais de ``falhas_dias``
+        dias (com os PDFs). Devolve quantas falhas apagou."""
+        agora = time.time()
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if nome.startswith('.tmp-') and agora - os.path.getmtime(caminho) > _TEMPORARIO_MAX:
+                    shutil.rmtree(caminho, ignore_errors=True)
+            except OSError:
+                pass
+        if self.falhas_dias is None:
+            return 0
+        n = 0
+        for id_mensagem in os.listdir(self.falhas):
+            caminho = os.path.join(self.falhas, id_mensagem)
+            try:
+                if agora - os.path.getmtime(caminho) > self.falhas_dias * 86400:
+                    shutil.rmtree(caminho)
+                    n += 1
+            except OSError:
+                pass
+        return n
+
+    def _laco(self):
+        with _travado(os.path.join(self.diretorio, 'enviando.lock')):
+            while not self._parar.is_set():
+                self._acordar.clear()
+                self._limpar_antigos()
+                try:
+                    espera = self.enviar_pendentes()
+                except Exception:
+                    espera = self.espera_base  # ex.: diretório indisponível; tenta depois
+                if espera is None:
+                    # Fila vazia: a conexão fica aberta por um tempo para a
+                    # próxima mensagem e depois é encerrada.
+                    if not self._acordar.wait(self.fechar_ociosa):
+                        self.sessao.fechar()
+                        self._acordar.wait(_LIMPEZA_INTERVALO)
+                else:
+                    self._acordar.wait(espera)
+            self.sessao.fechar()
+
+    def iniciar(self):
+        """Sobe a thread de envio (daemon). Se outro processo já envia por
+        este diretório, ela espera a trava e só enfileirar é imediato."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name='caixa-saida', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        """Interrompe a thread de envio (depois da mensagem em andamento)."""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --- Administração ---
+    def situacao(self):
+        """{'pendentes': [...], 'falhas': [...]}: (id, mensagem) de cada uma."""
+        resultado = {}
+        for nome, diretorio in (('pendentes', self.pendentes), ('falhas', self.falhas)):
+            itens = []
+            for id_mensagem in sorted(os.listdir(diretorio)):
+                try:
+                    itens.append((id_mensagem, self._ler(os.path.join(diretorio, id_mensagem))))
+                except (OSError, ValueError):
+                    itens.append((id_mensagem, None))
+            resultado[nome] = itens
+        return resultado
+
+    def reenviar_falhas(self):
+        """Devolve as mensagens de ``falhas/`` à fila, zerando as tentativas;
+        devolve quantas."""
+        n = 0
+        for id_mensagem in sorted(os.listdir(self.falhas)):
+            caminho = os.path.join(self.falhas, id_mensagem)
+            try:
+                mensagem = self._ler(caminho)
+            except (OSError, ValueError):
+                continue
+            mensagem.update(tentativas=0, proxima_tentativa=0)
+            self._gravar(caminho, mensagem)
+            os.replace(caminho, os.path.join(self.pendentes, id_mensagem))
+            n += 1
+        if n:
+            self._acordar.set()
+        return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.caixa_saida',
+        description="Situação e manutenção da caixa de saída dos e-mails.")
+    parser.add_argument('diretorio', nargs='?', default=DIRETORIO_PADRAO,
+                        help=f"diretório da caixa de saída (padrão: {DIRETORIO_PADRAO})")
+    parser.add_argument('--reenviar', action='store_true',
+                        help="devolve as mensagens com falha à fila")
+    parser.add_argument('--enviar', action='store_true',
+                        help="envia as pendentes agora (GMAIL_USER / GMAIL_APP_PASSWORD)")
+    parser.add_argument('--limpar', type=int, metavar='DIAS',
+                        help="apaga as falhas com mais de DIAS dias (0: todas)")
+    args = parser.parse_args(argv)
+
+    sessao = SessaoSMTP(os.environ.get('GMAIL_USER', ''), os.environ.get('GMAIL_APP_PASSWORD', ''))
+    caixa = CaixaSaida(args.diretorio, sessao, falhas_dias=args.limpar)
+    if args.limpar is not None:
+        print(f"{caixa._limpar_antigos()} falha(s) apagada(s).")
+    if args.reenviar:
+        print(f"{caixa.reenviar_falhas()} mensagem(ns) devolvida(s) à fila.")
+    if args.enviar:
+        if not sessao.remetente or not sessao.senha_app:
+            print("Defina GMAIL_USER e GMAIL_APP_PASSWORD.", file=sys.stderr)
+            return 1
+        with _travado(os.path.join(args.diretorio, 'enviando.lock')), sessao:
+            caixa.enviar_pendentes(ignorar_espera=True)
+
+    for nome, itens in caixa.situacao().items():
+        print(f"{nome}: {len(itens)}")
+        for id_mensagem, mensagem in itens:
+            if mensagem is None:
+                print(f"  {id_mensagem}: mensagem.json ilegível")
+                continue
+            print(f"  {id_mensagem}: {mensagem['destinatario']} · {', '.join(mensagem['anexos'])}"
+                  f" · {mensagem['tentativas']} tentativa(s)"
+                  + (f" · {mensagem['ultimo_erro']}" if mensagem['ultimo_erro'] else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
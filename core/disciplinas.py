@@ -4,9 +4,10 @@ Centralizado aqui para ser reutilizado tanto na manipulação dos dados
 quanto na geração dos relatórios.
 """
 import re
-import unicodedata
 from collections import Counter
 
+from .texto import normalizar as _normalizar
+
 disciplinas_ensino_medio = {
     '1DEFISD.006': 'EDUCAÇÃO FÍSICA - 2ª SÉRIE',
     '1LIN.003': 'LÍNGUA ESTRANGEIRA: INGLÊS - 2ª SÉRIE',
@@ -68,16 +69,6 @@ _EM_KEYWORDS = (
 )
 
 
-def _normalizar(txt) -> str:
-    """Minúsculas e sem acentos, para comparação tolerante de nomes."""
-    txt = '' if txt is None else str(txt)
-    txt = ''.join(
-        c for c in unicodedata.normalize('NFD', txt)
-        if unicodedata.category(c) != 'Mn'
-    )
-    return txt.lower().strip()
-
-
 def eh_disciplina_ensino_medio(nome) -> bool:
     """Indica se o nome de uma disciplina corresponde ao ensino médio (núcleo
     comum), seja pelo sufixo "Nª SÉRIE" ou por uma palavra-chave conhecida."""
@@ -3,14 +3,26 @@
 As credenciais do remetente vêm de st.secrets / variáveis de ambiente e nunca
 ficam no código. O destinatário é informado pelo professor no app e deve
 pertencer ao domínio institucional.
+
+Os anexos são lidos do arquivo (ou ``memoryview``) e codificados em base64
+bloco a bloco, direto no comando DATA do SMTP: o ``EmailMessage`` +
+``send_message`` guardariam o PDF inteiro várias vezes em memória (bytes,
+base64, mensagem serializada e a cópia com os pontos escapados).
 """
+import base64
 import re
+import secrets
 import smtplib
 import ssl
-from email.message import EmailMessage
+import time
+from email.message import EmailMessage, MIMEPart
+from email.policy import SMTP
 
 DOMINIO_INSTITUCIONAL = "cefetmg.br"
 _EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Múltiplo de 57 bytes: cada 57 bytes viram uma linha base64 de 76 caracteres.
+_BLOCO_ANEXO = 57 * 1024
+_PONTO_NO_INICIO = re.compile(rb"^\.", re.MULTILINE)
 
 
 def email_valido(email: str, dominio: str = DOMINIO_INSTITUCIONAL) -> bool:
@@ -42,6 +54,9 @@ def enviar_relatorio(
         ``enviar_relatorio(dest, rem, senha, anexos=[(nome, buffer), ...],
                             cursos=['Trânsito', 'Estradas'])``
 
+    Cada ``buffer`` pode ser um arquivo aberto (ex.: o devolvido por
+    ``criar_relatorio_pdf``), ``BytesIO``, bytes ou ``memoryview``.
+
     Forma legada (1 PDF) continua suportada via ``pdf_buffer``,
     ``nome_arquivo`` e ``nome_curso``.
     """
@@ -60,6 +75,14 @@ def enviar_relatorio(
     if not anexos:
         raise RuntimeError("Nenhum anexo informado para envio.")
 
+    with SessaoSMTP(remetente, senha_app, host=host, port=port) as sessao:
+        sessao.enviar(destinatario, mensagem_relatorio(remetente, destinatario, cursos, anexos))
+
+
+def mensagem_relatorio(remetente, destinatario, cursos, anexos):
+    """E-mail com os relatórios ``anexos`` ([(nome, buffer), ...]), em partes
+    (bytes) prontas para ``SessaoSMTP.enviar``; assunto e texto citam os
+    ``cursos``."""
     cursos = cursos or []
     if len(cursos) == 1:
         assunto = f"Relatório de Acompanhamento Acadêmico — {cursos[0]}"
@@ -72,24 +95,169 @@ def enviar_relatorio(
         assunto = "Relatório de Acompanhamento Acadêmico"
         descricao = ""
 
-    msg = EmailMessage()
-    msg["From"] = remetente
-    msg["To"] = destinatario
-    msg["Subject"] = assunto
-    msg.set_content(
+    texto = (
         f"Olá,\n\n"
         f"Segue em anexo o Relatório de Acompanhamento Acadêmico "
         f"{descricao}, gerado pela plataforma de Gestão Acadêmica EPTNM do CEFET-MG.\n\n"
         f"Este é um e-mail automático, não responda.\n"
     )
+    return _partes_mensagem(remetente, destinatario, assunto, texto, anexos)
+
+
+class SessaoSMTP:
+    """Conexão SMTP autenticada, reaproveitada entre mensagens.
+
+    A conexão é aberta (com login) no primeiro envio e mantida para os
+    seguintes. Se ficou ociosa mais de ``ociosa_max`` segundos, um ``NOOP``
+    confirma que o servidor não a derrubou antes de usá-la; depois de
+    ``mensagens_max`` mensagens (o Gmail limita por conexão) ou de qualquer
+    erro no meio de um envio, ela é descartada e a próxima mensagem reconecta.
+    """
+
+    def __init__(self, remetente, senha_app, host="smtp.gmail.com", port=465, *,
+                 usar_ssl=True, timeout=60, mensagens_max=50, ociosa_max=30):
+        self.remetente = remetente
+        self.senha_app = senha_app
+        self.host, self.port = host, port
+        self.usar_ssl = usar_ssl
+        self.timeout = timeout
+        self.mensagens_max = mensagens_max
+        self.ociosa_max = ociosa_max
+        self._server = None
+        self._enviadas = 0
+        self._ultimo_uso = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _conectar(self):
+        if self.usar_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                      context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.senha_app:
+                server.login(self.remetente, self.senha_app)
+        except BaseException:
+            server.close()
+            raise
+        self._server, self._enviadas = server, 0
+        self._ultimo_uso = time.monotonic()
+
+    def _conexao(self):
+        if self._server is not None and self._enviadas >= self.mensagens_max:
+            self.fechar()
+        elif (self._server is not None
+              and time.monotonic() - self._ultimo_uso > self.ociosa_max):
+            try:
+                codigo = self._server.noop()[0]
+            except (smtplib.SMTPException, OSError):
+                codigo = None
+            if codigo != 250:
+                self._descartar()
+        if self._server is None:
+            self._conectar()
+        return self._server
 
+    def enviar(self, destinatario, partes):
+        """Envia a mensagem (``mensagem_relatorio``). Lança exceção em caso
+        de falha; a conexão é descartada se o erro deixou o diálogo SMTP em
+        estado incerto."""
+        server = self._conexao()
+        try:
+            _enviar_partes(server, self.remetente, destinatario, partes)
+        except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused):
+            # Recusa no envelope: a conexão continua utilizável após o RSET.
+            try:
+                server.rset()
+            except (smtplib.SMTPException, OSError):
+                self._descartar()
+            raise
+        except BaseException:
+            self._descartar()
+            raise
+        self._enviadas += 1
+        self._ultimo_uso = time.monotonic()
+
+    def _descartar(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    def fechar(self):
+        """Encerra a conexão (``QUIT``), se houver."""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+
+def _linhas_base64(arquivo):
+    """Anexo em base64 (linhas de 76 caracteres, CRLF), um bloco por vez.
+
+    ``arquivo``: arquivo aberto (lido desde o início, ex.: o
+    ``SpooledTemporaryFile`` de ``criar_relatorio_pdf``) ou bytes /
+    ``memoryview``, fatiado sem cópia.
+    """
+    if hasattr(arquivo, "read"):
+        arquivo.seek(0)
+        blocos = iter(lambda: arquivo.read(_BLOCO_ANEXO), b"")
+    else:
+        dados = memoryview(arquivo)
+        blocos = (dados[i:i + _BLOCO_ANEXO] for i in range(0, dados.nbytes, _BLOCO_ANEXO))
+    for bloco in blocos:
+        yield base64.encodebytes(bloco).replace(b"\n", b"\r\n")
+
+
+def _partes_mensagem(remetente, destinatario, assunto, texto, anexos):
+    """Mensagem multipart/mixed (bytes, em partes): cabeçalhos e texto
+    gerados pelo pacote ``email`` e os PDFs em base64, bloco a bloco."""
+    fronteira = f"=_{secrets.token_hex(16)}"
+    cabecalho = EmailMessage(policy=SMTP)
+    cabecalho["From"] = remetente
+    cabecalho["To"] = destinatario
+    cabecalho["Subject"] = assunto
+    cabecalho["MIME-Version"] = "1.0"
+    cabecalho["Content-Type"] = f'multipart/mixed; boundary="{fronteira}"'
+    yield b"".join(SMTP.fold_binary(nome, valor) for nome, valor in cabecalho.items()) + b"\r\n"
+
+    separador = f"--{fronteira}\r\n".encode("ascii")
+    corpo = MIMEPart(policy=SMTP)
+    corpo.set_content(texto)
+    yield separador + corpo.as_bytes()
     for arquivo, buffer in anexos:
-        pdf_bytes = buffer.getvalue() if hasattr(buffer, "getvalue") else buffer
-        msg.add_attachment(
-            pdf_bytes, maintype="application", subtype="pdf", filename=arquivo
-        )
+        parte = MIMEPart(policy=SMTP)
+        parte["Content-Type"] = "application/pdf"
+        parte["Content-Transfer-Encoding"] = "base64"
+        parte.add_header("Content-Disposition", "attachment", filename=arquivo)
+        yield b"\r\n" + separador + parte.as_bytes()
+        yield from _linhas_base64(buffer)
+    yield f"\r\n--{fronteira}--\r\n".encode("ascii")
+
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL(host, port, context=context, timeout=60) as server:
-        server.login(remetente, senha_app)
-        server.send_message(msg)
+def _enviar_partes(server, remetente, destinatario, partes):
+    """``sendmail`` com a mensagem enviada parte a parte (o ``smtplib``
+    exige a mensagem inteira em memória). Cada parte termina em CRLF, então o
+    escape dos pontos no início de linha pode ser feito parte a parte."""
+    server.ehlo_or_helo_if_needed()
+    codigo, resposta = server.mail(remetente)
+    if codigo != 250:
+        raise smtplib.SMTPSenderRefused(codigo, resposta, remetente)
+    codigo, resposta = server.rcpt(destinatario)
+    if codigo not in (250, 251):
+        raise smtplib.SMTPRecipientsRefused({destinatario: (codigo, resposta)})
+    codigo, resposta = server.docmd("data")
+    if codigo != 354:
+        raise smtplib.SMTPDataError(codigo, resposta)
+    for parte in partes:
+        server.send(_PONTO_NO_INICIO.sub(b"..", parte))
+    server.send(b".\r\n")
+    codigo, resposta = server.getreply()
+    if codigo != 250:
+        raise smtplib.SMTPDataError(codigo, resposta)
@@ -0,0 +1,194 @@
+"""Resultado tipado de ``calcular_estatisticas`` e sua serialização.
+
+``EstatisticasTurma`` guarda só valores numéricos e textos "crus" (nomes de
+disciplina e de aluno). A formatação (casas decimais, ``%``, "N/A") é feita na
+camada do PDF/IA, em ``relatorios.py``. Por isso o resultado pode ser guardado
+em cache, comparado e enviado entre processos. ``para_json``/``de_json`` (e
+``para_msgpack``/``de_msgpack``, se o pacote ``msgpack`` estiver instalado)
+fazem a ida e volta.
+
+Os perfis (``DisciplinaProfile``) usados no cálculo ficam anexados em
+``perfil_notas``/``perfil_faltas`` para os gráficos, mas **não** são
+serializados. Um resultado desserializado tem os perfis ``None``, e os
+gráficos recalculam o perfil a partir dos DataFrames.
+"""
+import json
+import math
+from dataclasses import dataclass, field, fields
+
+_VERSAO = 1
+
+
+@dataclass(slots=True)
+class ResumoNotasDisciplina:
+    """Linha do resumo estatístico de notas de uma disciplina."""
+    codigo: str
+    nome: str
+    incompleta: bool
+    media: float
+    mediana: float
+    desvio: float
+    minimo: float
+    maximo: float
+
+
+@dataclass(slots=True)
+class ResumoFaltasDisciplina:
+    """Linha do resumo de faltas de uma disciplina (sinal estatístico)."""
+    codigo: str
+    nome: str
+    media: float
+    mediana: float
+    p90: float
+    desvio: float
+    acima_p90: int
+    acima_sigma: int
+
+
+@dataclass(slots=True)
+class EstatisticasTurma:
+    """Estatísticas de uma turma/bimestre (ver ``calcular_estatisticas``).
+
+    Sem disciplinas com notas, os campos da disciplina de menor/maior média
+    ficam ``None`` (nomes/código) e 0 (valores).
+    """
+    limiar_aprovacao: float
+    max_pontos_bimestre: int
+    bimestre_num: int | None
+    metadados: dict
+    total_alunos: int
+    media_geral_turma: float
+    desvio_padrao_medias: float
+    taxa_aprovacao: float  # percentual (0–100)
+    disciplinas_com_notas: list
+    disciplinas_sem_dados: list  # [(código, nome)]
+    disciplinas_incompletas: list  # [(código, nome, nota máxima observada)]
+    disciplina_menor_media_code: str | None
+    disciplina_menor_media_nome: str | None
+    menor_media: float
+    desvio_padrao_disciplina_critica: float
+    alunos_abaixo_limiar_disciplina_critica: int
+    disciplina_maior_media_nome: str | None
+    maior_media: float
+    top_10_alunos_criticos: list  # [(nome, disciplinas abaixo do limiar)]
+    resumo_disciplinas: list  # [ResumoNotasDisciplina]
+    faltas_disponiveis: bool = False
+    faltas_disciplinas: list = field(default_factory=list)  # [ResumoFaltasDisciplina]
+    top_10_faltosos: list = field(default_factory=list)  # [(nome, total de faltas)]
+    faltas_cols: list = field(default_factory=list)
+    acumulado: dict | None = None
+    comentario_ia: str | None = None
+    # Não serializados (ver docstring do módulo).
+    perfil_notas: object = field(default=None, repr=False, compare=False)
+    perfil_faltas: object = field(default=None, repr=False, compare=False)
+
+    # ----- serialização -----
+    def para_dict(self):
+        """Dict só com tipos JSON (NaN vira ``None``; linhas dos resumos
+        viram listas na ordem dos campos)."""
+        d = {'versao': _VERSAO}
+        for f in _CAMPOS:
+            valor = getattr(self, f)
+            if f in _LINHAS:
+                valor = [[_json(getattr(linha, c)) for c in _LINHAS[f][1]] for linha in valor]
+            elif f in _TUPLAS:
+                valor = [[_json(v) for v in t] for t in valor]
+            elif f == 'acumulado' and valor is not None:
+                valor = _acumulado_para_json(valor)
+            else:
+                valor = _json(valor)
+            d[f] = valor
+        return d
+
+    @classmethod
+    def de_dict(cls, d):
+        if d.get('versao') != _VERSAO:
+            raise ValueError(f"Versão de estatísticas não suportada: {d.get('versao')}")
+        kwargs = {}
+        for f in _CAMPOS:
+            valor = d.get(f)
+            if f in _LINHAS:
+                tipo = _LINHAS[f][0]
+                valor = [tipo(*map(_float, linha)) for linha in valor]
+            elif f in _TUPLAS:
+                valor = [tuple(t) for t in valor]
+            elif f in _NUMERICOS:
+                valor = _float(valor)
+            elif f == 'acumulado' and valor is not None:
+                valor = _acumulado_de_json(valor)
+            kwargs[f] = valor
+        return cls(**kwargs)
+
+    def para_json(self):
+        """JSON compacto (bytes UTF-8)."""
+        return json.dumps(self.para_dict(), ensure_ascii=False, separators=(',', ':'),
+                          allow_nan=False).encode('utf-8')
+
+    @classmethod
+    def de_json(cls, dados):
+        return cls.de_dict(json.loads(dados))
+
+    def para_msgpack(self):
+        """MessagePack (requer o pacote opcional ``msgpack``)."""
+        return _msgpack().packb(self.para_dict(), use_bin_type=True)
+
+    @classmethod
+    def de_msgpack(cls, dados):
+        return cls.de_dict(_msgpack().unpackb(dados, raw=False))
+
+
+# Campos serializados (todos menos os perfis) e como tratá-los.
+_CAMPOS = tuple(f.name for f in fields(EstatisticasTurma) if not f.name.startswith('perfil_'))
+_LINHAS = {
+    'resumo_disciplinas': (ResumoNotasDisciplina,
+                           tuple(f.name for f in fields(ResumoNotasDisciplina))),
+    'faltas_disciplinas': (ResumoFaltasDisciplina,
+                           tuple(f.name for f in fields(ResumoFaltasDisciplina))),
+}
+_TUPLAS = {'disciplinas_sem_dados', 'disciplinas_incompletas', 'top_10_alunos_criticos',
+           'top_10_faltosos'}
+_NUMERICOS = {'limiar_aprovacao', 'media_geral_turma', 'desvio_padrao_medias',
+              'taxa_aprovacao', 'menor_media', 'desvio_padrao_disciplina_critica',
+              'maior_media'}
+
+
+def _json(valor):
+    """Escalares NumPy viram tipos Python; NaN vira ``None``."""
+    if hasattr(valor, 'item') and not isinstance(valor, (list, dict)):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def _float(valor):
+    return float('nan') if valor is None else valor
+
+
+def _acumulado_para_json(acumulado):
+    """``medias_bimestre`` tem chaves inteiras (o bimestre), que o JSON
+    transformaria em texto e o MessagePack recusa: vai como ``[[b, média]]``."""
+    return {**acumulado,
+            'tendencia': [{**item, 'medias_bimestre': [[b, _json(m)] for b, m
+                                                        in item['medias_bimestre'].items()]}
+                          for item in acumulado['tendencia']],
+            'alunos_criticos': [list(t) for t in acumulado['alunos_criticos']]}
+
+
+def _acumulado_de_json(acumulado):
+    return {**acumulado,
+            'tendencia': [{**item, 'medias_bimestre': {int(b): m for b, m
+                                                       in item['medias_bimestre']}}
+                          for item in acumulado['tendencia']],
+            'alunos_criticos': [tuple(t) for t in acumulado['alunos_criticos']]}
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError(
+            "A serialização em MessagePack requer o pacote 'msgpack' "
+            "(pip install msgpack); use para_json/de_json."
+        ) from None
+    return msgpack
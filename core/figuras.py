@@ -0,0 +1,124 @@
+"""Figuras de layout fixo e rasterização em PNG com um único desenho.
+
+O caminho antigo (``plt.subplots`` + ``tight_layout`` + ``savefig`` com
+``bbox_inches='tight'``) desenha cada figura mais de uma vez: o
+``tight_layout`` mede os textos e o ``bbox_inches='tight'`` desenha a figura
+inteira só para achar a caixa antes do desenho final.
+
+Aqui as margens são calculadas antes de plotar, a partir do tamanho da
+figura e do comprimento dos textos (título, rótulos dos eixos e marcas do
+eixo y, que são os nomes das disciplinas nos gráficos por categoria). O PNG
+sai de um único desenho em um ``RendererAgg`` reaproveitado entre figuras do
+mesmo tamanho. Opcionalmente, o PNG é gravado com paleta de 256 cores: os
+gráficos têm poucas centenas de cores distintas, a quantização é
+praticamente sem perda e o arquivo cai pela metade.
+"""
+import functools
+import io
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import text_to_path
+from PIL import Image
+
+DPI = 150
+TAM_TITULO = 16
+TAM_ROTULO = 12
+
+# Folga entre os textos e a borda: o ``pad`` padrão do ``tight_layout``
+# (1,08 × corpo da fonte), em pontos.
+_FOLGA = 1.08 * 10
+_AMOSTRA_ALTURA = 'Ápg'  # acento e descendente: altura de uma linha de texto
+
+_renderizadores = threading.local()
+
+
+@functools.lru_cache(maxsize=1024)
+def _medida(texto, tamanho):
+    """(largura, altura) do texto em pontos."""
+    largura, altura, _ = text_to_path.get_text_width_height_descent(
+        texto, FontProperties(size=tamanho), ismath=False)
+    return largura, altura
+
+
+def _margens(tamanho, rotulos_y):
+    """Margens (fração da figura) para o título, os rótulos e as marcas."""
+    rc = matplotlib.rcParams
+    largura_pt, altura_pt = tamanho[0] * 72, tamanho[1] * 72
+    tam_marca_x, tam_marca_y = rc['xtick.labelsize'], rc['ytick.labelsize']
+    altura_rotulo = _medida(_AMOSTRA_ALTURA, TAM_ROTULO)[1]
+    marca_x = rc['xtick.major.size'] + rc['xtick.major.pad']
+    marca_y = rc['ytick.major.size'] + rc['ytick.major.pad']
+
+    esquerda = (_FOLGA + altura_rotulo + rc['axes.labelpad'] + marca_y
+                + max(_medida(str(r), tam_marca_y)[0] for r in rotulos_y))
+    base = (_FOLGA + altura_rotulo + rc['axes.labelpad'] + marca_x
+            + _medida(_AMOSTRA_ALTURA, tam_marca_x)[1])
+    topo = _FOLGA + _medida(_AMOSTRA_ALTURA, TAM_TITULO)[1] + rc['axes.titlepad']
+    # A última marca do eixo x fica centrada na borda direita dos eixos.
+    direita = _FOLGA + _medida('000', tam_marca_x)[0] / 2
+    return {'left': esquerda / largura_pt, 'right': 1 - direita / largura_pt,
+            'bottom': base / altura_pt, 'top': 1 - topo / altura_pt}
+
+
+def figura(tamanho, titulo, xlabel, ylabel, rotulos_y=('000',)):
+    """Figura com um eixo, título e rótulos já posicionados (sem
+    ``tight_layout``).
+
+    ``rotulos_y``: textos das marcas do eixo y, ou o mais largo deles — os
+    nomes das categorias ou, num eixo numérico, o maior valor.
+    """
+    fig, ax = plt.subplots(figsize=tamanho, dpi=DPI)
+    fig.subplots_adjust(**_margens(tuple(tamanho), rotulos_y))
+    ax.set_title(titulo, fontsize=TAM_TITULO)
+    ax.set_xlabel(xlabel, fontsize=TAM_ROTULO)
+    ax.set_ylabel(ylabel, fontsize=TAM_ROTULO)
+    return fig, ax
+
+
+def figura_histograma(spec):
+    """Figura 10 × 6 de um histograma (as contagens não passam do número de
+    valores, que dá a marca mais larga do eixo y)."""
+    return figura((10, 6), spec['titulo'], spec['xlabel'], 'Número de Alunos',
+                  (str(len(spec['valores'])),))
+
+
+def figura_categorias(spec):
+    """Figura 12 × 8 dos gráficos por disciplina (barras e boxplot)."""
+    return figura((12, 8), spec['titulo'], spec['xlabel'], 'Disciplina',
+                  spec['rotulos'] or ('',))
+
+
+def _renderizador(largura, altura):
+    """``RendererAgg`` da thread para o tamanho dado, limpo para reuso."""
+    cache = getattr(_renderizadores, 'por_tamanho', None)
+    if cache is None:
+        cache = _renderizadores.por_tamanho = {}
+    renderizador = cache.get((largura, altura))
+    if renderizador is None:
+        renderizador = cache[(largura, altura)] = RendererAgg(largura, altura, DPI)
+    else:
+        renderizador.clear()
+    return renderizador
+
+
+def png_da_figura(fig, paleta=False):
+    """PNG (bytes) da figura a ``DPI``, com um único desenho.
+
+    ``paleta=True`` grava o PNG com paleta de 256 cores (bem menor).
+    """
+    fig.set_dpi(DPI)
+    largura, altura = (int(round(v)) for v in fig.bbox.size)
+    renderizador = _renderizador(largura, altura)
+    fig.draw(renderizador)
+    imagem = Image.frombuffer('RGBA', (largura, altura), renderizador.buffer_rgba(),
+                              'raw', 'RGBA', 0, 1).convert('RGB')
+    if paleta:
+        imagem = imagem.quantize(256, method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO()
+    imagem.save(buf, format='png')
+    return buf.getvalue()
@@ -0,0 +1,126 @@
+"""Backend leve dos gráficos do relatório: matplotlib puro, sem seaborn.
+
+Desenha as mesmas especificações de ``relatorios.especificacoes_graficos``
+(histograma + KDE, barras horizontais e boxplots horizontais) direto dos
+arrays NumPy, com as primitivas do matplotlib (``bar``/``barh``/``bxp``). O
+visual reproduz o do seaborn: cores dessaturadas, linhas em cinza
+complementar, eixo categórico invertido e espessura das bordas do histograma.
+
+Não importa o seaborn (nem o pandas). Isso corta a importação mais cara do
+processo e o trabalho do seaborn em cada gráfico, que converte os dados para
+o formato longo, agrupa e recalcula as estatísticas.
+
+O KDE vem de ``kde.py`` (binning + FFT, banda de Scott) e as figuras, com
+layout fixo, de ``figuras.py``.
+"""
+import colorsys
+import inspect
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib import cbook
+from matplotlib.axes import Axes
+from matplotlib.colors import to_rgb, to_rgba
+
+from .figuras import figura_categorias, figura_histograma
+from .kde import banda_scott, kde_binned
+
+# Parâmetros do seaborn reproduzidos aqui.
+_SATURACAO = 0.75      # ``saturation`` de barplot/boxplot
+_ALFA_HISTOGRAMA = 0.5  # histograma com KDE
+_PONTOS_KDE = 200       # ``gridsize``
+_LARGURA_CATEGORIA = 0.8
+
+# ``vert`` foi substituído por ``orientation`` no matplotlib 3.10.
+_HORIZONTAL = ({'orientation': 'horizontal'}
+               if 'orientation' in inspect.signature(Axes.bxp).parameters
+               else {'vert': False})
+
+
+def _dessaturar(cor, proporcao):
+    h, l, s = colorsys.rgb_to_hls(*to_rgb(cor))
+    return colorsys.hls_to_rgb(h, l, s * proporcao)
+
+
+def _cinza_complementar(cor):
+    """Cinza das linhas do boxplot (``linecolor='auto'`` do seaborn)."""
+    lum = colorsys.rgb_to_hls(*to_rgb(cor))[1] * 0.6
+    return (lum, lum, lum)
+
+
+def _eixo_categorico(ax, rotulos):
+    """Eixo y categórico como o do seaborn: primeira categoria no topo."""
+    n = len(rotulos)
+    ax.set_yticks(np.arange(n), list(rotulos))
+    ax.yaxis.grid(False)
+    ax.set_ylim(n - 0.5, -0.5)
+
+
+def _histograma(spec):
+    valores = np.asarray(spec['valores'], dtype=np.float64)
+    valores = valores[~np.isnan(valores)]
+    cor = spec['color'] or 'C0'
+    fig, ax = figura_histograma(spec)
+    if len(valores):
+        contagens, bordas = np.histogram(valores, bins=spec['bins'])
+        larguras = np.diff(bordas)
+        barras = ax.bar(bordas[:-1], contagens, larguras, align='edge',
+                        facecolor=to_rgba(cor, _ALFA_HISTOGRAMA),
+                        edgecolor=matplotlib.rcParams['patch.edgecolor'])
+        banda = banda_scott(valores)
+        if banda is not None:
+            grade = np.linspace(valores.min(), valores.max(), _PONTOS_KDE)
+            escala = (contagens * larguras).sum()
+            ax.plot(grade, kde_binned(valores, grade, banda) * escala, color=to_rgba(cor, 1))
+        # Borda com no máximo 10% da largura da barra (em pontos), como no seaborn.
+        ax.autoscale_view()
+        x0, x1 = ax.transData.transform([[bordas[0], 0], [bordas[0] + larguras.min(), 0]])[:, 0]
+        espessura = 0.1 * abs(x1 - x0) * 72 / fig.dpi
+        for barra in barras:
+            barra.set_linewidth(min(espessura, barra.get_linewidth()))
+    if spec['xlim'] is not None:
+        ax.set_xlim(*spec['xlim'])
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return fig
+
+
+def _barras(spec):
+    fig, ax = figura_categorias(spec)
+    ax.barh(np.arange(len(spec['rotulos'])), spec['valores'], height=_LARGURA_CATEGORIA,
+            color=_dessaturar('C0', _SATURACAO), edgecolor='none')
+    _eixo_categorico(ax, spec['rotulos'])
+    ax.set_xlim(*spec['xlim'])
+    return fig
+
+
+def _boxplot(spec):
+    cor = _dessaturar(spec['color'] or 'C0', _SATURACAO)
+    linha = _cinza_complementar(cor)
+    fig, ax = figura_categorias(spec)
+    ax.bxp(
+        cbook.boxplot_stats(spec['grupos'], whis=1.5),
+        positions=np.arange(len(spec['grupos'])),
+        widths=_LARGURA_CATEGORIA,
+        capwidths=_LARGURA_CATEGORIA / 2,
+        patch_artist=True,
+        manage_ticks=False,
+        boxprops={'facecolor': cor, 'edgecolor': linha},
+        medianprops={'color': linha, 'solid_capstyle': 'butt'},
+        whiskerprops={'color': linha, 'solid_capstyle': 'butt'},
+        capprops={'color': linha},
+        flierprops={'markeredgecolor': linha},
+        **_HORIZONTAL,
+    )
+    _eixo_categorico(ax, spec['rotulos'])
+    if spec['xlim'] is not None:
+        ax.set_xlim(*spec['xlim'])
+    ax.grid(True, linestyle='--', alpha=0.6, axis='x')
+    return fig
+
+
+DESENHOS = {
+    'histograma': _histograma,
+    'barras': _barras,
+    'boxplot': _boxplot,
+}
@@ -0,0 +1,322 @@
+"""Histórico local dos relatórios gerados (SQLite), para acompanhar uso e tempos.
+
+A planilha do ``usage_tracker`` guarda uma linha por uso, mas não responde a
+"quantos relatórios por curso e bimestre" nem "p95 do tempo de geração" sem
+baixar tudo. Aqui cada relatório (um PDF) é um **job** num SQLite local, em
+modo WAL (o app grava enquanto a linha de comando consulta):
+
+- ``jobs``: data, origem (``app`` ou ``lote``), curso, bimestre, série,
+  turma, e-mail, alunos, disciplinas, tamanho do anexo e erro (se houve);
+- ``etapas``: duração de cada etapa do job (``processamento``,
+  ``estatisticas``, ``ia``, ``graficos``, ``pdf``, ``total``), em segundos.
+
+Índices cobrem as consultas de ``HistoricoJobs`` (por curso/bimestre, por
+data, percentis por etapa e jobs ainda não exportados). Com
+``HISTORICO_EXPORTAR_MIN`` no app, os jobs novos são copiados de tempos em
+tempos para a aba "Jobs" da planilha de uso, em lotes (``append_rows``), sem
+o e-mail.
+
+O e-mail do coordenador é o único dado pessoal do histórico. Ele é apagado
+(o job fica, sem e-mail) depois de ``email_dias`` dias (padrão:
+``EMAIL_DIAS_PADRAO``; ``HISTORICO_EMAIL_DIAS`` no app), a cada job gravado.
+
+Gravação: ``HISTORICO_DB`` no app ou ``--historico DB`` no lote. Consultas
+pela linha de comando (na raiz do repositório):
+
+    python -m core.historico historico.db                    # resumo
+    python -m core.historico historico.db --desde 2025-08-01 --percentil 0.9
+    python -m core.historico historico.db --apagar-emails 0  # apaga todos os e-mails
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+ETAPAS = ('processamento', 'estatisticas', 'ia', 'graficos', 'pdf', 'total')
+EMAIL_DIAS_PADRAO = 180
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    criado_em TEXT NOT NULL,
+    origem TEXT NOT NULL,
+    curso TEXT NOT NULL,
+    bimestre INTEGER,
+    serie TEXT,
+    turma TEXT,
+    email TEXT,
+    alunos INTEGER,
+    disciplinas INTEGER,
+    anexo_bytes INTEGER,
+    erro TEXT,
+    exportado INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_curso_bimestre ON jobs (curso, bimestre);
+CREATE INDEX IF NOT EXISTS jobs_criado_em ON jobs (criado_em);
+CREATE INDEX IF NOT EXISTS jobs_nao_exportados ON jobs (id) WHERE exportado = 0;
+CREATE TABLE IF NOT EXISTS etapas (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    etapa TEXT NOT NULL,
+    segundos REAL NOT NULL,
+    PRIMARY KEY (job_id, etapa)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS etapas_etapa_segundos ON etapas (etapa, segundos);
+"""
+
+# Colunas da aba "Jobs" na planilha (``exportar``).
+COLUNAS_PLANILHA = ["Data/Hora", "Origem", "Curso", "Bimestre", "Série", "Turma",
+                    "Alunos", "Disciplinas", "Anexo (KB)", "Total (s)", "Erro"]
+ABA_PLANILHA = "Jobs"
+
+
+class Cronometro:
+    """Duração das etapas de um job: ``with cron('pdf'): ...`` soma o tempo
+    do bloco em ``cron.duracoes['pdf']``. ``duracoes`` inicial: etapas já
+    medidas (ex.: o processamento, comum aos PDFs de um mesmo envio)."""
+
+    def __init__(self, duracoes=None):
+        self.duracoes = dict(duracoes or {})
+
+    def __call__(self, etapa):
+        return _Etapa(self, etapa)
+
+    def total(self):
+        """``duracoes`` + ``total`` (a soma das etapas)."""
+        return {**self.duracoes, 'total': sum(self.duracoes.values())}
+
+
+class _Etapa:
+    __slots__ = ('cron', 'etapa', 'inicio')
+
+    def __init__(self, cron, etapa):
+        self.cron, self.etapa = cron, etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        d = self.cron.duracoes
+        d[self.etapa] = d.get(self.etapa, 0.0) + time.perf_counter() - self.inicio
+
+
+class HistoricoJobs:
+    """Banco SQLite do histórico (uma conexão por thread, modo WAL).
+    ``email_dias``: prazo do e-mail dos jobs (None: guarda para sempre)."""
+
+    def __init__(self, caminho, email_dias=EMAIL_DIAS_PADRAO):
+        self.caminho = caminho
+        self.email_dias = email_dias
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        self._local = threading.local()
+        with self._conexao() as con:
+            con.executescript(_ESQUEMA)
+
+    def _conexao(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")  # WAL: seguro contra queda do app
+            con.execute("PRAGMA foreign_keys=ON")
+            self._local.con = con
+        return con
+
+    # --- Gravação ---
+    def registrar(self, curso, *, origem='app', bimestre=None, serie=None, turma=None,
+                  email=None, alunos=None, disciplinas=None, anexo_bytes=None,
+                  duracoes=None, erro=None):
+        """Grava um job (e a duração de cada etapa em ``duracoes``); devolve o id."""
+        agora = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self._conexao() as con:
+            cursor = con.execute(
+                "INSERT INTO jobs (criado_em, origem, curso, bimestre, serie, turma, email,"
+                " alunos, disciplinas, anexo_bytes, erro) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (agora, origem, curso, _int_ou_none(bimestre), _texto_ou_none(serie),
+                 _texto_ou_none(turma), email, _int_ou_none(alunos),
+                 _int_ou_none(disciplinas), _int_ou_none(anexo_bytes), erro))
+            job_id = cursor.lastrowid
+            con.executemany("INSERT INTO etapas (job_id, etapa, segundos) VALUES (?,?,?)",
+                            [(job_id, etapa, float(s)) for etapa, s in (duracoes or {}).items()])
+        if self.email_dias is not None:
+            self.apagar_emails(self.email_dias)
+        return job_id
+
+    def apagar_emails(self, dias):
+        """Apaga o e-mail dos jobs com mais de ``dias`` dias; devolve quantos."""
+        limite = datetime.fromtimestamp(time.time() - dias * 86400).isoformat(
+            sep=' ', timespec='seconds')
+        with self._conexao() as con:
+            return con.execute("UPDATE jobs SET email = NULL"
+                               " WHERE criado_em <= ? AND email IS NOT NULL", (limite,)).rowcount
+
+    # --- Consultas ---
+    def por_curso_bimestre(self, desde=None):
+        """[(curso, bimestre, relatórios, erros), ...] ordenado por curso e bimestre."""
+        sql = ("SELECT curso, bimestre, COUNT(*), COUNT(erro) FROM jobs"
+               + (" WHERE criado_em >= ?" if desde else "")
+               + " GROUP BY curso, bimestre ORDER BY curso, bimestre")
+        return self._conexao().execute(sql, (desde,) if desde else ()).fetchall()
+
+    def percentil(self, etapa='total', p=0.95, desde=None):
+        """Percentil ``p`` (pelo posto mais próximo) da duração da ``etapa``
+        nos jobs sem erro, em segundos; None se não há jobs."""
+        filtro = " AND j.criado_em >= ?" if desde else ""
+        parametros = (etapa,) + ((desde,) if desde else ())
+        base = ("FROM etapas e JOIN jobs j ON j.id = e.job_id"
+                f" WHERE e.etapa = ? AND j.erro IS NULL{filtro}")
+        con = self._conexao()
+        (n,) = con.execute(f"SELECT COUNT(*) {base}", parametros).fetchone()
+        if not n:
+            return None
+        posicao = max(math.ceil(p * n) - 1, 0)
+        (segundos,) = con.execute(f"SELECT e.segundos {base} ORDER BY e.segundos LIMIT 1 OFFSET ?",
+                                  parametros + (posicao,)).fetchone()
+        return segundos
+
+    def resumo_etapas(self, p=0.95, desde=None):
+        """{etapa: (jobs, média, p50, p``p``)} das etapas registradas."""
+        filtro = " AND j.criado_em >= ?" if desde else ""
+        linhas = self._conexao().execute(
+            "SELECT e.etapa, COUNT(*), AVG(e.segundos) FROM etapas e"
+            f" JOIN jobs j ON j.id = e.job_id WHERE j.erro IS NULL{filtro} GROUP BY e.etapa",
+            (desde,) if desde else ()).fetchall()
+        ordem = {etapa: i for i, etapa in enumerate(ETAPAS)}
+        return {etapa: (n, media, self.percentil(etapa, 0.5, desde), self.percentil(etapa, p, desde))
+                for etapa, n, media in sorted(linhas, key=lambda l: ordem.get(l[0], len(ordem)))}
+
+    def por_dia(self, desde=None):
+        """[(dia 'AAAA-MM-DD', relatórios, MB anexados), ...]."""
+        sql = ("SELECT substr(criado_em, 1, 10) AS dia, COUNT(*),"
+               " COALESCE(SUM(anexo_bytes), 0) / 1048576.0 FROM jobs"
+               + (" WHERE criado_em >= ?" if desde else "")
+               + " GROUP BY dia ORDER BY dia")
+        return self._conexao().execute(sql, (desde,) if desde else ()).fetchall()
+
+    # --- Exportação para a planilha ---
+    def exportar(self, aba, lote=500):
+        """Copia os jobs ainda não exportados para ``aba`` (``gspread.Worksheet``
+        ou algo com ``row_values`` e ``append_rows``), em lotes; devolve quantos.
+
+        Cada lote é marcado como exportado numa transação aberta antes do
+        ``append_rows`` e confirmada depois dele: se a planilha falhar, a
+        marcação é desfeita e o lote volta na próxima exportação. Enquanto a
+        planilha responde, outras gravações no banco esperam (até o
+        ``timeout`` da conexão)."""
+        con = self._conexao()
+        if not aba.row_values(1):
+            aba.append_rows([COLUNAS_PLANILHA])
+        total = 0
+        while True:
+            # IMMEDIATE: dois exportadores (app e linha de comando) não pegam
+            # o mesmo lote.
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                total_lote = self._exportar_lote(con, aba, lote)
+            except BaseException:
+                con.rollback()
+                raise
+            con.commit()
+            if not total_lote:
+                return total
+            total += total_lote
+
+    @staticmethod
+    def _exportar_lote(con, aba, lote):
+        linhas = con.execute(
+            "SELECT j.id, j.criado_em, j.origem, j.curso, j.bimestre, j.serie, j.turma,"
+            " j.alunos, j.disciplinas, j.anexo_bytes, e.segundos, j.erro FROM jobs j"
+            " LEFT JOIN etapas e ON e.job_id = j.id AND e.etapa = 'total'"
+            " WHERE j.exportado = 0 ORDER BY j.id LIMIT ?", (lote,)).fetchall()
+        if not linhas:
+            return 0
+        con.executemany("UPDATE jobs SET exportado = 1 WHERE id = ?",
+                        [(linha[0],) for linha in linhas])
+        aba.append_rows([
+            [criado_em[:16], origem, curso, _celula(bimestre), _celula(serie), _celula(turma),
+             _celula(alunos), _celula(disciplinas),
+             _celula(None if anexo is None else round(anexo / 1024)),
+             _celula(None if total_s is None else round(total_s, 1)), erro or ""]
+            for _, criado_em, origem, curso, bimestre, serie, turma, alunos, disciplinas,
+            anexo, total_s, erro in linhas])
+        return len(linhas)
+
+    def iniciar_exportacao(self, abrir_aba, intervalo):
+        """Thread (daemon) que exporta os jobs novos a cada ``intervalo``
+        segundos. ``abrir_aba``: função que devolve a aba; chamada de novo só
+        depois de uma falha. Falhas são silenciosas (tenta no próximo ciclo)."""
+        def laco():
+            aba = None
+            while True:
+                time.sleep(intervalo)
+                try:
+                    if aba is None:
+                        aba = abrir_aba()
+                    self.exportar(aba)
+                except Exception:
+                    aba = None
+
+        thread = threading.Thread(target=laco, name='exportacao-historico', daemon=True)
+        thread.start()
+        return thread
+
+
+def _int_ou_none(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _texto_ou_none(valor):
+    return None if valor is None else str(valor)
+
+
+def _celula(valor):
+    return "" if valor is None else valor
+
+
+def _segundos(valor):
+    return "—" if valor is None else f"{valor:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.historico',
+        description="Resumo operacional do histórico de relatórios (SQLite).")
+    parser.add_argument('banco', help="arquivo SQLite (HISTORICO_DB / --historico do lote)")
+    parser.add_argument('--desde', metavar='AAAA-MM-DD', default=None,
+                        help="considera só os jobs a partir desta data")
+    parser.add_argument('--percentil', type=float, default=0.95,
+                        help="percentil dos tempos por etapa (padrão: 0.95)")
+    parser.add_argument('--apagar-emails', type=float, metavar='DIAS',
+                        help="apaga o e-mail dos jobs com mais de DIAS dias (0: todos)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.banco):
+        print(f"Banco não encontrado: {args.banco}", file=sys.stderr)
+        return 1
+    historico = HistoricoJobs(args.banco, email_dias=None)
+    if args.apagar_emails is not None:
+        print(f"E-mail apagado de {historico.apagar_emails(args.apagar_emails)} job(s).\n")
+    rotulo_p = f"p{args.percentil * 100:g}"
+
+    print("Relatórios por curso e bimestre:")
+    for curso, bimestre, n, erros in historico.por_curso_bimestre(args.desde):
+        print(f"  {curso:<40} {bimestre or '—'}º bim: {n:5d}"
+              + (f" ({erros} com erro)" if erros else ""))
+    print(f"\nTempo por etapa (s, jobs sem erro): jobs | média | p50 | {rotulo_p}")
+    for etapa, (n, media, p50, pp) in historico.resumo_etapas(args.percentil, args.desde).items():
+        print(f"  {etapa:<14} {n:6d} | {_segundos(media)} | {_segundos(p50)} | {_segundos(pp)}")
+    print("\nPor dia: relatórios | MB anexados")
+    for dia, n, mb in historico.por_dia(args.desde):
+        print(f"  {dia}: {n:5d} | {mb:8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
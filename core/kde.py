@@ -0,0 +1,46 @@
+"""KDE gaussiano rápido, compartilhado pelos backends de gráficos.
+
+O KDE é avaliado por *binning* linear em uma grade fina e convolução com o
+núcleo gaussiano via FFT: O(m log m) na grade, em vez de O(n × m) somando o
+núcleo de cada ponto. A banda é a de Scott, como no seaborn. Só depende do
+NumPy (o backend ``reportlab`` não importa o matplotlib).
+"""
+import numpy as np
+
+
+def banda_scott(valores):
+    """Banda do KDE pela regra de Scott (σ·n^(-1/5)); ``None`` se não houver
+    dispersão (o seaborn também omite a curva nesse caso)."""
+    n = len(valores)
+    if n < 2:
+        return None
+    sigma = np.std(valores, ddof=1)
+    if not np.isfinite(sigma) or sigma == 0:
+        return None
+    return sigma * n ** -0.2
+
+
+def kde_binned(valores, grade, banda, pontos=512):
+    """Densidade gaussiana de ``valores`` nos pontos de ``grade`` (crescente).
+
+    Os valores são distribuídos por *binning* linear em ``pontos`` pontos
+    igualmente espaçados e convoluídos com o núcleo via FFT; a densidade na
+    ``grade`` sai por interpolação linear.
+    """
+    lo, hi = float(grade[0]), float(grade[-1])
+    if hi <= lo:
+        return np.full(len(grade), 1 / (banda * np.sqrt(2 * np.pi)))
+    passo = (hi - lo) / (pontos - 1)
+    posicao = (np.clip(valores, lo, hi) - lo) / passo
+    i = np.minimum(posicao.astype(np.intp), pontos - 2)
+    frac = posicao - i
+    pesos = (np.bincount(i, 1 - frac, minlength=pontos)
+             + np.bincount(i + 1, frac, minlength=pontos))
+
+    alcance = min(pontos - 1, int(np.ceil(4 * banda / passo)))
+    distancias = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (distancias / banda) ** 2) / (banda * np.sqrt(2 * np.pi))
+    tamanho = 1 << int(pontos + 2 * alcance).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(pesos, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    densidade = conv[alcance:alcance + pontos] / len(valores)
+    return np.interp(grade, np.linspace(lo, hi, pontos), np.maximum(densidade, 0))
@@ -1,4 +1,4 @@
-"""Leitura e processamento dos arquivos .xls (Mapa de Turma).
+"""Leitura e processamento dos arquivos .xls/.xlsx (Mapa de Turma).
 
 Versão desacoplada do Google Colab: as funções aceitam tanto caminhos de
 arquivo quanto objetos file-like (como os uploads do Streamlit), e devolvem
@@ -8,18 +8,27 @@ Também extrai metadados do cabeçalho do XLS (Curso, Etapa/Bimestre, Período
 Letivo, Turma) e valida que o arquivo cobre **um único bimestre**, condição
 necessária para que as estatísticas do relatório façam sentido.
 """
+import io
+import os
 import re
-import unicodedata
 
+import numpy as np
 import pandas as pd
+import xlrd
 
 from .disciplinas import (
     catalogo_nomes_conhecidos,
     detectar_serie,
     eh_disciplina_ensino_medio,
 )
+from .texto import remover_acentos
 
 
+# Versão da lógica de leitura. Incremente sempre que o resultado de
+# `processar_curso_generico`/`processar_transito_estradas` mudar para o mesmo
+# arquivo: invalida as entradas do cache de mapas processados (cache_mapas.py).
+VERSAO_PARSER = 1
+
 # Etapa esperada: exatamente "Xº Bimestre" (X em 1..4).
 _RE_BIMESTRE_UNICO = re.compile(r"^\s*([1-4])\s*[ºo°]\s*Bimestre\s*$", re.IGNORECASE)
 
@@ -28,48 +37,402 @@ class ArquivoInvalidoError(ValueError):
     """Erro de validação amigável para problemas estruturais no XLS."""
 
 
-def remover_acentos(txt):
-    """Remove acentos de uma string."""
-    if not isinstance(txt, str):
-        txt = str(txt)
-    return ''.join(
-        c for c in unicodedata.normalize('NFD', txt)
-        if unicodedata.category(c) != 'Mn'
-    )
+def _conteudo_xls(arquivo_xls):
+    """Devolve ``(filename, file_contents)`` no formato que o xlrd espera.
+
+    Caminhos vão direto para o xlrd (que faz mmap do arquivo). Uploads do
+    Streamlit são ``BytesIO`` criados a partir de ``bytes``: ``getvalue()``
+    devolve esse mesmo objeto, sem copiar o conteúdo.
+    """
+    if isinstance(arquivo_xls, (str, os.PathLike)):
+        return os.fspath(arquivo_xls), None
+    if isinstance(arquivo_xls, (bytes, bytearray)):
+        return None, arquivo_xls
+    if hasattr(arquivo_xls, 'getvalue'):
+        return None, arquivo_xls.getvalue()
+    return None, arquivo_xls.read()
+
+
+# Tipos de célula do xlrd tratados como vazios (inclui erros como #N/D).
+_TIPOS_VAZIOS = (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR)
+
+
+def _coluna_tipada(tipos, valores, datemode):
+    """Converte uma coluna do xlrd em array tipado.
+
+    Colunas só com números (ou vazias) viram ``float64`` direto dos valores
+    do xlrd; as demais ficam ``object``, com textos como ``str``, números como
+    ``float`` e células vazias como ``None``.
+    """
+    if all(t == xlrd.XL_CELL_NUMBER or t in _TIPOS_VAZIOS for t in tipos):
+        return np.array(
+            [v if t == xlrd.XL_CELL_NUMBER else np.nan for t, v in zip(tipos, valores)],
+            dtype=np.float64,
+        )
+    coluna = []
+    for t, v in zip(tipos, valores):
+        if t == xlrd.XL_CELL_TEXT:
+            coluna.append(v if v else None)
+        elif t == xlrd.XL_CELL_NUMBER:
+            coluna.append(v)
+        elif t == xlrd.XL_CELL_DATE:
+            coluna.append(xlrd.xldate.xldate_as_datetime(v, datemode))
+        elif t == xlrd.XL_CELL_BOOLEAN:
+            coluna.append(bool(v))
+        else:
+            coluna.append(None)
+    return np.array(coluna, dtype=object)
+
+
+# Assinaturas (magic bytes) dos formatos aceitos: .xls (OLE2/BIFF) e .xlsx (ZIP).
+_ASSINATURA_XLS = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_ASSINATURA_XLSX = b'PK\x03\x04'
+
+
+def _detectar_formato(filename, conteudo):
+    """Devolve ``'xls'``, ``'xlsx'`` ou ``None`` a partir dos primeiros bytes."""
+    if filename is not None:
+        with open(filename, 'rb') as f:
+            inicio = f.read(8)
+    else:
+        inicio = bytes(conteudo[:8])
+    if inicio.startswith(_ASSINATURA_XLS):
+        return 'xls'
+    if inicio.startswith(_ASSINATURA_XLSX):
+        return 'xlsx'
+    return None
+
+
+class _LimiteDeLinhas(Exception):
+    """Interrompe a leitura da planilha ao atingir o limite de linhas."""
+
+
+def _planilha_parcial_xls(book, max_linhas):
+    """Carrega a primeira planilha só até a linha ``max_linhas`` (exclusiva).
+
+    O xlrd sempre decodifica a planilha inteira. Aqui o laço de registros do
+    próprio xlrd (``Sheet.read``) é interrompido na primeira célula além do
+    limite: no BIFF as células são gravadas em ordem de linha, então as
+    linhas anteriores já estão completas. Usa detalhes internos do xlrd
+    (fixado em 2.0.1 no ``requirements.txt``), espelhando ``Book.get_sheet``;
+    se eles mudarem (``AttributeError``/``TypeError``), ``_colunas_xls``
+    volta para a leitura completa.
+    """
+    book._position = book._sh_abs_posn[0]
+    book.getbof(xlrd.biffh.XL_WORKSHEET)
+    sheet = xlrd.sheet.Sheet(book, book._position, book._sheet_names[0], 0)
+    gravar_celula = sheet.put_cell
+
+    def put_cell(rowx, colx, ctype, value, xf_index):
+        if rowx >= max_linhas:
+            raise _LimiteDeLinhas
+        gravar_celula(rowx, colx, ctype, value, xf_index)
+
+    sheet.put_cell = put_cell
+    try:
+        sheet.read(book)
+    except _LimiteDeLinhas:
+        pass
+    return sheet
+
 
+def _colunas_xls(filename, conteudo, max_linhas=None):
+    """Colunas tipadas da primeira planilha de um .xls (xlrd, sob demanda).
+
+    Com ``max_linhas``, só as primeiras linhas são decodificadas. Se os
+    detalhes internos do xlrd usados para isso não estiverem lá (outra
+    versão), a planilha é lida inteira pela API pública e cortada: mais
+    lento, mas um .xls válido nunca é recusado por causa disso.
+    """
+    book = xlrd.open_workbook(filename, file_contents=conteudo, on_demand=True)
+    try:
+        if max_linhas is not None:
+            try:
+                return _colunas_parciais_xls(book, max_linhas)
+            except (AttributeError, TypeError):
+                pass
+        sheet = book.sheet_by_index(0)
+        n_linhas = sheet.nrows if max_linhas is None else min(sheet.nrows, max_linhas)
+        return [_coluna_tipada(sheet.col_types(j, end_rowx=n_linhas),
+                               sheet.col_values(j, end_rowx=n_linhas), book.datemode)
+                for j in range(sheet.ncols)], n_linhas
+    finally:
+        book.release_resources()
+
+
+def _colunas_parciais_xls(book, max_linhas):
+    """``_colunas_xls`` só das primeiras ``max_linhas`` linhas, lendo as
+    células direto da planilha parcial (``_planilha_parcial_xls``)."""
+    sheet = _planilha_parcial_xls(book, max_linhas)
+    n_linhas = min(sheet.nrows, max_linhas)
+    # Sem o ``tidy_dimensions`` do fim da leitura, as linhas podem ter
+    # comprimentos diferentes: completa com células vazias.
+    tipos = [list(sheet._cell_types[i]) for i in range(n_linhas)]
+    valores = [list(sheet._cell_values[i]) for i in range(n_linhas)]
+    n_colunas = max((len(t) for t in tipos), default=0)
+    for t, v in zip(tipos, valores):
+        t.extend([xlrd.XL_CELL_EMPTY] * (n_colunas - len(t)))
+        v.extend([''] * (n_colunas - len(v)))
+    return [_coluna_tipada([t[j] for t in tipos], [v[j] for v in valores], book.datemode)
+            for j in range(n_colunas)], n_linhas
+
+
+def _colunas_xlsx(filename, conteudo, max_linhas=None):
+    """Colunas tipadas da primeira planilha de um .xlsx.
+
+    Usa o modo ``read_only`` do openpyxl, que percorre o XML da planilha linha
+    a linha em vez de montar o modelo de células inteiro (um objeto por
+    célula) na memória; cada linha vai direto para as listas de colunas. Com
+    ``max_linhas``, a leitura do XML para após essas linhas.
+
+    A memória **não** é constante: todas as células não vazias da planilha
+    ficam nas listas (e depois no DataFrame bruto), porque ``MapaIndex`` e
+    ``extrair_dataframes`` trabalham sobre o mapa inteiro. O que se evita é
+    o modelo de células do openpyxl: num mapa de 600 alunos, o pico cai de
+    cerca de 3,4 MB para 0,8 MB.
+    """
+    import openpyxl
 
-def _ler_xls_bruto(arquivo_xls):
-    """Lê o XLS inteiro como DataFrame de strings (sem cabeçalho).
+    origem = filename if filename is not None else io.BytesIO(conteudo)
+    book = openpyxl.load_workbook(origem, read_only=True, data_only=True)
+    try:
+        colunas = []
+        n_linhas = 0
+        linhas = book.worksheets[0].iter_rows(max_row=max_linhas, values_only=True)
+        for i, linha in enumerate(linhas):
+            for j, valor in enumerate(linha):
+                if valor is None or valor == '':
+                    continue
+                while len(colunas) <= j:
+                    colunas.append([None] * i)
+                coluna = colunas[j]
+                coluna.extend([None] * (i - len(coluna)))
+                coluna.append(valor)
+                n_linhas = i + 1
+    finally:
+        book.close()
+    for coluna in colunas:
+        coluna.extend([None] * (n_linhas - len(coluna)))
+    return [_coluna_de_valores(c) for c in colunas], n_linhas
+
+
+def _coluna_de_valores(valores):
+    """Equivalente de ``_coluna_tipada`` para valores Python (openpyxl):
+    números viram ``float``; colunas só numéricas viram ``float64``."""
+    valores = [float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else v
+               for v in valores]
+    if all(v is None or isinstance(v, float) for v in valores):
+        return np.array([np.nan if v is None else v for v in valores], dtype=np.float64)
+    return np.array(valores, dtype=object)
+
+
+def _ler_xls_bruto(arquivo_xls, max_linhas=None):
+    """Lê a primeira planilha do mapa como DataFrame tipado (sem cabeçalho).
+
+    O formato é detectado pelos primeiros bytes: ``.xls`` é lido célula a
+    célula via xlrd (``on_demand=True``, só a primeira planilha é carregada)
+    e ``.xlsx`` linha a linha via openpyxl (sem o modelo de células, mas com
+    a planilha inteira no resultado). Nos dois casos notas e faltas
+    chegam como ``float`` sem passar por string, e só rótulos/identificação
+    ficam como texto. Use ``_texto_celula`` para obter a representação textual
+    de qualquer célula. ``max_linhas`` limita a leitura às primeiras linhas
+    (usado por ``validar_mapa``).
 
     Centraliza o tratamento de erro de leitura para mensagens amigáveis.
     """
     try:
-        return pd.read_excel(arquivo_xls, header=None, dtype=str, engine='xlrd')
+        filename, conteudo = _conteudo_xls(arquivo_xls)
+        formato = _detectar_formato(filename, conteudo)
     except Exception as e:
         raise ArquivoInvalidoError(
-            f"Não foi possível abrir o arquivo Excel (.xls). Detalhe: {e}"
+            f"Não foi possível abrir o arquivo Excel (.xls/.xlsx). Detalhe: {e}"
+        )
+    if formato is None:
+        raise ArquivoInvalidoError(
+            "O arquivo enviado não é uma planilha Excel (.xls ou .xlsx). "
+            "Exporte o Mapa de Turma do SIGAA e envie o arquivo gerado."
         )
+    try:
+        if formato == 'xls':
+            colunas, n_linhas = _colunas_xls(filename, conteudo, max_linhas)
+        else:
+            colunas, n_linhas = _colunas_xlsx(filename, conteudo, max_linhas)
+    except Exception as e:
+        raise ArquivoInvalidoError(
+            f"Não foi possível abrir o arquivo Excel (.{formato}). Detalhe: {e}"
+        )
+    return pd.DataFrame(dict(enumerate(colunas)), index=pd.RangeIndex(n_linhas))
+
+
+def _texto_celula(valor):
+    """Texto de uma célula como o SIGAA a exibe (ex.: ``4929.0`` -> ``'4929'``).
+
+    Células vazias (``None``/NaN) viram string vazia.
+    """
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        if np.isnan(valor):
+            return ''
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor)
+
 
+# Os rótulos do cabeçalho (Curso, Etapa, Período Letivo, Turma) ficam nas
+# primeiras linhas do mapa.
+_MAX_LINHA_ROTULOS = 10
 
-def _valor_apos_rotulo(df_bruto, rotulo, max_linha=10):
-    """Retorna o primeiro valor não-nulo encontrado à direita do rótulo
-    informado nas primeiras `max_linha` linhas. Compara sem acento e em
-    minúsculas. Devolve string ou None.
+
+# Rótulo da coluna de matrícula (com ou sem acento, já composto ou não). O
+# acento combinante vai como caractere, não como escape ``\u``: colunas de
+# texto do pandas com pyarrow casam o padrão no RE2, que não aceita o escape.
+_RE_ROTULO_MATRICULA = re.compile('^\\s*matr(?:i|í|i\u0301)cula\\s*$', re.IGNORECASE)
+
+# Marcador da seção de legenda (coluna 1, abaixo da lista de alunos).
+_RE_ROTULO_LEGENDA = re.compile(r'^\s*legenda\s*$', re.IGNORECASE)
+
+# A busca do cabeçalho avança em blocos de linhas e para no primeiro acerto,
+# para não varrer a lista de alunos inteira quando o cabeçalho está no topo.
+_BLOCO_LINHAS = 256
+
+# Colunas de identificação (Nº, Matrícula, Nome do Aluno) ficam à esquerda:
+# o rótulo "Matrícula" é procurado só nelas (e no resto da linha apenas se
+# não estiver ali).
+_COLUNAS_IDENTIFICACAO = 4
+
+# Matrícula válida: "20" + 9 dígitos, ignorando separadores (pontos, traços).
+_RE_MATRICULA = re.compile(r'^\D*2\D*0(?:\D*\d){9}\D*$')
+
+
+def _casa(coluna, padrao):
+    """Máscara (array bool) das células da ``coluna`` (Series) que casam com
+    ``padrao``, pelo ``str.match`` do pandas sobre a coluna inteira.
+
+    A coluna é convertida para texto antes (números viram "3.0", vazios
+    ficam ausentes ou "nan", que não casam com os padrões daqui): numa
+    coluna ``object`` o ``str.match`` chamaria o regex célula a célula em
+    Python; em texto, com o pyarrow, o casamento é feito de uma vez.
     """
-    rotulo_norm = remover_acentos(rotulo).lower().rstrip(':').strip()
-    limite = min(max_linha, len(df_bruto))
-    for i in range(limite):
-        for j, cel in enumerate(df_bruto.iloc[i].tolist()):
-            if cel is None:
+    return coluna.astype(str).str.match(padrao, na=False).to_numpy(dtype=bool)
+
+
+def _normalizar_rotulo(texto):
+    """Forma de comparação de rótulos: sem acento, minúsculas, sem ':' final."""
+    return remover_acentos(texto).lower().strip().rstrip(':').strip()
+
+
+class MapaIndex:
+    """Índice de uma única varredura do Mapa de Turma bruto.
+
+    Guarda onde fica cada bloco do arquivo para que metadados, legenda e
+    notas/faltas sejam extraídos sem reler nem reescanear a planilha:
+
+    - ``rotulos``: {rótulo normalizado: valor à direita} das primeiras linhas;
+    - ``linha_cabecalho``, ``col_matricula``, ``col_nome``: cabeçalho
+      Matrícula/Nome (a linha seguinte traz os tipos ``N``/``F``), ou -1;
+    - ``linhas_dados``: faixa de linhas entre o cabeçalho e a legenda;
+    - ``inicio_legenda``: primeira linha após o marcador "LEGENDA", ou -1.
+
+    Use ``indexar_mapa`` para construir (aceita o mesmo que ``_ler_xls_bruto``).
+    """
+
+    def __init__(self, df_bruto):
+        self.df = df_bruto
+        self.rotulos = {}
+        self.linha_cabecalho = -1
+        self.col_matricula = -1
+        self.col_nome = -1
+        self.inicio_legenda = -1
+
+        for linha in df_bruto.iloc[:_MAX_LINHA_ROTULOS].to_numpy(dtype=object):
+            self._indexar_rotulos(linha)
+        self._localizar_cabecalho()
+        self._localizar_legenda()
+
+        if self.linha_cabecalho == -1:
+            self.linhas_dados = range(0)
+        else:
+            fim = len(df_bruto)
+            if self.inicio_legenda > self.linha_cabecalho:
+                fim = self.inicio_legenda - 1
+            self.linhas_dados = range(min(self.linha_cabecalho + 2, fim), fim)
+
+    def _localizar_cabecalho(self):
+        """Encontra a linha "Matrícula" com ``str.match`` sobre as colunas de
+        identificação, em blocos de ``_BLOCO_LINHAS`` linhas (para no
+        primeiro bloco com acerto); só a linha encontrada é normalizada
+        célula a célula."""
+        df = self.df
+        i = self._linha_rotulo_matricula(df.iloc[:, :_COLUNAS_IDENTIFICACAO])
+        if i is None and df.shape[1] > _COLUNAS_IDENTIFICACAO:
+            i = self._linha_rotulo_matricula(df.iloc[:, _COLUNAS_IDENTIFICACAO:])
+        if i is None:
+            return
+        textos = [remover_acentos(c).lower().strip() if isinstance(c, str) else ''
+                  for c in df.iloc[i].tolist()]
+        self._indexar_cabecalho(i, textos)
+
+    @staticmethod
+    def _linha_rotulo_matricula(colunas):
+        for inicio in range(0, len(colunas), _BLOCO_LINHAS):
+            bloco = colunas.iloc[inicio:inicio + _BLOCO_LINHAS]
+            acertos = np.zeros(len(bloco), dtype=bool)
+            for j in range(bloco.shape[1]):
+                acertos |= _casa(bloco.iloc[:, j], _RE_ROTULO_MATRICULA)
+            linhas = np.flatnonzero(acertos)
+            if len(linhas):
+                return inicio + int(linhas[0])
+        return None
+
+    def _localizar_legenda(self):
+        """Primeira linha cuja coluna 1 é o marcador "LEGENDA"."""
+        if self.df.shape[1] < 3:
+            return
+        linhas = np.flatnonzero(_casa(self.df.iloc[:, 1], _RE_ROTULO_LEGENDA))
+        if len(linhas):
+            self.inicio_legenda = int(linhas[0]) + 1
+
+    def _indexar_rotulos(self, linha):
+        for j, cel in enumerate(linha):
+            if not isinstance(cel, str):
                 continue
-            texto = remover_acentos(str(cel)).lower().strip().rstrip(':').strip()
-            if texto == rotulo_norm:
-                for k in range(j + 1, df_bruto.shape[1]):
-                    val = df_bruto.iat[i, k]
-                    if pd.notna(val) and str(val).strip():
-                        return str(val).strip()
-                return None
-    return None
+            rotulo = _normalizar_rotulo(cel)
+            if not rotulo or rotulo in self.rotulos:
+                continue
+            valor = None
+            for val in linha[j + 1:]:
+                texto_val = _texto_celula(val).strip()
+                if texto_val:
+                    valor = texto_val
+                    break
+            self.rotulos[rotulo] = valor
+
+    def _indexar_cabecalho(self, i, textos):
+        self.linha_cabecalho = i
+        self.col_matricula = textos.index('matricula')
+        if 'nome do aluno' in textos:
+            self.col_nome = textos.index('nome do aluno')
+        elif 'nome' in textos:
+            self.col_nome = textos.index('nome')
+
+    def valor_apos_rotulo(self, rotulo):
+        """Primeiro valor não vazio à direita do rótulo nas primeiras linhas
+        (string), ou None."""
+        return self.rotulos.get(_normalizar_rotulo(rotulo))
+
+
+def indexar_mapa(arquivo_xls):
+    """Lê (se preciso) e indexa o mapa em uma única varredura.
+
+    Aceita caminho, file-like (upload), o DataFrame de ``_ler_xls_bruto`` ou
+    um ``MapaIndex`` já construído (devolvido como está).
+    """
+    if isinstance(arquivo_xls, MapaIndex):
+        return arquivo_xls
+    if isinstance(arquivo_xls, pd.DataFrame):
+        return MapaIndex(arquivo_xls)
+    return MapaIndex(_ler_xls_bruto(arquivo_xls))
 
 
 def extrair_metadados(arquivo_xls):
@@ -80,15 +443,12 @@ def extrair_metadados(arquivo_xls):
     não corresponder exatamente a um bimestre único (ex.: arquivos agregando
     vários bimestres).
     """
-    if isinstance(arquivo_xls, pd.DataFrame):
-        df_bruto = arquivo_xls
-    else:
-        df_bruto = _ler_xls_bruto(arquivo_xls)
+    indice = indexar_mapa(arquivo_xls)
 
-    curso = _valor_apos_rotulo(df_bruto, 'Curso')
-    etapa = _valor_apos_rotulo(df_bruto, 'Etapa')
-    periodo = _valor_apos_rotulo(df_bruto, 'Período Letivo')
-    turma = _valor_apos_rotulo(df_bruto, 'Turma')
+    curso = indice.valor_apos_rotulo('Curso')
+    etapa = indice.valor_apos_rotulo('Etapa')
+    periodo = indice.valor_apos_rotulo('Período Letivo')
+    turma = indice.valor_apos_rotulo('Turma')
 
     if not etapa:
         raise ArquivoInvalidoError(
@@ -115,6 +475,21 @@ def extrair_metadados(arquivo_xls):
     }
 
 
+def validar_mapa(arquivo_xls):
+    """Validação rápida do mapa antes da leitura completa.
+
+    Confere os *magic bytes* e lê só as primeiras ``_MAX_LINHA_ROTULOS``
+    linhas da planilha (onde ficam Curso/Etapa/Período Letivo/Turma),
+    aplicando as mesmas regras de ``extrair_metadados``. Arquivos que não são
+    planilhas, mapas sem etapa ou com vários bimestres são recusados em
+    milissegundos, sem decodificar a lista de alunos.
+
+    Devolve os metadados (como ``extrair_metadados``) ou levanta
+    ``ArquivoInvalidoError``.
+    """
+    return extrair_metadados(_ler_xls_bruto(arquivo_xls, max_linhas=_MAX_LINHA_ROTULOS))
+
+
 def extrair_legenda(arquivo_xls):
     """Lê a seção "LEGENDA" do XLS e devolve um dict {código: nome completo}.
 
@@ -126,20 +501,9 @@ def extrair_legenda(arquivo_xls):
     Retorna dict vazio se não houver legenda detectável (mantemos comportamento
     tolerante para não derrubar arquivos antigos).
     """
-    if isinstance(arquivo_xls, pd.DataFrame):
-        df = arquivo_xls
-    else:
-        df = _ler_xls_bruto(arquivo_xls)
-
-    if df.shape[1] < 3:
-        return {}
-
-    inicio = -1
-    for i in range(len(df)):
-        cel = df.iat[i, 1]
-        if pd.notna(cel) and remover_acentos(str(cel)).strip().lower() == 'legenda':
-            inicio = i + 1
-            break
+    indice = indexar_mapa(arquivo_xls)
+    df = indice.df
+    inicio = indice.inicio_legenda
     if inicio == -1:
         return {}
 
@@ -147,14 +511,14 @@ def extrair_legenda(arquivo_xls):
     for i in range(inicio, len(df)):
         codigo = df.iat[i, 1]
         nome = df.iat[i, 2]
-        if pd.isna(codigo) or not str(codigo).strip():
+        if pd.isna(codigo) or not _texto_celula(codigo).strip():
             continue
-        codigo = str(codigo).strip()
+        codigo = _texto_celula(codigo).strip()
         if remover_acentos(codigo).lower() == 'legenda':
             continue
         if pd.isna(nome):
             continue
-        nome = str(nome).strip()
+        nome = _texto_celula(nome).strip()
         if not nome:
             continue
         legenda[codigo] = nome
@@ -165,30 +529,18 @@ def extrair_dataframes(arquivo_xls):
     """Lê o arquivo XLS, identifica o cabeçalho dinamicamente e monta os
     DataFrames de Notas e Faltas.
 
-    `arquivo_xls` pode ser um caminho, um objeto file-like (upload) ou um
-    DataFrame já lido por ``_ler_xls_bruto`` (evita releitura).
+    `arquivo_xls` pode ser um caminho, um objeto file-like (upload), um
+    DataFrame já lido por ``_ler_xls_bruto`` ou um ``MapaIndex`` (evita
+    releitura e nova varredura).
     Robusto contra variações na formatação do cabeçalho e células mescladas.
     """
-    if isinstance(arquivo_xls, pd.DataFrame):
-        df_full = arquivo_xls
-    else:
-        df_full = _ler_xls_bruto(arquivo_xls)
-
-    # Encontra a linha onde o cabeçalho começa procurando por "Matrícula"
-    header_start_row = -1
-    mat_col_idx = -1
-    nome_col_idx = -1
-
-    for i, row in df_full.iterrows():
-        search_row = [remover_acentos(str(cell)).lower() for cell in row.tolist()]
-        if 'matricula' in search_row:
-            header_start_row = i
-            mat_col_idx = search_row.index('matricula')
-            if 'nome do aluno' in search_row:
-                nome_col_idx = search_row.index('nome do aluno')
-            elif 'nome' in search_row:
-                nome_col_idx = search_row.index('nome')
-            break
+    indice = indexar_mapa(arquivo_xls)
+    df_full = indice.df
+
+    # Linha do cabeçalho ("Matrícula"/"Nome") localizada na varredura do índice.
+    header_start_row = indice.linha_cabecalho
+    mat_col_idx = indice.col_matricula
+    nome_col_idx = indice.col_nome
 
     if header_start_row == -1 or mat_col_idx == -1 or nome_col_idx == -1:
         raise ArquivoInvalidoError(
@@ -197,19 +549,22 @@ def extrair_dataframes(arquivo_xls):
 
     header_disciplinas = df_full.iloc[header_start_row].ffill()
     header_tipo_dado = df_full.iloc[header_start_row + 1]
-    df_data = df_full.iloc[header_start_row + 2:].copy()
+    df_data = df_full.iloc[indice.linhas_dados.start:indice.linhas_dados.stop]
 
-    df_identificacao = df_data[[mat_col_idx, nome_col_idx]].copy()
+    # Matrícula pode vir como número no XLS; identificação é sempre texto.
+    df_identificacao = df_data[[mat_col_idx, nome_col_idx]].apply(
+        lambda col: col.map(_texto_celula))
     df_identificacao.columns = ['matricula', 'nome']
 
-    matriculas_limpas = df_identificacao['matricula'].str.replace(r'\D', '', regex=True)
-    mask_validos = matriculas_limpas.str.match(r'^20\d{9}$', na=False)
+    mask_validos = _casa(df_identificacao['matricula'], _RE_MATRICULA)
 
     df_alunos_validos = df_identificacao[mask_validos].reset_index(drop=True)
     df_data_validos = df_data[mask_validos].reset_index(drop=True)
 
-    df_notas = df_alunos_validos.copy()
-    df_faltas = df_alunos_validos.copy()
+    # Colunas coletadas em dicts e montadas de uma vez (sem cópias do bloco de
+    # identificação nem inserções coluna a coluna).
+    colunas_notas = {}
+    colunas_faltas = {}
 
     rotulos_nao_disciplina = {
         'matricula', 'nome', 'nome do aluno', 'situacao', 'total faltas', 'nan',
@@ -219,8 +574,8 @@ def extrair_dataframes(arquivo_xls):
         tipo_raw = header_tipo_dado.iloc[i]
         if pd.isna(tipo_raw):
             continue
-        tipo_dado = str(tipo_raw).strip().upper()
-        disciplina = str(header_disciplinas.iloc[i]).strip()
+        tipo_dado = _texto_celula(tipo_raw).strip().upper()
+        disciplina = _texto_celula(header_disciplinas.iloc[i]).strip()
 
         if i in [mat_col_idx, nome_col_idx] or not disciplina:
             continue
@@ -228,10 +583,12 @@ def extrair_dataframes(arquivo_xls):
             continue
 
         if tipo_dado == 'N':
-            df_notas[disciplina] = pd.to_numeric(df_data_validos.iloc[:, i], errors='coerce')
+            colunas_notas[disciplina] = pd.to_numeric(df_data_validos.iloc[:, i], errors='coerce')
         elif tipo_dado == 'F':
-            df_faltas[disciplina] = pd.to_numeric(df_data_validos.iloc[:, i], errors='coerce')
+            colunas_faltas[disciplina] = pd.to_numeric(df_data_validos.iloc[:, i], errors='coerce')
 
+    df_notas = pd.concat([df_alunos_validos, pd.DataFrame(colunas_notas)], axis=1)
+    df_faltas = pd.concat([df_alunos_validos, pd.DataFrame(colunas_faltas)], axis=1)
     return df_notas, df_faltas
 
 
@@ -299,10 +656,10 @@ def processar_curso_generico(arquivo_xls):
 
     Retorna: (df_notas, df_faltas, disciplinas_dict, metadados)
     """
-    df_bruto = _ler_xls_bruto(arquivo_xls)
-    metadados = extrair_metadados(df_bruto)
-    df_notas, df_faltas = extrair_dataframes(df_bruto)
-    legenda = extrair_legenda(df_bruto)
+    indice = indexar_mapa(arquivo_xls)
+    metadados = extrair_metadados(indice)
+    df_notas, df_faltas = extrair_dataframes(indice)
+    legenda = extrair_legenda(indice)
     disciplinas_dict = disciplinas_dict_de_df(df_notas, legenda)
     metadados['curso_amigavel'] = _curso_amigavel(metadados.get('curso'))
     metadados['serie'] = detectar_serie(disciplinas_dict)
@@ -321,11 +678,11 @@ def processar_transito_estradas(arquivo_transito_xls, arquivo_estradas_xls):
     Retorna lista com dois itens, cada um no formato:
         (df_notas, df_faltas, disciplinas_dict, metadados)
     """
-    df_bruto_tt = _ler_xls_bruto(arquivo_transito_xls)
-    df_bruto_est = _ler_xls_bruto(arquivo_estradas_xls)
+    indice_tt = indexar_mapa(arquivo_transito_xls)
+    indice_est = indexar_mapa(arquivo_estradas_xls)
 
-    meta_tt = extrair_metadados(df_bruto_tt)
-    meta_est = extrair_metadados(df_bruto_est)
+    meta_tt = extrair_metadados(indice_tt)
+    meta_est = extrair_metadados(indice_est)
 
     if meta_tt['bimestre_num'] != meta_est['bimestre_num']:
         raise ArquivoInvalidoError(
@@ -334,11 +691,11 @@ def processar_transito_estradas(arquivo_transito_xls, arquivo_estradas_xls):
             "Selecione o mesmo bimestre em ambos os mapas."
         )
 
-    df_notas_tt, df_faltas_tt = extrair_dataframes(df_bruto_tt)
-    df_notas_est, df_faltas_est = extrair_dataframes(df_bruto_est)
+    df_notas_tt, df_faltas_tt = extrair_dataframes(indice_tt)
+    df_notas_est, df_faltas_est = extrair_dataframes(indice_est)
 
-    legenda_tt_arq = extrair_legenda(df_bruto_tt)
-    legenda_est_arq = extrair_legenda(df_bruto_est)
+    legenda_tt_arq = extrair_legenda(indice_tt)
+    legenda_est_arq = extrair_legenda(indice_est)
 
     # O mapa de Trânsito traz apenas as disciplinas técnicas; as do ensino médio
     # vêm do mapa de Estradas. Identificamos quais colunas de Estradas são de
@@ -0,0 +1,138 @@
+"""Perfil numérico das disciplinas de uma turma, calculado uma única vez.
+
+As estatísticas e cada gráfico do relatório precisavam das mesmas coisas:
+converter as colunas de nota com ``pd.to_numeric``, descobrir quais
+disciplinas têm notas de verdade e tirar média, máximo, quartis... Cada função
+refazia esse trabalho sobre o DataFrame. ``DisciplinaProfile`` faz tudo em uma
+passada vetorizada sobre a matriz (alunos × disciplinas) e é compartilhado por
+``calcular_estatisticas`` e pelos gráficos.
+
+Classificação das disciplinas (mesma regra do relatório):
+
+- ``sem_dados``: nenhuma nota lançada OU todas as notas iguais a zero;
+- ``com_notas``: as demais (entram nas estatísticas e gráficos);
+- ``incompletas``: entre as ``com_notas``, as de nota máxima observada baixa
+  demais (≤ metade da pontuação do bimestre), sugerindo lançamento incompleto.
+
+O mesmo perfil serve para as faltas (sem ``max_pts``); nesse caso interessa
+``com_dados`` (disciplinas com ao menos um valor).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .turma import TurmaFrame, para_float64
+
+# Quantis pré-calculados por disciplina (interpolação linear, como no pandas).
+QUANTIS = (0.25, 0.50, 0.75, 0.90)
+
+
+class DisciplinaProfile:
+    """Matriz numérica + indicadores por disciplina (colunas na ordem de
+    ``codigos``). Use ``de_notas``/``de_faltas`` para construir."""
+
+    __slots__ = ('codigos', 'matriz', 'validos', 'contagem', 'maximo', 'minimo',
+                 'media', 'desvio', 'quantis', 'com_dados', 'com_notas',
+                 'sem_dados', 'incompletas', '_posicao')
+
+    def __init__(self, codigos, matriz, max_pts=None):
+        self.codigos = list(codigos)
+        self.matriz = matriz
+        self._posicao = {c: j for j, c in enumerate(self.codigos)}
+        self.validos = ~np.isnan(matriz)
+        self.contagem = self.validos.sum(axis=0)
+
+        tem_dados = self.contagem > 0
+        n = matriz.shape[1]
+        self.maximo = np.full(n, np.nan)
+        self.minimo = np.full(n, np.nan)
+        self.media = np.full(n, np.nan)
+        self.desvio = np.full(n, np.nan)
+        self.quantis = np.full((len(QUANTIS), n), np.nan)
+        if tem_dados.any():
+            sub = matriz[:, tem_dados]
+            with warnings.catch_warnings():
+                # σ de coluna com um único valor é NaN (como no pandas).
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.maximo[tem_dados] = np.nanmax(sub, axis=0)
+                self.minimo[tem_dados] = np.nanmin(sub, axis=0)
+                self.media[tem_dados] = np.nanmean(sub, axis=0)
+                self.desvio[tem_dados] = np.nanstd(sub, axis=0, ddof=1)
+                self.quantis[:, tem_dados] = np.nanquantile(sub, QUANTIS, axis=0)
+
+        self.com_dados = [c for c, t in zip(self.codigos, tem_dados) if t]
+        com_notas = tem_dados & (self.maximo != 0)
+        self.com_notas = [c for c, t in zip(self.codigos, com_notas) if t]
+        self.sem_dados = [c for c, t in zip(self.codigos, com_notas) if not t]
+        if max_pts is None:
+            self.incompletas = []
+        else:
+            self.incompletas = [c for c in self.com_notas
+                                if self.maximo[self._posicao[c]] <= max_pts / 2]
+
+    @classmethod
+    def de_notas(cls, df_notas, disciplinas_dict, max_pts=None):
+        """Perfil das notas de ``df_notas`` (DataFrame ou ``TurmaFrame``)
+        para as disciplinas de ``disciplinas_dict`` presentes."""
+        codigos, matriz = _matriz_float64(df_notas, disciplinas_dict, 'notas')
+        return cls(codigos, matriz, max_pts)
+
+    @classmethod
+    def de_faltas(cls, df_faltas, disciplinas_dict):
+        """Perfil das faltas (DataFrame ou ``TurmaFrame``)."""
+        codigos, matriz = _matriz_float64(df_faltas, disciplinas_dict, 'faltas')
+        return cls(codigos, matriz)
+
+    def __len__(self):
+        return self.matriz.shape[0]
+
+    def posicao(self, codigo):
+        return self._posicao[codigo]
+
+    def coluna(self, codigo):
+        """Valores (com NaN) de uma disciplina; view da matriz."""
+        return self.matriz[:, self._posicao[codigo]]
+
+    def valores(self, codigo):
+        """Valores lançados (sem NaN) de uma disciplina."""
+        j = self._posicao[codigo]
+        return self.matriz[self.validos[:, j], j]
+
+    def submatriz(self, codigos):
+        """Matriz (alunos × ``codigos``), na ordem pedida."""
+        return self.matriz[:, [self._posicao[c] for c in codigos]]
+
+    def indicador(self, nome, codigos):
+        """Vetor de um indicador (``'media'``, ``'maximo'``...) para ``codigos``."""
+        return getattr(self, nome)[[self._posicao[c] for c in codigos]]
+
+    def quantil(self, q, codigos):
+        """Quantil ``q`` (um de ``QUANTIS``) das disciplinas ``codigos``."""
+        return self.quantis[QUANTIS.index(q), [self._posicao[c] for c in codigos]]
+
+    def media_por_aluno(self, codigos=None):
+        """Média de cada aluno nas disciplinas ``codigos`` (padrão:
+        ``com_notas``); NaN para quem não tem nenhuma nota."""
+        sub = self.submatriz(self.com_notas if codigos is None else codigos)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmean(sub, axis=1) if sub.shape[1] else np.full(len(self), np.nan)
+
+
+def _matriz_float64(origem, disciplinas_dict, qual):
+    """(códigos presentes, matriz float64) a partir de um DataFrame ou de um
+    ``TurmaFrame`` (``qual``: ``'notas'`` ou ``'faltas'``)."""
+    if isinstance(origem, TurmaFrame):
+        codigos = [c for c in disciplinas_dict if c in origem.disciplinas]
+        base = origem.notas if qual == 'notas' else origem.faltas
+        return codigos, para_float64(base[:, [origem.posicao(c) for c in codigos]])
+    codigos = [c for c in disciplinas_dict if c in origem.columns]
+    matriz = np.empty((len(origem), len(codigos)), dtype=np.float64)
+    for j, c in enumerate(codigos):
+        coluna = pd.to_numeric(origem[c], errors='coerce')
+        if coluna.dtype == np.float32:  # view de um TurmaFrame (``notas_df``)
+            matriz[:, j] = para_float64(coluna.to_numpy())
+        else:
+            matriz[:, j] = coluna.to_numpy(dtype=np.float64, na_value=np.nan)
+    return codigos, matriz
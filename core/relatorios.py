@@ -2,8 +2,11 @@
 
 Versão desacoplada do Google Colab:
 - Os gráficos são devolvidos como figuras matplotlib (exibíveis no Streamlit) e
-  convertidos para PNG em memória quando montados no PDF.
-- O PDF é gerado em um buffer (BytesIO), pronto para download.
+  convertidos para PNG em memória quando montados no PDF. Opcionalmente, são
+  desenhados já como PNG em um pool de processos (``paralelo=True``) ou, no
+  backend ``'reportlab'``, como ``Drawing`` vetoriais que entram direto no PDF.
+- O PDF é gerado em um ``SpooledTemporaryFile``: em memória até
+  ``PDF_MEMORIA_MAX`` bytes e, acima disso, em um arquivo temporário.
 - A chave da OpenAI é recebida por parâmetro; se ausente, o comentário por IA
   é simplesmente pulado.
 
@@ -16,29 +19,46 @@ Faltas:
 - Análise por **sinal estatístico** (P90 e média+2σ por disciplina; top-10
   alunos por faltas totais). Sem dependência de carga horária ou calendário.
 """
+import atexit
+import copy
+import functools
 import io
+import multiprocessing
+import os
 import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
 import matplotlib
 matplotlib.use('Agg')  # backend sem display, adequado para servidor
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import requests
-import seaborn as sns
 from babel.dates import format_date
+from reportlab.graphics.shapes import Drawing
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.platypus import (
-    BaseDocTemplate, Frame, Image, PageBreak, PageTemplate, Paragraph,
+    BaseDocTemplate, Flowable, Frame, Image, PageBreak, PageTemplate, Paragraph,
     Spacer, Table, TableStyle,
 )
 from reportlab.platypus.tableofcontents import TableOfContents
 
+from .estatisticas import EstatisticasTurma, ResumoFaltasDisciplina, ResumoNotasDisciplina
+from .figuras import figura_categorias, figura_histograma, png_da_figura
+from .perfil import DisciplinaProfile
+from .turma import TurmaFrame
+
 
 # --------------------------------
 # Pontuação por bimestre (CEFET-MG)
@@ -76,149 +96,150 @@ def get_simplified_name(code, disciplinas_dict):
 # --------------------------------
 # Estatísticas
 # --------------------------------
+def _dataframes_da_turma(df_notas, df_faltas):
+    """Aceita um ``TurmaFrame`` no lugar de ``df_notas``: devolve os DataFrames
+    sobre as matrizes dele (views, sem cópia)."""
+    if isinstance(df_notas, TurmaFrame):
+        turma = df_notas
+        df_notas = turma.notas_df()
+        if df_faltas is None:
+            df_faltas = turma.faltas_df()
+    return df_notas, df_faltas
+
+
 def calcular_estatisticas(df_notas, disciplinas_dict, df_faltas=None, metadados=None):
-    """Calcula as estatísticas básicas (notas + faltas) para um curso/bimestre."""
-    df_notas = df_notas.copy()
-    estatisticas = {}
+    """Calcula as estatísticas básicas (notas + faltas) para um curso/bimestre.
+
+    ``df_notas`` pode ser o DataFrame de notas ou um ``TurmaFrame`` (nesse
+    caso ``df_faltas`` é opcional). Os DataFrames recebidos não são alterados.
+
+    Devolve um ``EstatisticasTurma`` só com valores crus (a formatação fica
+    no PDF/IA; ver ``estatisticas.py``). As colunas são convertidas uma única
+    vez em um ``DisciplinaProfile`` (guardado em ``perfil_notas``/
+    ``perfil_faltas``), reaproveitado por ``gerar_todos_graficos``.
+    """
+    df_notas, df_faltas = _dataframes_da_turma(df_notas, df_faltas)
     limiar, max_pts, bim_num = _limiar_aprovacao(metadados)
-    estatisticas['limiar_aprovacao'] = limiar
-    estatisticas['max_pontos_bimestre'] = max_pts
-    estatisticas['bimestre_num'] = bim_num
-    estatisticas['metadados'] = metadados or {}
-
-    # Classifica as disciplinas presentes em três grupos:
-    # - sem_dados: nenhuma nota lançada OU todas as notas iguais a zero;
-    # - incompletas: têm notas, mas a nota máxima observada é baixa demais
-    #   (≤ metade da pontuação do bimestre), sugerindo lançamento incompleto;
-    # - com_notas: as demais (entram nas estatísticas e gráficos).
-    disciplinas_presentes = [c for c in disciplinas_dict if c in df_notas.columns]
-    disciplinas_com_notas = []
-    disciplinas_sem_dados = []
-    incompletas = []
-    for c in disciplinas_presentes:
-        serie_col = pd.to_numeric(df_notas[c], errors='coerce').dropna()
-        if serie_col.empty or serie_col.max() == 0:
-            disciplinas_sem_dados.append(c)
-            continue
-        disciplinas_com_notas.append(c)
-        if serie_col.max() <= max_pts / 2:
-            incompletas.append((c, get_simplified_name(c, disciplinas_dict),
-                                float(serie_col.max())))
-
-    estatisticas['disciplinas_sem_dados'] = [
-        (c, get_simplified_name(c, disciplinas_dict)) for c in disciplinas_sem_dados]
-    estatisticas['disciplinas_incompletas'] = incompletas
-    codigos_incompletas = {c for c, _, _ in incompletas}
-
-    df_apenas_notas = df_notas[disciplinas_com_notas]
-
-    media_por_aluno = df_apenas_notas.mean(axis=1)
-    estatisticas['total_alunos'] = len(df_notas)
-    estatisticas['media_geral_turma'] = media_por_aluno.mean()
-    estatisticas['desvio_padrao_medias'] = media_por_aluno.std()
-
-    taxa_aprovacao = (df_apenas_notas >= limiar).all(axis=1).mean() * 100
-    estatisticas['taxa_aprovacao_geral'] = f"{taxa_aprovacao:.2f}%"
-
-    media_por_disciplina = df_apenas_notas.mean().sort_values()
+
+    # Classificação das disciplinas (sem_dados / com_notas / incompletas):
+    # ver ``perfil.py``.
+    perfil = DisciplinaProfile.de_notas(df_notas, disciplinas_dict, max_pts)
+    disciplinas_com_notas = perfil.com_notas
+    incompletas = [(c, get_simplified_name(c, disciplinas_dict),
+                    float(perfil.maximo[perfil.posicao(c)]))
+                   for c in perfil.incompletas]
+    codigos_incompletas = set(perfil.incompletas)
+
+    # Tudo abaixo opera sobre a matriz (alunos × disciplinas com notas) de
+    # uma vez; os indicadores por disciplina já vêm prontos do perfil.
+    notas = perfil.submatriz(disciplinas_com_notas)
+
+    media_por_aluno = pd.Series(perfil.media_por_aluno())
+
+    # NaN nunca é >= limiar: aluno sem nota em alguma disciplina não aprova.
+    taxa_aprovacao = (notas >= limiar).all(axis=1).mean() * 100 if len(notas) else np.nan
+
+    media_por_disciplina = pd.Series(perfil.indicador('media', disciplinas_com_notas),
+                                     index=disciplinas_com_notas).sort_values()
     if not media_por_disciplina.empty:
         disciplina_menor_code = media_por_disciplina.index[0]
-        estatisticas['disciplina_menor_media_code'] = disciplina_menor_code
-        estatisticas['disciplina_menor_media_nome'] = get_simplified_name(
-            disciplina_menor_code, disciplinas_dict)
-        estatisticas['menor_media'] = media_por_disciplina.iloc[0]
-        estatisticas['desvio_padrao_disciplina_critica'] = df_apenas_notas[disciplina_menor_code].std()
-        estatisticas['alunos_abaixo_limiar_disciplina_critica'] = int(
-            (df_apenas_notas[disciplina_menor_code] < limiar).sum())
-
         disciplina_maior_code = media_por_disciplina.index[-1]
-        estatisticas['disciplina_maior_media_nome'] = get_simplified_name(
-            disciplina_maior_code, disciplinas_dict)
-        estatisticas['maior_media'] = media_por_disciplina.iloc[-1]
+        critica = dict(
+            disciplina_menor_media_code=disciplina_menor_code,
+            disciplina_menor_media_nome=get_simplified_name(disciplina_menor_code, disciplinas_dict),
+            menor_media=float(media_por_disciplina.iloc[0]),
+            desvio_padrao_disciplina_critica=float(
+                perfil.desvio[perfil.posicao(disciplina_menor_code)]),
+            alunos_abaixo_limiar_disciplina_critica=int(
+                (perfil.coluna(disciplina_menor_code) < limiar).sum()),
+            disciplina_maior_media_nome=get_simplified_name(disciplina_maior_code, disciplinas_dict),
+            maior_media=float(media_por_disciplina.iloc[-1]),
+        )
     else:
-        for key in ['disciplina_menor_media_nome', 'disciplina_maior_media_nome', 'disciplina_menor_media_code']:
-            estatisticas[key] = "N/A"
-        for key in ['menor_media', 'maior_media', 'desvio_padrao_disciplina_critica', 'alunos_abaixo_limiar_disciplina_critica']:
-            estatisticas[key] = 0
-
-    df_notas['disciplinas_abaixo_limiar'] = (df_apenas_notas < limiar).sum(axis=1)
-    top_10 = df_notas.sort_values(by='disciplinas_abaixo_limiar', ascending=False).head(10)
-    estatisticas['top_10_alunos_criticos'] = top_10[['nome', 'disciplinas_abaixo_limiar']]
-
-    summary_list = []
-    for col in disciplinas_com_notas:
-        stats = df_apenas_notas[col].describe()
-        nome_disc = get_simplified_name(col, disciplinas_dict)
-        if col in codigos_incompletas:
-            nome_disc += ' *'
-        summary_list.append({
-            'Disciplina': nome_disc,
-            'Média': f"{stats.get('mean', 0):.2f}",
-            'Mediana': f"{stats.get('50%', 0):.2f}",
-            'Desv. Padrão': f"{stats.get('std', 0):.2f}",
-            'Mínimo': f"{stats.get('min', 0):.2f}",
-            'Máximo': f"{stats.get('max', 0):.2f}",
-        })
-    estatisticas['boxplot_summary_df'] = pd.DataFrame(summary_list)
-    estatisticas['disciplinas_com_notas'] = disciplinas_com_notas
+        critica = dict(
+            disciplina_menor_media_code=None, disciplina_menor_media_nome=None,
+            menor_media=0.0, desvio_padrao_disciplina_critica=0.0,
+            alunos_abaixo_limiar_disciplina_critica=0,
+            disciplina_maior_media_nome=None, maior_media=0.0,
+        )
+
+    abaixo_limiar = (notas < limiar).sum(axis=1)
+    top_10 = df_notas[['nome']].assign(disciplinas_abaixo_limiar=abaixo_limiar).sort_values(
+        by='disciplinas_abaixo_limiar', ascending=False).head(10)
+
+    resumo = [
+        ResumoNotasDisciplina(c, get_simplified_name(c, disciplinas_dict), c in codigos_incompletas,
+                              *map(float, valores))
+        for c, *valores in zip(
+            disciplinas_com_notas,
+            perfil.indicador('media', disciplinas_com_notas),
+            perfil.quantil(0.50, disciplinas_com_notas),
+            perfil.indicador('desvio', disciplinas_com_notas),
+            perfil.indicador('minimo', disciplinas_com_notas),
+            perfil.indicador('maximo', disciplinas_com_notas),
+        )
+    ]
+
+    estatisticas = EstatisticasTurma(
+        limiar_aprovacao=limiar,
+        max_pontos_bimestre=max_pts,
+        bimestre_num=bim_num,
+        metadados=metadados or {},
+        total_alunos=len(df_notas),
+        media_geral_turma=float(media_por_aluno.mean()),
+        desvio_padrao_medias=float(media_por_aluno.std()),
+        taxa_aprovacao=float(taxa_aprovacao),
+        disciplinas_com_notas=disciplinas_com_notas,
+        disciplinas_sem_dados=[(c, get_simplified_name(c, disciplinas_dict))
+                               for c in perfil.sem_dados],
+        disciplinas_incompletas=incompletas,
+        top_10_alunos_criticos=list(zip(top_10['nome'].tolist(),
+                                        top_10['disciplinas_abaixo_limiar'].tolist())),
+        resumo_disciplinas=resumo,
+        perfil_notas=perfil,
+        **critica,
+    )
 
     # ----- Faltas (sinal estatístico) -----
     if df_faltas is not None and not df_faltas.empty:
-        estatisticas.update(_calcular_estatisticas_faltas(df_faltas, disciplinas_dict))
+        _calcular_estatisticas_faltas(estatisticas, df_faltas, disciplinas_dict)
 
     return estatisticas
 
 
-def _calcular_estatisticas_faltas(df_faltas, disciplinas_dict):
-    """Resumo estatístico das faltas: por disciplina (média, mediana, P90, σ,
-    quantidade de alunos acima de P90 e acima de média+2σ) + top-10 alunos
-    com mais faltas totais.
+def _calcular_estatisticas_faltas(estatisticas, df_faltas, disciplinas_dict):
+    """Preenche em ``estatisticas`` o resumo das faltas: por disciplina
+    (média, mediana, P90, σ, quantidade de alunos acima de P90 e acima de
+    média+2σ) + top-10 alunos com mais faltas totais.
     """
-    cols = [c for c in disciplinas_dict if c in df_faltas.columns]
-    cols = [c for c in cols if df_faltas[c].notna().any()]
+    perfil = DisciplinaProfile.de_faltas(df_faltas, disciplinas_dict)
+    cols = perfil.com_dados
     if not cols:
-        return {
-            'faltas_disponiveis': False,
-            'faltas_summary_df': pd.DataFrame(),
-            'top_10_faltosos': pd.DataFrame(),
-        }
-
-    df_f = df_faltas[cols].apply(pd.to_numeric, errors='coerce')
-    summary = []
-    for col in cols:
-        s = df_f[col].dropna()
-        if s.empty:
-            continue
-        media = s.mean()
-        mediana = s.median()
-        p90 = s.quantile(0.90)
-        std = s.std()
-        cutoff_sigma = media + 2 * std
-        n_acima_p90 = int((s > p90).sum())
-        n_acima_sigma = int((s > cutoff_sigma).sum())
-        summary.append({
-            'Disciplina': get_simplified_name(col, disciplinas_dict),
-            'Média': f"{media:.1f}",
-            'Mediana': f"{mediana:.1f}",
-            'P90': f"{p90:.1f}",
-            'Desv. Padrão': f"{std:.1f}",
-            'Alunos > P90': n_acima_p90,
-            'Alunos > μ+2σ': n_acima_sigma,
-        })
-    summary_df = pd.DataFrame(summary)
-
-    df_faltas_aluno = df_faltas[['nome'] + cols].copy()
-    df_faltas_aluno['Total Faltas'] = df_f.sum(axis=1)
-    top10 = df_faltas_aluno[['nome', 'Total Faltas']].sort_values(
-        by='Total Faltas', ascending=False).head(10)
-    top10['Total Faltas'] = top10['Total Faltas'].astype(int)
+        return
+
+    # Indicadores do perfil; as contagens acima dos limites saem de uma
+    # comparação da matriz inteira com os vetores de limites (broadcasting).
+    faltas = perfil.submatriz(cols)
+    media = perfil.indicador('media', cols)
+    std = perfil.indicador('desvio', cols)
+    p90 = perfil.quantil(0.90, cols)
+    cutoff_sigma = media + 2 * std
+    estatisticas.faltas_disciplinas = [
+        ResumoFaltasDisciplina(c, get_simplified_name(c, disciplinas_dict),
+                               float(m), float(med), float(p), float(d), int(n_p90), int(n_sigma))
+        for c, m, med, p, d, n_p90, n_sigma in zip(
+            cols, media, perfil.quantil(0.50, cols), p90, std,
+            (faltas > p90).sum(axis=0), (faltas > cutoff_sigma).sum(axis=0))
+    ]
 
-    return {
-        'faltas_disponiveis': True,
-        'faltas_summary_df': summary_df,
-        'top_10_faltosos': top10,
-        '_faltas_cols': cols,
-    }
+    # Soma ignorando NaN (aluno sem faltas lançadas soma 0), como ``DataFrame.sum``.
+    top10 = df_faltas[['nome']].assign(**{'Total Faltas': np.nansum(faltas, axis=1)}).sort_values(
+        by='Total Faltas', ascending=False).head(10)
+    estatisticas.top_10_faltosos = list(zip(top10['nome'].tolist(),
+                                            top10['Total Faltas'].astype(int).tolist()))
+    estatisticas.faltas_disponiveis = True
+    estatisticas.faltas_cols = cols
+    estatisticas.perfil_faltas = perfil
 
 
 # --------------------------------
@@ -231,29 +252,29 @@ def gerar_comentario_ia(estatisticas, nome_curso, api_key, modelo="gpt-4o-mini")
         return ("A análise por IA não foi gerada (chave da OpenAI não configurada). "
                 "Configure-a para habilitar este comentário.")
 
-    summary_markdown = estatisticas['boxplot_summary_df'].to_markdown(index=False)
-    limiar = estatisticas.get('limiar_aprovacao', 12.0)
-    max_pts = estatisticas.get('max_pontos_bimestre', 20)
-    bim = estatisticas.get('bimestre_num')
+    summary_markdown = tabela_resumo_notas(estatisticas).to_markdown(index=False)
+    limiar = estatisticas.limiar_aprovacao
+    max_pts = estatisticas.max_pontos_bimestre
+    bim = estatisticas.bimestre_num
     prompt = f"""
     Você é um especialista em análise de dados educacionais. Com base nos dados a seguir, gere uma análise em português. Não faça em formato MarkDown, ou seja, não use * ou #.
 
     **Contexto:**
     - **Curso:** {nome_curso}
     - **Bimestre:** {bim if bim else 'n/d'} (pontuação máxima {max_pts}, aprovação parcial ≥ {limiar:.1f})
-    - **Total de Alunos:** {estatisticas['total_alunos']}
+    - **Total de Alunos:** {estatisticas.total_alunos}
 
     **Análise Geral da Turma:**
-    - **Média Geral (0-{max_pts}):** {estatisticas['media_geral_turma']:.2f}
-    - **Dispersão das Médias (Desvio Padrão):** {estatisticas['desvio_padrao_medias']:.2f}
-    - **Taxa de Aprovação Geral (Nota >= {limiar:.1f} em tudo):** {estatisticas['taxa_aprovacao_geral']}
+    - **Média Geral (0-{max_pts}):** {estatisticas.media_geral_turma:.2f}
+    - **Dispersão das Médias (Desvio Padrão):** {estatisticas.desvio_padrao_medias:.2f}
+    - **Taxa de Aprovação Geral (Nota >= {limiar:.1f} em tudo):** {_texto_taxa(estatisticas)}
 
     **Resumo Estatístico por Disciplina:**
     {summary_markdown}
 
     **Instruções:**
     1. Primeiro Parágrafo: desempenho geral da turma (média satisfatória? turma homogênea ou heterogênea? taxa de aprovação preocupante?).
-    2. Segundo Parágrafo: analise a disciplina com menor média ({estatisticas['disciplina_menor_media_nome']}) e o número de alunos com nota baixa ({estatisticas.get('alunos_abaixo_limiar_disciplina_critica', 0)}).
+    2. Segundo Parágrafo: analise a disciplina com menor média ({_texto_nome(estatisticas.disciplina_menor_media_nome)}) e o número de alunos com nota baixa ({estatisticas.alunos_abaixo_limiar_disciplina_critica}).
     3. Terceiro Parágrafo: com base na tabela, aponte disciplinas com desempenho ruim, compare indicadores e sugira melhorias.
 
     O tom deve ser profissional e objetivo.
@@ -285,211 +306,715 @@ def gerar_comentario_ia(estatisticas, nome_curso, api_key, modelo="gpt-4o-mini")
 # --------------------------------
 # Gráficos (retornam figuras matplotlib)
 # --------------------------------
-def _colunas_com_notas(df_notas, disciplinas_dict):
-    """Disciplinas com notas reais (descarta as sem dados ou totalmente zeradas),
-    mantendo a coerência com as tabelas do relatório."""
-    cols = []
-    for c in disciplinas_dict:
-        if c in df_notas.columns:
-            s = pd.to_numeric(df_notas[c], errors='coerce')
-            if s.notna().any() and s.max() > 0:
-                cols.append(c)
-    return cols
-
-
-def grafico_distribuicao_notas(df_notas, nome_curso, disciplinas_dict, max_pts=20):
-    presentes = _colunas_com_notas(df_notas, disciplinas_dict)
-    if not presentes:
-        return None
-    media_aluno = df_notas[presentes].mean(axis=1)
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(media_aluno, kde=True, bins=15, ax=ax)
-    ax.set_title(f'Distribuição das Médias Finais - {nome_curso}', fontsize=16)
-    ax.set_xlabel(f'Média Final do Aluno (0 a {max_pts})', fontsize=12)
-    ax.set_ylabel('Número de Alunos', fontsize=12)
+# Todos aceitam ``perfil`` (o ``DisciplinaProfile`` de ``calcular_estatisticas``);
+# sem ele, o perfil é calculado a partir do DataFrame. Só as disciplinas com
+# notas reais (``perfil.com_notas``) entram, em coerência com as tabelas.
+def _perfil_de(df, disciplinas_dict, perfil, faltas=False):
+    if perfil is not None:
+        return perfil
+    if faltas:
+        return DisciplinaProfile.de_faltas(df, disciplinas_dict)
+    return DisciplinaProfile.de_notas(df, disciplinas_dict)
+
+
+def _grupos_boxplot(perfil, codigos, disciplinas_dict):
+    """Valores lançados (sem NaN) e nome de cada disciplina, para os
+    boxplots; disciplinas sem nenhum valor ficam de fora."""
+    grupos, nomes = [], []
+    for c in codigos:
+        valores = perfil.valores(c)
+        if len(valores):
+            grupos.append(valores)
+            nomes.append(get_simplified_name(c, disciplinas_dict))
+    return grupos, nomes
+
+
+# Cada gráfico é descrito por uma *especificação*: um dict só com dados
+# (arrays NumPy, listas, textos) e o ``tipo`` do desenho. Montar a
+# especificação é barato e fica no processo do relatório. O desenho
+# (seaborn/matplotlib + PNG) é a parte cara e pode ir para o pool de
+# processos (``gerar_todos_graficos(..., paralelo=True)``).
+#
+# Há três backends de desenho para as mesmas especificações: ``'seaborn'``
+# (padrão, abaixo), ``'matplotlib'`` (``graficos_mpl.py``: primitivas do
+# matplotlib direto dos arrays, KDE por FFT e sem importar o seaborn) e
+# ``'reportlab'`` (``graficos_rl.py``: ``Drawing`` vetorial que entra no PDF
+# sem rasterização). Os dois primeiros geram figuras matplotlib/PNG.
+BACKENDS_GRAFICOS = ('seaborn', 'matplotlib', 'reportlab')
+
+
+def _spec_histograma(valores, bins, titulo, xlabel, color=None, xlim=None):
+    return {'tipo': 'histograma', 'valores': valores, 'bins': bins, 'color': color,
+            'titulo': titulo, 'xlabel': xlabel, 'xlim': xlim}
+
+
+def _desenhar_histograma(spec):
+    import seaborn as sns
+    fig, ax = figura_histograma(spec)
+    sns.histplot(spec['valores'], kde=True, bins=spec['bins'], color=spec['color'], ax=ax)
+    if spec['xlim'] is not None:
+        ax.set_xlim(*spec['xlim'])
     ax.grid(True, linestyle='--', alpha=0.6)
-    fig.tight_layout()
     return fig
 
 
-def grafico_media_por_disciplina(df_notas, nome_curso, disciplinas_dict, max_pts=20):
-    presentes = _colunas_com_notas(df_notas, disciplinas_dict)
-    if not presentes:
-        return None
-    media = df_notas[presentes].mean().sort_values(ascending=False)
-    labels = [get_simplified_name(c, disciplinas_dict) for c in media.index]
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x=media.values, y=labels, ax=ax)
-    ax.set_title(f'Média por Disciplina - {nome_curso}', fontsize=16)
-    ax.set_xlabel(f'Média da Turma (0 a {max_pts})', fontsize=12)
-    ax.set_ylabel('Disciplina', fontsize=12)
-    ax.set_xlim(0, max_pts)
-    fig.tight_layout()
+def _desenhar_barras(spec):
+    import seaborn as sns
+    fig, ax = figura_categorias(spec)
+    sns.barplot(x=spec['valores'], y=spec['rotulos'], ax=ax)
+    ax.set_xlim(*spec['xlim'])
     return fig
 
 
-def grafico_boxplot_disciplinas(df_notas, nome_curso, disciplinas_dict, max_pts=20):
-    presentes = _colunas_com_notas(df_notas, disciplinas_dict)
-    if not presentes:
-        return None
-    df_melted = df_notas.melt(value_vars=presentes, var_name='disciplina_code', value_name='nota')
-    df_melted['disciplina_nome'] = df_melted['disciplina_code'].apply(
-        lambda c: get_simplified_name(c, disciplinas_dict))
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.boxplot(x='nota', y='disciplina_nome', data=df_melted, orient='h', ax=ax)
-    ax.set_title(f'Dispersão de Notas por Disciplina - {nome_curso}', fontsize=16)
-    ax.set_xlabel(f'Nota (0 a {max_pts})', fontsize=12)
-    ax.set_ylabel('Disciplina', fontsize=12)
-    ax.set_xlim(0, max_pts)
+def _desenhar_boxplot(spec):
+    import seaborn as sns
+    # O seaborn espera o formato longo (um rótulo por valor).
+    valores = np.concatenate(spec['grupos'])
+    rotulos = np.repeat(np.array(spec['rotulos'], dtype=object),
+                        [len(g) for g in spec['grupos']])
+    fig, ax = figura_categorias(spec)
+    sns.boxplot(x=valores, y=rotulos, orient='h', ax=ax, color=spec['color'])
+    if spec['xlim'] is not None:
+        ax.set_xlim(*spec['xlim'])
     ax.grid(True, linestyle='--', alpha=0.6, axis='x')
-    fig.tight_layout()
     return fig
 
 
-def grafico_disciplina_critica(df_notas, disciplina_code, disciplina_nome, nome_curso, max_pts=20):
-    if disciplina_code == "N/A" or disciplina_code not in df_notas.columns:
+_DESENHOS = {
+    'histograma': _desenhar_histograma,
+    'barras': _desenhar_barras,
+    'boxplot': _desenhar_boxplot,
+}
+
+
+def desenhar_grafico(spec, backend='seaborn'):
+    """Figura matplotlib (ou ``Drawing``, no backend ``'reportlab'``) de uma
+    especificação (``None`` → ``None``)."""
+    if spec is None:
         return None
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(df_notas[disciplina_code].dropna(), kde=True, bins=10, color='indianred', ax=ax)
-    ax.set_title(f'Dispersão de Notas: {disciplina_nome} ({nome_curso})', fontsize=16)
-    ax.set_xlabel(f'Nota na Disciplina (0 a {max_pts})', fontsize=12)
-    ax.set_ylabel('Número de Alunos', fontsize=12)
-    ax.set_xlim(0, max_pts)
-    ax.grid(True, linestyle='--', alpha=0.6)
-    fig.tight_layout()
-    return fig
+    if backend == 'matplotlib':
+        from .graficos_mpl import DESENHOS
+        return DESENHOS[spec['tipo']](spec)
+    if backend == 'reportlab':
+        from .graficos_rl import DESENHOS
+        return DESENHOS[spec['tipo']](spec)
+    if backend != 'seaborn':
+        raise ValueError(f"Backend de gráficos desconhecido: {backend!r} "
+                         f"(use um de {BACKENDS_GRAFICOS})")
+    return _DESENHOS[spec['tipo']](spec)
+
+
+def _spec_distribuicao_notas(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    perfil = _perfil_de(df_notas, disciplinas_dict, perfil)
+    if not perfil.com_notas:
+        return None
+    return _spec_histograma(perfil.media_por_aluno(), 15,
+                            f'Distribuição das Médias Finais - {nome_curso}',
+                            f'Média Final do Aluno (0 a {max_pts})')
 
 
-def grafico_faltas_total_por_aluno(df_faltas, nome_curso, cols_disciplinas):
-    cols = [c for c in cols_disciplinas if c in df_faltas.columns]
-    if not cols:
+def _spec_media_por_disciplina(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    perfil = _perfil_de(df_notas, disciplinas_dict, perfil)
+    presentes = perfil.com_notas
+    if not presentes:
         return None
-    totais = df_faltas[cols].apply(pd.to_numeric, errors='coerce').sum(axis=1).dropna()
-    if totais.empty:
+    media = pd.Series(perfil.indicador('media', presentes), index=presentes).sort_values(
+        ascending=False)
+    return {'tipo': 'barras', 'valores': media.values,
+            'rotulos': [get_simplified_name(c, disciplinas_dict) for c in media.index],
+            'titulo': f'Média por Disciplina - {nome_curso}',
+            'xlabel': f'Média da Turma (0 a {max_pts})', 'xlim': (0, max_pts)}
+
+
+def _spec_boxplot_disciplinas(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    perfil = _perfil_de(df_notas, disciplinas_dict, perfil)
+    if not perfil.com_notas:
         return None
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(totais, kde=True, bins=15, ax=ax, color='steelblue')
-    ax.set_title(f'Distribuição de Faltas Totais por Aluno - {nome_curso}', fontsize=16)
-    ax.set_xlabel('Total de Faltas no Bimestre', fontsize=12)
-    ax.set_ylabel('Número de Alunos', fontsize=12)
-    ax.grid(True, linestyle='--', alpha=0.6)
-    fig.tight_layout()
-    return fig
+    grupos, nomes = _grupos_boxplot(perfil, perfil.com_notas, disciplinas_dict)
+    return {'tipo': 'boxplot', 'grupos': grupos, 'rotulos': nomes, 'color': None,
+            'titulo': f'Dispersão de Notas por Disciplina - {nome_curso}',
+            'xlabel': f'Nota (0 a {max_pts})', 'xlim': (0, max_pts)}
+
+
+def _spec_disciplina_critica(df_notas, disciplina_code, disciplina_nome, nome_curso, max_pts=20,
+                             perfil=None):
+    if disciplina_code is None:
+        return None
+    if perfil is None:
+        if disciplina_code not in df_notas.columns:
+            return None
+        perfil = DisciplinaProfile.de_notas(df_notas, {disciplina_code: disciplina_nome})
+    if disciplina_code not in perfil.codigos:
+        return None
+    return _spec_histograma(perfil.valores(disciplina_code), 10,
+                            f'Dispersão de Notas: {disciplina_nome} ({nome_curso})',
+                            f'Nota na Disciplina (0 a {max_pts})',
+                            color='indianred', xlim=(0, max_pts))
 
 
-def grafico_faltas_boxplot_disciplina(df_faltas, nome_curso, disciplinas_dict, cols_disciplinas):
-    cols = [c for c in cols_disciplinas if c in df_faltas.columns]
+def _spec_faltas_total_por_aluno(df_faltas, nome_curso, cols_disciplinas, perfil=None):
+    perfil = _perfil_de(df_faltas, dict.fromkeys(cols_disciplinas), perfil, faltas=True)
+    cols = [c for c in cols_disciplinas if c in perfil.codigos]
     if not cols:
         return None
-    df_melted = df_faltas.melt(value_vars=cols, var_name='disciplina_code', value_name='faltas')
-    df_melted['faltas'] = pd.to_numeric(df_melted['faltas'], errors='coerce')
-    df_melted = df_melted.dropna(subset=['faltas'])
-    if df_melted.empty:
+    # Soma ignorando NaN (aluno sem faltas lançadas soma 0), como ``DataFrame.sum``.
+    totais = np.nansum(perfil.submatriz(cols), axis=1)
+    return _spec_histograma(totais, 15,
+                            f'Distribuição de Faltas Totais por Aluno - {nome_curso}',
+                            'Total de Faltas no Bimestre', color='steelblue')
+
+
+def _spec_faltas_boxplot_disciplina(df_faltas, nome_curso, disciplinas_dict, cols_disciplinas,
+                                    perfil=None):
+    perfil = _perfil_de(df_faltas, disciplinas_dict, perfil, faltas=True)
+    cols = [c for c in cols_disciplinas if c in perfil.codigos]
+    if not cols:
         return None
-    df_melted['disciplina_nome'] = df_melted['disciplina_code'].apply(
-        lambda c: get_simplified_name(c, disciplinas_dict))
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.boxplot(x='faltas', y='disciplina_nome', data=df_melted, orient='h', ax=ax, color='lightcoral')
-    ax.set_title(f'Dispersão de Faltas por Disciplina - {nome_curso}', fontsize=16)
-    ax.set_xlabel('Faltas no Bimestre', fontsize=12)
-    ax.set_ylabel('Disciplina', fontsize=12)
-    ax.grid(True, linestyle='--', alpha=0.6, axis='x')
-    fig.tight_layout()
-    return fig
+    grupos, nomes = _grupos_boxplot(perfil, cols, disciplinas_dict)
+    if not grupos:
+        return None
+    return {'tipo': 'boxplot', 'grupos': grupos, 'rotulos': nomes, 'color': 'lightcoral',
+            'titulo': f'Dispersão de Faltas por Disciplina - {nome_curso}',
+            'xlabel': 'Faltas no Bimestre', 'xlim': None}
 
 
-def gerar_todos_graficos(df_notas, nome_curso, disciplinas_dict, estatisticas, df_faltas=None):
-    """Gera todas as figuras e devolve um dicionário {chave: Figure|None}."""
-    max_pts = estatisticas.get('max_pontos_bimestre', 20)
-    figuras = {
-        'distribuicao_geral': grafico_distribuicao_notas(df_notas, nome_curso, disciplinas_dict, max_pts),
-        'media_disciplina': grafico_media_por_disciplina(df_notas, nome_curso, disciplinas_dict, max_pts),
-        'boxplot_disciplinas': grafico_boxplot_disciplinas(df_notas, nome_curso, disciplinas_dict, max_pts),
-        'disciplina_critica': grafico_disciplina_critica(
+def grafico_distribuicao_notas(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    return desenhar_grafico(_spec_distribuicao_notas(
+        df_notas, nome_curso, disciplinas_dict, max_pts, perfil))
+
+
+def grafico_media_por_disciplina(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    return desenhar_grafico(_spec_media_por_disciplina(
+        df_notas, nome_curso, disciplinas_dict, max_pts, perfil))
+
+
+def grafico_boxplot_disciplinas(df_notas, nome_curso, disciplinas_dict, max_pts=20, perfil=None):
+    return desenhar_grafico(_spec_boxplot_disciplinas(
+        df_notas, nome_curso, disciplinas_dict, max_pts, perfil))
+
+
+def grafico_disciplina_critica(df_notas, disciplina_code, disciplina_nome, nome_curso, max_pts=20,
+                               perfil=None):
+    return desenhar_grafico(_spec_disciplina_critica(
+        df_notas, disciplina_code, disciplina_nome, nome_curso, max_pts, perfil))
+
+
+def grafico_faltas_total_por_aluno(df_faltas, nome_curso, cols_disciplinas, perfil=None):
+    return desenhar_grafico(_spec_faltas_total_por_aluno(
+        df_faltas, nome_curso, cols_disciplinas, perfil))
+
+
+def grafico_faltas_boxplot_disciplina(df_faltas, nome_curso, disciplinas_dict, cols_disciplinas,
+                                      perfil=None):
+    return desenhar_grafico(_spec_faltas_boxplot_disciplina(
+        df_faltas, nome_curso, disciplinas_dict, cols_disciplinas, perfil))
+
+
+def especificacoes_graficos(df_notas, nome_curso, disciplinas_dict, estatisticas, df_faltas=None):
+    """Especificações de todos os gráficos do relatório: {chave: spec|None}.
+
+    Como em ``calcular_estatisticas``, ``df_notas`` pode ser um ``TurmaFrame``.
+    Os perfis já calculados em ``estatisticas`` são reaproveitados.
+    """
+    df_notas, df_faltas = _dataframes_da_turma(df_notas, df_faltas)
+    max_pts = estatisticas.max_pontos_bimestre
+    perfil = _perfil_de(df_notas, disciplinas_dict, estatisticas.perfil_notas)
+    specs = {
+        'distribuicao_geral': _spec_distribuicao_notas(
+            df_notas, nome_curso, disciplinas_dict, max_pts, perfil=perfil),
+        'media_disciplina': _spec_media_por_disciplina(
+            df_notas, nome_curso, disciplinas_dict, max_pts, perfil=perfil),
+        'boxplot_disciplinas': _spec_boxplot_disciplinas(
+            df_notas, nome_curso, disciplinas_dict, max_pts, perfil=perfil),
+        'disciplina_critica': _spec_disciplina_critica(
             df_notas,
-            estatisticas.get('disciplina_menor_media_code', 'N/A'),
-            estatisticas.get('disciplina_menor_media_nome', 'N/A'),
+            estatisticas.disciplina_menor_media_code,
+            estatisticas.disciplina_menor_media_nome,
             nome_curso,
             max_pts,
+            perfil=perfil,
         ),
     }
-    if df_faltas is not None and estatisticas.get('faltas_disponiveis'):
-        cols = estatisticas.get('_faltas_cols', [])
-        figuras['faltas_total_aluno'] = grafico_faltas_total_por_aluno(df_faltas, nome_curso, cols)
-        figuras['faltas_boxplot_disciplina'] = grafico_faltas_boxplot_disciplina(
-            df_faltas, nome_curso, disciplinas_dict, cols)
-    return figuras
+    if df_faltas is not None and estatisticas.faltas_disponiveis:
+        cols = estatisticas.faltas_cols
+        perfil_faltas = estatisticas.perfil_faltas
+        specs['faltas_total_aluno'] = _spec_faltas_total_por_aluno(
+            df_faltas, nome_curso, cols, perfil=perfil_faltas)
+        specs['faltas_boxplot_disciplina'] = _spec_faltas_boxplot_disciplina(
+            df_faltas, nome_curso, disciplinas_dict, cols, perfil=perfil_faltas)
+    return specs
+
+
+def gerar_todos_graficos(df_notas, nome_curso, disciplinas_dict, estatisticas, df_faltas=None,
+                         paralelo=False, backend='seaborn', png_paleta=False):
+    """Gera todas as figuras e devolve um dicionário {chave: Figure|None}.
+
+    ``backend``: um de ``BACKENDS_GRAFICOS`` (``'matplotlib'`` dispensa o
+    seaborn, com visual equivalente; ``'reportlab'`` devolve ``Drawing``
+    vetoriais, que deixam o PDF menor e não passam por PNG).
+
+    Com ``paralelo=True`` cada gráfico é desenhado e convertido em PNG no pool
+    de processos (``preaquecer_graficos``) e o dicionário traz os PNG (bytes)
+    no lugar das figuras — ``criar_relatorio_pdf`` aceita os dois. O tempo
+    passa a ser o do gráfico mais lento, não a soma de todos (``png_paleta``:
+    PNG com paleta, como em ``criar_relatorio_pdf``). Os ``Drawing`` do
+    backend ``'reportlab'`` são baratos e sempre montados aqui mesmo.
+    """
+    specs = especificacoes_graficos(df_notas, nome_curso, disciplinas_dict, estatisticas,
+                                    df_faltas=df_faltas)
+    if paralelo and backend != 'reportlab':
+        return _renderizar_em_paralelo(specs, backend, png_paleta)
+    return {chave: desenhar_grafico(spec, backend) for chave, spec in specs.items()}
+
+
+# --------------------------------
+# Pool de processos para os gráficos
+# --------------------------------
+_pool_graficos = None
+_pool_trava = threading.Lock()
+_processos_graficos = None  # o pedido em ``preaquecer_graficos`` (vale ao recriar o pool)
+
+
+def _iniciar_processo_grafico(backend):
+    """Inicializador dos processos do pool: backend Agg e um desenho de
+    aquecimento (carrega as fontes e o backend de desenho antes do primeiro
+    relatório)."""
+    matplotlib.use('Agg')
+    _png_de_spec(_spec_histograma(np.arange(3.0), 3, '', ''), backend)
+
+
+def _png_de_spec(spec, backend='seaborn', paleta=False):
+    """Desenha a especificação e devolve o PNG (bytes); roda no processo filho."""
+    fig = desenhar_grafico(spec, backend)
+    if fig is None:
+        return None
+    try:
+        return png_da_figura(fig, paleta)
+    finally:
+        plt.close(fig)
+
+
+def _aquecer():
+    return os.getpid()
+
+
+def preaquecer_graficos(processos=None, backend='seaborn'):
+    """Cria (uma vez) o pool de processos dos gráficos e já sobe os processos,
+    para que o primeiro relatório não pague a importação do matplotlib/seaborn
+    (``backend``: o que será aquecido). Devolve o pool.
+
+    ``processos`` fica guardado: se o pool quebrar e for recriado sem o
+    número de processos, vale o último pedido."""
+    global _pool_graficos, _processos_graficos
+    with _pool_trava:
+        if processos:
+            _processos_graficos = processos
+        if _pool_graficos is None:
+            # Um relatório tem no máximo seis gráficos.
+            processos = _processos_graficos or min(6, os.cpu_count() or 1)
+            _pool_graficos = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_processo_grafico,
+                initargs=(backend,),
+            )
+            for _ in range(processos):
+                _pool_graficos.submit(_aquecer)
+        return _pool_graficos
+
+
+@atexit.register
+def encerrar_graficos():
+    """Encerra o pool de processos dos gráficos (se criado)."""
+    global _pool_graficos
+    with _pool_trava:
+        if _pool_graficos is not None:
+            _pool_graficos.shutdown(cancel_futures=True)
+            _pool_graficos = None
+
+
+def _renderizar_em_paralelo(specs, backend='seaborn', paleta=False):
+    """{chave: PNG|None} desenhando as especificações no pool. Se o pool
+    quebrar (processo morto, ambiente sem ``spawn``), desenha aqui mesmo."""
+    try:
+        pool = preaquecer_graficos(backend=backend)
+        futuros = {chave: pool.submit(_png_de_spec, spec, backend, paleta)
+                   for chave, spec in specs.items() if spec is not None}
+        pngs = {chave: futuro.result() for chave, futuro in futuros.items()}
+    except (BrokenProcessPool, OSError):
+        encerrar_graficos()
+        pngs = {chave: _png_de_spec(spec, backend, paleta)
+                for chave, spec in specs.items() if spec is not None}
+    return {chave: pngs.get(chave) for chave in specs}
+
+
+def _flowable_grafico(fig, paleta=False, largura=16 * cm, altura=11 * cm):
+    """Flowable do gráfico no PDF: o ``Drawing`` vetorial (reduzido para caber
+    em ``largura`` × ``altura``, se preciso) ou a imagem PNG."""
+    if isinstance(fig, Drawing):
+        escala = min(largura / fig.width, altura / fig.height)
+        if escala < 1:
+            fig.scale(escala, escala)
+            fig.width *= escala
+            fig.height *= escala
+        return fig
+    return Image(_fig_para_imagem(fig, paleta), width=largura, height=altura,
+                 kind='proportional')
+
+
+def _fig_para_imagem(fig, paleta=False):
+    """Converte uma figura matplotlib (ou um PNG já renderizado, em bytes) em
+    BytesIO PNG para uso no reportlab (ver ``figuras.png_da_figura``)."""
+    if isinstance(fig, bytes):
+        return io.BytesIO(fig)
+    return io.BytesIO(png_da_figura(fig, paleta))
 
 
-def _fig_para_imagem(fig):
-    """Converte uma figura matplotlib em BytesIO PNG para uso no reportlab."""
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    return buf
+# --------------------------------
+# Formatação (tabelas e textos do PDF/IA)
+# --------------------------------
+def _texto_taxa(estatisticas):
+    return f"{estatisticas.taxa_aprovacao:.2f}%"
+
+
+def _texto_nome(nome):
+    return nome if nome is not None else "N/A"
+
+
+def tabela_resumo_notas(estatisticas):
+    """Resumo por disciplina formatado para exibição (PDF, IA, Streamlit);
+    ' *' marca as disciplinas possivelmente incompletas."""
+    linhas = estatisticas.resumo_disciplinas
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        'Disciplina': [r.nome + (' *' if r.incompleta else '') for r in linhas],
+        'Média': [f"{r.media:.2f}" for r in linhas],
+        'Mediana': [f"{r.mediana:.2f}" for r in linhas],
+        'Desv. Padrão': [f"{r.desvio:.2f}" for r in linhas],
+        'Mínimo': [f"{r.minimo:.2f}" for r in linhas],
+        'Máximo': [f"{r.maximo:.2f}" for r in linhas],
+    })
+
+
+def tabela_resumo_faltas(estatisticas):
+    """Resumo de faltas por disciplina formatado para exibição."""
+    linhas = estatisticas.faltas_disciplinas
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        'Disciplina': [r.nome for r in linhas],
+        'Média': [f"{r.media:.1f}" for r in linhas],
+        'Mediana': [f"{r.mediana:.1f}" for r in linhas],
+        'P90': [f"{r.p90:.1f}" for r in linhas],
+        'Desv. Padrão': [f"{r.desvio:.1f}" for r in linhas],
+        'Alunos > P90': [r.acima_p90 for r in linhas],
+        'Alunos > μ+2σ': [r.acima_sigma for r in linhas],
+    })
 
 
 # --------------------------------
 # Relatório PDF (em memória) com sumário (TOC)
 # --------------------------------
+# Tamanho até o qual o PDF fica em memória (``criar_relatorio_pdf``). Um
+# relatório típico tem 30 KB (gráficos vetoriais) a 600 KB (PNG).
+PDF_MEMORIA_MAX = 2 * 1024 * 1024
+
+_FORM_CABECALHO = 'cabecalho'
+_FORM_LOGO = 'logo'
+_TEXTOS_CABECALHO = ("Serviço Público Federal", "Ministério da Educação",
+                     "Centro Federal de Educação Tecnológica de Minas Gerais")
+_TEXTO_RODAPE = "Desenvolvido pelo Professor Diego Camargo (diegocamargo@cefetmg.br)."
+
+
+@functools.lru_cache(maxsize=4)
+def _logo_pdf(logo_path):
+    """Logo lido uma vez por processo: (leitor, imagem, máscara alfa ou None).
+    None se o arquivo não puder ser lido.
+
+    ``imagem`` é o ``PDFImageXObject`` já codificado (ainda sem documento):
+    o ``drawImage`` refaria a cada relatório a decodificação do PNG, a
+    compressão dos pixels e da transparência e o ASCII85 (~10 ms). Esse
+    atalho usa detalhes internos do reportlab (``_smask``, ``canvas._doc``);
+    ele é testado aqui num PDF descartável e, se falhar, ``imagem`` fica
+    None e o logo sai pelo ``drawImage`` público com o ``leitor``.
+    """
+    try:
+        leitor = ImageReader(logo_path)
+        leitor.getSize()
+    except Exception:
+        return None
+    try:
+        imagem = PDFImageXObject(_FORM_LOGO, leitor, mask='auto')
+        mascara = imagem.__dict__.pop('_smask', None)
+        teste = Canvas(io.BytesIO())
+        _registrar_logo(teste, imagem, mascara)
+        teste.doForm(_FORM_LOGO)
+        teste.save()
+    except Exception:
+        imagem = mascara = None
+    return leitor, imagem, mascara
+
+
+def _registrar_logo(canvas, imagem, mascara):
+    """Registra uma cópia do XObject do logo no documento do canvas."""
+    doc_pdf = canvas._doc
+    imagem = copy.copy(imagem)  # o registro marca o objeto com o documento
+    if mascara is not None:
+        imagem.smask = doc_pdf.Reference(copy.copy(mascara), 'LogoMascara')
+    doc_pdf.addForm(_FORM_LOGO, imagem)
+
+
+def _desenhar_logo(canvas, logo, x, y, altura):
+    """Desenha o logo (``_logo_pdf``) com a altura dada, registrando o
+    XObject no documento do canvas na primeira vez."""
+    leitor, imagem, mascara = logo
+    largura_img, altura_img = leitor.getSize()
+    largura = altura * largura_img / altura_img
+    if imagem is None:
+        canvas.drawImage(leitor, x, y, largura, altura, mask='auto')
+        return
+    if not canvas.hasForm(_FORM_LOGO):
+        _registrar_logo(canvas, imagem, mascara)
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.scale(largura, altura)
+    canvas.doForm(_FORM_LOGO)
+    canvas.restoreState()
+
+
+def _definir_cabecalho(canvas, largura, altura):
+    """Form XObject com o texto institucional do topo e o rodapé das páginas."""
+    canvas.beginForm(_FORM_CABECALHO)
+    canvas.saveState()
+    canvas.setFont('Times-Bold', 10)
+    canvas.setFillColor(colors.HexColor('#002060'))
+    y = altura - 2 * cm
+    for i, texto in enumerate(_TEXTOS_CABECALHO):
+        canvas.drawCentredString(largura / 2.0, y - i * 0.5 * cm, texto)
+    canvas.setFont('Times-Italic', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawCentredString(largura / 2.0, 1.5 * cm, _TEXTO_RODAPE)
+    canvas.restoreState()
+    canvas.endForm()
+
+
 def _cabecalho_factory(logo_path=None):
+    logo = _logo_pdf(logo_path) if logo_path else None
+
     def adicionar_cabecalho(canvas, doc):
-        canvas.saveState()
         largura, altura = doc.pagesize
-
         # O logo institucional aparece apenas na primeira página (capa).
-        if logo_path and doc.page == 1:
-            try:
-                logo = ImageReader(logo_path)
-                logo_w, logo_h = logo.getSize()
-                aspect = logo_h / float(logo_w)
-                display_h = 2.0 * cm
-                display_w = display_h / aspect
-                canvas.drawImage(logo, 1.5 * cm, altura - 3 * cm,
-                                 width=display_w, height=display_h,
-                                 preserveAspectRatio=True, mask='auto')
-            except Exception:
-                pass
-
-        canvas.setFont('Times-Bold', 10)
-        canvas.setFillColor(colors.HexColor('#002060'))
-        y = altura - 2 * cm
-        canvas.drawCentredString(largura / 2.0, y, "Serviço Público Federal")
-        canvas.drawCentredString(largura / 2.0, y - 0.5 * cm, "Ministério da Educação")
-        canvas.drawCentredString(largura / 2.0, y - 1.0 * cm,
-                                 "Centro Federal de Educação Tecnológica de Minas Gerais")
-
-        canvas.setFont('Times-Italic', 8)
-        canvas.setFillColor(colors.grey)
-        canvas.drawCentredString(
-            largura / 2.0, 1.5 * cm,
-            "Desenvolvido pelo Professor Diego Camargo (diegocamargo@cefetmg.br).")
-        canvas.restoreState()
+        if logo is not None and doc.page == 1:
+            _desenhar_logo(canvas, logo, 1.5 * cm, altura - 3 * cm, 2.0 * cm)
+        # Texto fixo: desenhado uma vez por documento e reusado nas páginas.
+        if not canvas.hasForm(_FORM_CABECALHO):
+            _definir_cabecalho(canvas, largura, altura)
+        canvas.doForm(_FORM_CABECALHO)
     return adicionar_cabecalho
 
 
+class _SumarioReservado(Flowable):
+    """Lugar do sumário no story: ocupa o resto da página e desenha um Form
+    XObject (``doForm``) que só é definido no fim da montagem, quando as
+    páginas de todos os títulos já são conhecidas (ver ``_DocComSumario``)."""
+
+    _FORM = 'sumario'
+
+    def __init__(self, toc):
+        super().__init__()
+        self.toc = toc
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = availWidth, availHeight
+        return availWidth, availHeight
+
+    def draw(self):
+        self.canv.doForm(self._FORM)
+
+    def definir(self, canv, entradas):
+        """Define o Form com o sumário; ``False`` se ele não couber no espaço
+        reservado."""
+        self.toc.addEntries(entradas)
+        self.toc.beforeBuild()  # o TOC desenha as entradas "da última passada"
+        _, altura = self.toc.wrapOn(canv, self.width, self.height)
+        if altura > self.height:
+            return False
+        # A caixa do Form recorta o desenho: folga para o recuo negativo dos
+        # títulos de nível 0 (``firstLineIndent``).
+        canv.beginForm(self._FORM, -self.width, -self.height, 2 * self.width, 2 * self.height)
+        self.toc.drawOn(canv, 0, self.height - altura)
+        canv.endForm()
+        return True
+
+
 class _DocComSumario(BaseDocTemplate):
     """BaseDocTemplate que captura os títulos H1/H2 do story e popula o TOC.
 
     O ReportLab dispara `afterFlowable` após cada flowable; identificamos os
-    Paragraphs estilizados como ``H1Sumario`` ou ``H2Sumario`` e emitimos um
-    ``TOCEntry`` com o nível, texto e número de página correspondente.
+    Paragraphs estilizados como ``H1Sumario`` ou ``H2Sumario`` e guardamos
+    (nível, texto, página) para o sumário — e emitimos o ``TOCEntry``
+    correspondente, usado pelo ``multiBuild``.
+
+    ``montar`` faz uma única passada: o sumário fica reservado na página
+    (``_SumarioReservado``) e é desenhado depois, antes de salvar o canvas. O
+    ``multiBuild`` montaria (e desenharia, com as imagens) o documento inteiro
+    ao menos duas vezes só para numerar o sumário. Ele só é usado se o
+    sumário não couber na página reservada, caso em que a numeração muda.
     """
 
     def afterFlowable(self, flowable):
         if not isinstance(flowable, Paragraph):
             return
-        style_name = flowable.style.name
-        text = flowable.getPlainText()
-        if style_name == 'H1Sumario':
-            self.notify('TOCEntry', (0, text, self.page))
-        elif style_name == 'H2Sumario':
-            self.notify('TOCEntry', (1, text, self.page))
+        nivel = {'H1Sumario': 0, 'H2Sumario': 1}.get(flowable.style.name)
+        if nivel is None:
+            return
+        entrada = (nivel, flowable.getPlainText(), self.page)
+        self.entradas_sumario.append(entrada)
+        self.notify('TOCEntry', entrada)
+
+    def montar(self, story):
+        reservado = next((f for f in story if isinstance(f, _SumarioReservado)), None)
+        self.entradas_sumario = []
+        self._doSave = 0  # como no ``multiBuild``: o canvas é salvo aqui
+        # Marcas (``_postponed``...) que o build deixa nos flowables: desfeitas
+        # ao final, como no ``multiBuild``, porque alguns flowables (o
+        # glossário) são reaproveitados entre relatórios.
+        edicoes = []
+        self._multiBuildEdits = edicoes.append
+        try:
+            self.build(story[:])
+        finally:
+            del self._multiBuildEdits
+            for funcao, *args in edicoes:
+                funcao(*args)
+        if reservado is None or reservado.definir(self.canv, self.entradas_sumario):
+            self.canv.save()
+            return
+        self._montar_em_passadas([reservado.toc if f is reservado else f for f in story])
+
+    def _montar_em_passadas(self, story):
+        """Montagem clássica: ``multiBuild`` com o ``TableOfContents`` no story."""
+        self.entradas_sumario = []
+        self.multiBuild(story)
+
+
+@functools.lru_cache(maxsize=None)
+def _estilos_pdf():
+    """Estilos de parágrafo do relatório, criados uma vez por processo (não
+    são alterados durante a montagem, então podem ser compartilhados)."""
+    styles = getSampleStyleSheet()
+    corpo = ParagraphStyle(name='Justify', parent=styles['BodyText'],
+                           alignment=TA_JUSTIFY, fontName='Times-Roman')
+    return {
+        'titulo': ParagraphStyle(name='TituloCapa', fontSize=22, alignment=TA_CENTER,
+                                 leading=26, spaceAfter=1.5 * cm,
+                                 textColor=colors.HexColor('#002060'), fontName='Times-Bold'),
+        'subtitulo': ParagraphStyle(name='SubTituloCapa', fontSize=18, alignment=TA_CENTER,
+                                    spaceAfter=2 * cm, textColor=colors.HexColor('#002060'),
+                                    fontName='Times-Roman'),
+        'capa_info': ParagraphStyle(name='CapaInfo', fontSize=13, alignment=TA_CENTER,
+                                    spaceBefore=0.3 * cm, fontName='Times-Bold',
+                                    textColor=colors.HexColor('#002060')),
+        'data': ParagraphStyle(name='DataCapa', fontSize=12, alignment=TA_CENTER,
+                               spaceBefore=9 * cm, fontName='Times-Roman'),
+        # Estilos H1/H2 que o `_DocComSumario` registra no TOC.
+        'h1': ParagraphStyle(name='H1Sumario', parent=styles['h1'],
+                             fontName='Times-Bold', textColor=colors.HexColor('#002060'),
+                             spaceBefore=12, spaceAfter=8),
+        'h2': ParagraphStyle(name='H2Sumario', parent=styles['h2'],
+                             fontName='Times-Bold'),
+        'corpo': corpo,
+        'caption': ParagraphStyle(name='Caption', parent=styles['BodyText'],
+                                  alignment=TA_LEFT, fontName='Times-Italic',
+                                  fontSize=9, textColor=colors.grey),
+        'toc_titulo': ParagraphStyle(name='TocTitulo', fontSize=16, alignment=TA_CENTER,
+                                     fontName='Times-Bold',
+                                     textColor=colors.HexColor('#002060'),
+                                     spaceAfter=0.8 * cm),
+        'nota': ParagraphStyle(name='NotaRodape', parent=styles['BodyText'],
+                               alignment=TA_LEFT, fontName='Times-Italic',
+                               fontSize=8, textColor=colors.HexColor('#7a3030'),
+                               spaceBefore=4),
+        'celula': ParagraphStyle(name='Celula', parent=styles['BodyText'],
+                                 fontName='Times-Roman', fontSize=9, leading=11),
+        'celula_b': ParagraphStyle(name='CelulaB', parent=styles['BodyText'],
+                                   fontName='Times-Bold', fontSize=9, leading=11),
+        'toc_niveis': (
+            ParagraphStyle(fontName='Times-Bold', fontSize=12, name='TOCH1',
+                           leftIndent=0, firstLineIndent=-20, spaceBefore=10, leading=16),
+            ParagraphStyle(fontName='Times-Roman', fontSize=10, name='TOCH2',
+                           leftIndent=20, firstLineIndent=-20, spaceBefore=4, leading=14),
+        ),
+    }
+
+
+_glossarios = threading.local()
+
+
+def _tabela_glossario(max_pts, limiar):
+    """Tabela do glossário, já com os parágrafos montados e o layout
+    calculado no primeiro desenho. O texto só muda com a pontuação do
+    bimestre, então ela é montada uma vez por pontuação — e por thread, porque
+    o ``Table`` guarda esse layout enquanto é desenhado."""
+    cache = getattr(_glossarios, 'por_pontuacao', None)
+    if cache is None:
+        cache = _glossarios.por_pontuacao = {}
+    tabela = cache.get((max_pts, limiar))
+    if tabela is not None:
+        return tabela
+    estilos = _estilos_pdf()
+    termos = [
+        ("Média", "Soma das notas dividida pela quantidade (de alunos ou de "
+                  "disciplinas). Indica o desempenho típico."),
+        ("Mediana", "Valor central quando as notas são ordenadas; metade da turma "
+                    "fica acima e metade abaixo. É menos sensível a casos extremos "
+                    "que a média."),
+        ("Desvio Padrão (σ)", "Mede o quanto as notas se afastam da média. Quanto "
+                              "maior, mais heterogênea é a turma."),
+        ("Pontuação do Bimestre", f"Total de pontos distribuíveis no bimestre "
+                                  f"(20 no 1º e 3º; 30 no 2º e 4º). Neste relatório: {max_pts}."),
+        ("Limiar de Aprovação Parcial", "60% da pontuação do bimestre — referência "
+                                        f"de acompanhamento (aqui, ≥ {limiar:.1f})."),
+        ("Taxa de Aprovação", "Percentual de alunos com nota igual ou acima do "
+                              "limiar em todas as disciplinas."),
+        ("P90 (Percentil 90)", "Valor abaixo do qual estão 90% dos alunos. Em "
+                               "faltas, quem ultrapassa o P90 destoa do grupo."),
+        ("μ + 2σ", "Média mais dois desvios padrão. Limite estatístico que sinaliza "
+                   "valores atípicos (usado na análise de faltas)."),
+        ("Disciplina sem dados", "Disciplina sem nenhuma nota lançada ou com todas "
+                                 "as notas zeradas. Não entra nas estatísticas."),
+        ("Asterisco (*)", "Marca disciplinas cuja nota máxima observada é baixa "
+                          "(≤ metade da pontuação do bimestre), sugerindo lançamento "
+                          "possivelmente incompleto — convém confirmar com o professor."),
+    ]
+    linhas_gloss = [[Paragraph(f"<b>{t}</b>", estilos['celula_b']),
+                     Paragraph(d, estilos['celula'])]
+                    for t, d in termos]
+    tabela_gloss = Table(linhas_gloss, colWidths=[4.5 * cm, 11.5 * cm])
+    tabela_gloss.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#eef1f7')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    cache[(max_pts, limiar)] = tabela_gloss
+    return tabela_gloss
+
 
+def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None, png_paleta=False,
+                        memoria_max=None):
+    """Cria o relatório em PDF e devolve um ``SpooledTemporaryFile`` aberto,
+    posicionado no início (feche-o depois de usar).
 
-def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
-    """Cria o relatório em PDF e devolve um BytesIO pronto para download."""
-    buffer = io.BytesIO()
+    O PDF fica em memória até ``memoria_max`` bytes (padrão:
+    ``PDF_MEMORIA_MAX``); acima disso, vai para um arquivo temporário.
+    ``png_paleta=True`` grava as figuras matplotlib como PNG com paleta de 256
+    cores (ver ``figuras.png_da_figura``).
+    """
+    buffer = tempfile.SpooledTemporaryFile(
+        max_size=PDF_MEMORIA_MAX if memoria_max is None else memoria_max)
     doc = _DocComSumario(buffer, pagesize=A4)
     largura, altura = A4
     frame = Frame(2.5 * cm, 2.5 * cm, largura - 5 * cm, altura - 6 * cm, id='normal')
@@ -498,42 +1023,18 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
                      onPage=_cabecalho_factory(logo_path))
     ])
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', parent=styles['BodyText'],
-                              alignment=TA_JUSTIFY, fontName='Times-Roman'))
-    style_titulo = ParagraphStyle(name='TituloCapa', fontSize=22, alignment=TA_CENTER,
-                                  leading=26, spaceAfter=1.5 * cm,
-                                  textColor=colors.HexColor('#002060'), fontName='Times-Bold')
-    style_subtitulo = ParagraphStyle(name='SubTituloCapa', fontSize=18, alignment=TA_CENTER,
-                                     spaceAfter=2 * cm, textColor=colors.HexColor('#002060'),
-                                     fontName='Times-Roman')
-    style_capa_info = ParagraphStyle(name='CapaInfo', fontSize=13, alignment=TA_CENTER,
-                                     spaceBefore=0.3 * cm, fontName='Times-Bold',
-                                     textColor=colors.HexColor('#002060'))
-    style_data = ParagraphStyle(name='DataCapa', fontSize=12, alignment=TA_CENTER,
-                                spaceBefore=9 * cm, fontName='Times-Roman')
-    # Estilos H1/H2 que o `_DocComSumario` registra no TOC.
-    style_h1 = ParagraphStyle(name='H1Sumario', parent=styles['h1'],
-                              fontName='Times-Bold', textColor=colors.HexColor('#002060'),
-                              spaceBefore=12, spaceAfter=8)
-    style_h2 = ParagraphStyle(name='H2Sumario', parent=styles['h2'],
-                              fontName='Times-Bold')
-    style_corpo = styles['Justify']
-    style_caption = ParagraphStyle(name='Caption', parent=styles['BodyText'],
-                                   alignment=TA_LEFT, fontName='Times-Italic',
-                                   fontSize=9, textColor=colors.grey)
-    style_toc_titulo = ParagraphStyle(name='TocTitulo', fontSize=16, alignment=TA_CENTER,
-                                      fontName='Times-Bold',
-                                      textColor=colors.HexColor('#002060'),
-                                      spaceAfter=0.8 * cm)
-    style_nota = ParagraphStyle(name='NotaRodape', parent=styles['BodyText'],
-                                alignment=TA_LEFT, fontName='Times-Italic',
-                                fontSize=8, textColor=colors.HexColor('#7a3030'),
-                                spaceBefore=4)
-    style_celula = ParagraphStyle(name='Celula', parent=styles['BodyText'],
-                                  fontName='Times-Roman', fontSize=9, leading=11)
-    style_celula_b = ParagraphStyle(name='CelulaB', parent=styles['BodyText'],
-                                    fontName='Times-Bold', fontSize=9, leading=11)
+    estilos = _estilos_pdf()
+    style_titulo = estilos['titulo']
+    style_subtitulo = estilos['subtitulo']
+    style_capa_info = estilos['capa_info']
+    style_data = estilos['data']
+    style_h1 = estilos['h1']
+    style_h2 = estilos['h2']
+    style_corpo = estilos['corpo']
+    style_caption = estilos['caption']
+    style_toc_titulo = estilos['toc_titulo']
+    style_nota = estilos['nota']
+    style_celula = estilos['celula']
 
     story = []
 
@@ -558,10 +1059,10 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
         story.append(PageBreak())
 
     # --- Metadados usados em todo o relatório ---
-    limiar = estatisticas.get('limiar_aprovacao', 12.0)
-    max_pts = estatisticas.get('max_pontos_bimestre', 20)
-    bim = estatisticas.get('bimestre_num')
-    meta = estatisticas.get('metadados', {}) or {}
+    limiar = estatisticas.limiar_aprovacao
+    max_pts = estatisticas.max_pontos_bimestre
+    bim = estatisticas.bimestre_num
+    meta = estatisticas.metadados or {}
     serie = meta.get('serie')
     serie_txt = {1: '1ª Série', 2: '2ª Série', 3: '3ª Série'}.get(serie)
 
@@ -586,13 +1087,8 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     # --- Sumário ---
     story.append(Paragraph("Sumário", style_toc_titulo))
     toc = TableOfContents()
-    toc.levelStyles = [
-        ParagraphStyle(fontName='Times-Bold', fontSize=12, name='TOCH1',
-                       leftIndent=0, firstLineIndent=-20, spaceBefore=10, leading=16),
-        ParagraphStyle(fontName='Times-Roman', fontSize=10, name='TOCH2',
-                       leftIndent=20, firstLineIndent=-20, spaceBefore=4, leading=14),
-    ]
-    story.append(toc)
+    toc.levelStyles = list(estilos['toc_niveis'])
+    story.append(_SumarioReservado(toc))
     quebra_pagina()
 
     # --- Glossário (termos usados no relatório) ---
@@ -600,41 +1096,7 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     story.append(Paragraph(
         "Os termos abaixo aparecem ao longo deste relatório.", style_caption))
     story.append(Spacer(1, 0.3 * cm))
-    termos = [
-        ("Média", "Soma das notas dividida pela quantidade (de alunos ou de "
-                  "disciplinas). Indica o desempenho típico."),
-        ("Mediana", "Valor central quando as notas são ordenadas; metade da turma "
-                    "fica acima e metade abaixo. É menos sensível a casos extremos "
-                    "que a média."),
-        ("Desvio Padrão (σ)", "Mede o quanto as notas se afastam da média. Quanto "
-                              "maior, mais heterogênea é a turma."),
-        ("Pontuação do Bimestre", f"Total de pontos distribuíveis no bimestre "
-                                  f"(20 no 1º e 3º; 30 no 2º e 4º). Neste relatório: {max_pts}."),
-        ("Limiar de Aprovação Parcial", "60% da pontuação do bimestre — referência "
-                                        f"de acompanhamento (aqui, ≥ {limiar:.1f})."),
-        ("Taxa de Aprovação", "Percentual de alunos com nota igual ou acima do "
-                              "limiar em todas as disciplinas."),
-        ("P90 (Percentil 90)", "Valor abaixo do qual estão 90% dos alunos. Em "
-                               "faltas, quem ultrapassa o P90 destoa do grupo."),
-        ("μ + 2σ", "Média mais dois desvios padrão. Limite estatístico que sinaliza "
-                   "valores atípicos (usado na análise de faltas)."),
-        ("Disciplina sem dados", "Disciplina sem nenhuma nota lançada ou com todas "
-                                 "as notas zeradas. Não entra nas estatísticas."),
-        ("Asterisco (*)", "Marca disciplinas cuja nota máxima observada é baixa "
-                          "(≤ metade da pontuação do bimestre), sugerindo lançamento "
-                          "possivelmente incompleto — convém confirmar com o professor."),
-    ]
-    linhas_gloss = [[Paragraph(f"<b>{t}</b>", style_celula_b), Paragraph(d, style_celula)]
-                    for t, d in termos]
-    tabela_gloss = Table(linhas_gloss, colWidths=[4.5 * cm, 11.5 * cm])
-    tabela_gloss.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#eef1f7')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(tabela_gloss)
+    story.append(_tabela_glossario(max_pts, limiar))
     quebra_pagina()
 
     # --- Estatísticas gerais ---
@@ -647,12 +1109,12 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
         ))
     story.append(Spacer(1, 0.4 * cm))
     dados_gerais = [
-        ['Total de Alunos:', estatisticas['total_alunos']],
-        ['Média Geral da Turma:', f"{estatisticas['media_geral_turma']:.2f}"],
-        ['Desvio Padrão das Médias:', f"{estatisticas['desvio_padrao_medias']:.2f}"],
-        [f'Taxa de Aprovação (≥ {limiar:.1f} em tudo):', estatisticas['taxa_aprovacao_geral']],
-        ['Disciplina com Maior Média:', f"{estatisticas['disciplina_maior_media_nome']} ({estatisticas['maior_media']:.2f})"],
-        ['Disciplina com Menor Média:', f"{estatisticas['disciplina_menor_media_nome']} ({estatisticas['menor_media']:.2f})"],
+        ['Total de Alunos:', estatisticas.total_alunos],
+        ['Média Geral da Turma:', f"{estatisticas.media_geral_turma:.2f}"],
+        ['Desvio Padrão das Médias:', f"{estatisticas.desvio_padrao_medias:.2f}"],
+        [f'Taxa de Aprovação (≥ {limiar:.1f} em tudo):', _texto_taxa(estatisticas)],
+        ['Disciplina com Maior Média:', f"{_texto_nome(estatisticas.disciplina_maior_media_nome)} ({estatisticas.maior_media:.2f})"],
+        ['Disciplina com Menor Média:', f"{_texto_nome(estatisticas.disciplina_menor_media_nome)} ({estatisticas.menor_media:.2f})"],
     ]
     if meta.get('turma'):
         dados_gerais.insert(0, ['Turma:', meta['turma']])
@@ -670,7 +1132,7 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     h2(f"Alunos com Maior Número de Disciplinas Abaixo do Limiar (&lt;{limiar:.1f})")
     story.append(Spacer(1, 0.4 * cm))
     dados_criticos = [['Aluno', f'Disciplinas < {limiar:.1f}']] + \
-        estatisticas['top_10_alunos_criticos'].values.tolist()
+        [list(item) for item in estatisticas.top_10_alunos_criticos]
     tabela_criticos = Table(dados_criticos, colWidths=[12 * cm, 4 * cm])
     tabela_criticos.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
@@ -689,13 +1151,13 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     for chave in ['distribuicao_geral', 'media_disciplina', 'boxplot_disciplinas']:
         fig = figuras.get(chave)
         if fig is not None:
-            story.append(Image(_fig_para_imagem(fig), width=16 * cm, height=11 * cm, kind='proportional'))
+            story.append(_flowable_grafico(fig, png_paleta))
             story.append(Spacer(1, 1 * cm))
 
     # --- Resumo estatístico por disciplina ---
     h1("Resumo Estatístico por Disciplina")
     story.append(Spacer(1, 0.4 * cm))
-    df_summary = estatisticas['boxplot_summary_df']
+    df_summary = tabela_resumo_notas(estatisticas)
     table_data = [df_summary.columns.tolist()] + df_summary.values.tolist()
     tabela_summary = Table(table_data, colWidths=[4.5 * cm, 2 * cm, 2 * cm, 2.5 * cm, 2 * cm, 2 * cm])
     tabela_summary.setStyle(TableStyle([
@@ -710,7 +1172,7 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     story.append(tabela_summary)
 
     # Nota de rodapé (item: disciplinas possivelmente incompletas) — asterisco.
-    incompletas = estatisticas.get('disciplinas_incompletas') or []
+    incompletas = estatisticas.disciplinas_incompletas
     if incompletas:
         nomes_inc = '; '.join(f"{nome} (máx. {mx:.0f})" for _, nome, mx in incompletas)
         story.append(Paragraph(
@@ -723,7 +1185,7 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
     story.append(Spacer(1, 0.8 * cm))
 
     # --- Disciplinas sem dados (item: identificar disciplinas "sem nada") ---
-    sem_dados = estatisticas.get('disciplinas_sem_dados') or []
+    sem_dados = estatisticas.disciplinas_sem_dados
     if sem_dados:
         h2("Disciplinas sem Notas Lançadas")
         story.append(Paragraph(
@@ -762,11 +1224,11 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
         h1("Análise da Disciplina com Menor Desempenho")
         story.append(Spacer(1, 0.4 * cm))
         dados_critica = [
-            ["Disciplina:", estatisticas['disciplina_menor_media_nome']],
-            ["Média da Turma:", f"{estatisticas['menor_media']:.2f}"],
-            ["Desvio Padrão:", f"{estatisticas['desvio_padrao_disciplina_critica']:.2f}"],
+            ["Disciplina:", estatisticas.disciplina_menor_media_nome],
+            ["Média da Turma:", f"{estatisticas.menor_media:.2f}"],
+            ["Desvio Padrão:", f"{estatisticas.desvio_padrao_disciplina_critica:.2f}"],
             [f"Alunos com Nota < {limiar:.1f}:",
-             f"{estatisticas.get('alunos_abaixo_limiar_disciplina_critica', 0)}"],
+             f"{estatisticas.alunos_abaixo_limiar_disciplina_critica}"],
         ]
         tabela_critica = Table(dados_critica, colWidths=[7 * cm, 9 * cm])
         tabela_critica.setStyle(TableStyle([
@@ -777,10 +1239,10 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
         ]))
         story.append(tabela_critica)
         story.append(Spacer(1, 0.5 * cm))
-        story.append(Image(_fig_para_imagem(fig_critica), width=16 * cm, height=11 * cm, kind='proportional'))
+        story.append(_flowable_grafico(fig_critica, png_paleta))
 
     # --- Frequência (Faltas) ---
-    if estatisticas.get('faltas_disponiveis'):
+    if estatisticas.faltas_disponiveis:
         quebra_pagina()
         h1("Análise de Frequência (sinal estatístico)")
         story.append(Paragraph(
@@ -795,9 +1257,9 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
 
         h2("Top 10 Alunos com Mais Faltas no Bimestre")
         story.append(Spacer(1, 0.3 * cm))
-        top10 = estatisticas.get('top_10_faltosos', pd.DataFrame())
-        if not top10.empty:
-            dados_falt = [['Aluno', 'Total de Faltas']] + top10.values.tolist()
+        top10 = estatisticas.top_10_faltosos
+        if top10:
+            dados_falt = [['Aluno', 'Total de Faltas']] + [list(item) for item in top10]
             tabela_falt = Table(dados_falt, colWidths=[12 * cm, 4 * cm])
             tabela_falt.setStyle(TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7a3030')),
@@ -812,7 +1274,7 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
 
         h2("Resumo de Faltas por Disciplina")
         story.append(Spacer(1, 0.3 * cm))
-        df_faltas_summary = estatisticas.get('faltas_summary_df', pd.DataFrame())
+        df_faltas_summary = tabela_resumo_faltas(estatisticas)
         if not df_faltas_summary.empty:
             cols_widths = [4.5 * cm, 1.6 * cm, 1.6 * cm, 1.4 * cm, 2 * cm, 2 * cm, 2.4 * cm]
             table_data = [df_faltas_summary.columns.tolist()] + df_faltas_summary.values.tolist()
@@ -832,27 +1294,98 @@ def criar_relatorio_pdf(nome_curso, estatisticas, figuras, logo_path=None):
         for chave in ['faltas_total_aluno', 'faltas_boxplot_disciplina']:
             fig = figuras.get(chave)
             if fig is not None:
-                story.append(Image(_fig_para_imagem(fig), width=16 * cm, height=11 * cm, kind='proportional'))
+                story.append(_flowable_grafico(fig, png_paleta))
                 story.append(Spacer(1, 0.8 * cm))
 
+    # --- Acumulado do ano letivo (bimestres já processados desta turma) ---
+    acumulado = estatisticas.acumulado
+    if acumulado and acumulado.get('bimestres'):
+        quebra_pagina()
+        h1("Acumulado no Ano Letivo")
+        bims_acum = acumulado['bimestres']
+        limiar_acum = acumulado['limiar_acumulado']
+        story.append(Paragraph(
+            f"Soma dos bimestres já processados para esta turma "
+            f"({', '.join(f'{b}º' for b in bims_acum)}): "
+            f"<b>{acumulado['pontos_distribuidos']}</b> pontos distribuídos de 100. "
+            f"Limiar de aprovação acumulado (60%): <b>{limiar_acum:.1f}</b>. "
+            "Notas não lançadas contam como zero no total.",
+            style_corpo,
+        ))
+        story.append(Spacer(1, 0.4 * cm))
+        dados_acum = [
+            ['Total de Alunos (no ano):', acumulado['total_alunos']],
+            ['Média do Total Acumulado:', f"{acumulado['media_geral_total']:.2f}"],
+        ]
+        tabela_acum = Table(dados_acum, colWidths=[7 * cm, 9 * cm])
+        tabela_acum.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#eef1f7')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+        ]))
+        story.append(tabela_acum)
+        story.append(Spacer(1, 0.6 * cm))
+
+        h2("Média por Disciplina em Cada Bimestre")
+        story.append(Spacer(1, 0.3 * cm))
+        cab = ['Disciplina'] + [f'{b}º Bim.' for b in bims_acum] + \
+            ['Total (média)', f'Alunos < {limiar_acum:.0f}']
+        linhas_acum = [cab]
+        for item in acumulado['tendencia']:
+            medias_bim = [item['medias_bimestre'].get(b) for b in bims_acum]
+            linhas_acum.append(
+                [Paragraph(item['disciplina'].strip().title(), style_celula)]
+                + ['—' if m is None else f"{m:.2f}" for m in medias_bim]
+                + [f"{item['media_total']:.2f}", item['alunos_abaixo']])
+        largura_num = 9.5 * cm / (len(bims_acum) + 2)
+        tabela_tend = Table(linhas_acum, colWidths=[6.5 * cm] + [largura_num] * (len(bims_acum) + 2))
+        tabela_tend.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#002060')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ]))
+        story.append(tabela_tend)
+        story.append(Spacer(1, 0.6 * cm))
+
+        criticos_acum = acumulado.get('alunos_criticos') or []
+        if criticos_acum:
+            h2(f"Alunos com Mais Disciplinas Abaixo do Limiar Acumulado (&lt;{limiar_acum:.1f})")
+            story.append(Spacer(1, 0.3 * cm))
+            dados_crit_acum = [['Aluno', f'Disciplinas < {limiar_acum:.1f}']] + \
+                [list(item) for item in criticos_acum]
+            tabela_crit_acum = Table(dados_crit_acum, colWidths=[12 * cm, 4 * cm])
+            tabela_crit_acum.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+                ('FONTNAME', (0, 1), (-1, -1), 'Times-Roman'),
+            ]))
+            story.append(tabela_crit_acum)
+
     # --- Comentário da IA ---
-    if estatisticas.get('comentario_ia'):
+    if estatisticas.comentario_ia:
         quebra_pagina()
         h1("Análise e Comentários (Gerado por Inteligência Artificial)")
         story.append(Spacer(1, 0.4 * cm))
-        story.append(Paragraph(estatisticas['comentario_ia'], style_corpo))
+        story.append(Paragraph(estatisticas.comentario_ia, style_corpo))
 
     # Remove qualquer Spacer pendurado no fim do documento — evita uma página em
     # branco extra quando o último conteúdo termina perto do rodapé (item 6).
     while story and isinstance(story[-1], Spacer):
         story.pop()
 
-    # `multiBuild` faz duas passadas: a primeira coleta as entradas do TOC, a
-    # segunda monta o documento final já com os números de página corretos.
-    doc.multiBuild(story)
+    # Uma passada só: o sumário é desenhado no espaço reservado ao final.
+    doc.montar(story)
     # Libera as figuras matplotlib para não acumular memória entre relatórios.
     for fig in figuras.values():
-        if fig is not None:
+        if isinstance(fig, plt.Figure):
             plt.close(fig)
     buffer.seek(0)
     return buffer
@@ -0,0 +1,51 @@
+"""Normalização de texto (remoção de acentos) compartilhada pelo pacote.
+
+A leitura do mapa compara milhares de células e nomes de disciplina sem
+acento e em minúsculas. Para isso ficar barato:
+
+- texto puramente ASCII (códigos, números, a maior parte dos rótulos) é
+  devolvido sem passar por ``unicodedata``;
+- o restante é decomposto (NFD) e os diacríticos são removidos com
+  ``str.translate`` sobre uma tabela preenchida sob demanda;
+- os resultados não-ASCII ficam em um memo LRU limitado, pois os mesmos
+  nomes de alunos e disciplinas se repetem entre arquivos e chamadas.
+"""
+import unicodedata
+from functools import lru_cache
+
+# Limite do memo de textos não-ASCII (nomes de alunos/disciplinas, rótulos).
+TAMANHO_MEMO = 8192
+
+
+class _TabelaSemDiacriticos(dict):
+    """Tabela para ``str.translate``: remove marcas combinantes (categoria
+    ``Mn``) e mantém os demais caracteres. Cada code point é classificado na
+    primeira vez em que aparece."""
+
+    def __missing__(self, codigo):
+        valor = None if unicodedata.category(chr(codigo)) == 'Mn' else codigo
+        self[codigo] = valor
+        return valor
+
+
+_SEM_DIACRITICOS = _TabelaSemDiacriticos()
+
+
+@lru_cache(maxsize=TAMANHO_MEMO)
+def _remover_acentos_unicode(txt):
+    return unicodedata.normalize('NFD', txt).translate(_SEM_DIACRITICOS)
+
+
+def remover_acentos(txt):
+    """Remove acentos de uma string."""
+    if not isinstance(txt, str):
+        txt = str(txt)
+    if txt.isascii():
+        return txt
+    return _remover_acentos_unicode(txt)
+
+
+def normalizar(txt) -> str:
+    """Minúsculas e sem acentos, para comparação tolerante de nomes."""
+    txt = '' if txt is None else txt
+    return remover_acentos(txt).lower().strip()
@@ -0,0 +1,134 @@
+"""Representação compacta de uma turma (notas e faltas em matrizes float32).
+
+O pipeline de leitura devolve DataFrames "largos" que misturam as colunas de
+identificação (``matricula``/``nome``, objetos) com uma coluna float64 por
+disciplina. Para processar muitas turmas no mesmo processo, ``TurmaFrame``
+guarda o mesmo conteúdo em:
+
+- duas matrizes float32 (alunos × disciplinas), uma de notas e uma de faltas,
+  alinhadas pelo mesmo índice de disciplinas (NaN onde não há dado);
+- um índice de alunos com matrículas e nomes internados (``sys.intern``);
+- um índice de disciplinas {código: nome}, na ordem do relatório.
+
+``notas_df``/``faltas_df`` expõem DataFrames no formato antigo cujas colunas de
+disciplina são *views* das matrizes (sem cópia), para as estatísticas e os
+gráficos.
+
+O ganho é para guardar turmas, não para gerar um relatório: as estatísticas
+montam o perfil das disciplinas em float64 (``perfil.py``) de qualquer forma,
+e converter para float32 antes só acrescenta uma cópia. Por isso o app e o
+lote (``batch.py``) trabalham direto com os DataFrames.
+
+float32 é só armazenamento: 15.6 vira 15.600000381... Para que as
+estatísticas saiam iguais às calculadas sobre os DataFrames originais, o
+perfil das disciplinas volta os valores para float64 com ``para_float64``
+(pelo decimal mais curto de cada valor), não com um simples ``astype``.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+class TurmaFrame:
+    """Notas e faltas de uma turma em matrizes float32 + índices."""
+
+    __slots__ = ('notas', 'faltas', 'matriculas', 'nomes', 'disciplinas',
+                 '_posicao')
+
+    def __init__(self, notas, faltas, matriculas, nomes, disciplinas):
+        self.notas = notas
+        self.faltas = faltas
+        self.matriculas = matriculas
+        self.nomes = nomes
+        self.disciplinas = disciplinas
+        self._posicao = {c: j for j, c in enumerate(disciplinas)}
+
+    @classmethod
+    def de_dataframes(cls, df_notas, df_faltas, disciplinas_dict):
+        """Constrói a partir dos DataFrames de ``extrair_dataframes`` (ou do
+        conjunto de ``processar_curso_generico``).
+
+        As faltas são alinhadas às notas pela matrícula; disciplinas do
+        dicionário ausentes em um dos DataFrames ficam como NaN.
+        """
+        disciplinas = dict(disciplinas_dict)
+        matriculas = tuple(sys.intern(str(m)) for m in df_notas['matricula'])
+        nomes = tuple(sys.intern(str(n)) for n in df_notas['nome'])
+
+        notas = _matriz(df_notas, disciplinas)
+        if df_faltas is None or df_faltas.empty:
+            faltas = np.full_like(notas, np.nan)
+        else:
+            if not df_faltas['matricula'].astype(str).tolist() == list(matriculas):
+                df_faltas = (df_faltas.drop_duplicates('matricula')
+                             .set_index('matricula')
+                             .reindex(pd.Index(matriculas, name='matricula')))
+            faltas = _matriz(df_faltas, disciplinas)
+        return cls(notas, faltas, matriculas, nomes, disciplinas)
+
+    @classmethod
+    def de_conjunto(cls, conjunto):
+        """Atalho para o conjunto ``(df_notas, df_faltas, disciplinas, meta)``."""
+        df_notas, df_faltas, disciplinas_dict, _meta = conjunto
+        return cls.de_dataframes(df_notas, df_faltas, disciplinas_dict)
+
+    # ----- tamanho e índices -----
+    def __len__(self):
+        return len(self.matriculas)
+
+    @property
+    def codigos(self):
+        return list(self.disciplinas)
+
+    @property
+    def nbytes(self):
+        """Bytes das matrizes (as strings internadas são compartilhadas)."""
+        return self.notas.nbytes + self.faltas.nbytes
+
+    def posicao(self, codigo):
+        """Coluna da disciplina ``codigo`` nas matrizes."""
+        return self._posicao[codigo]
+
+    # ----- views -----
+    def coluna_notas(self, codigo):
+        """View (sem cópia) das notas de uma disciplina."""
+        return self.notas[:, self._posicao[codigo]]
+
+    def coluna_faltas(self, codigo):
+        """View (sem cópia) das faltas de uma disciplina."""
+        return self.faltas[:, self._posicao[codigo]]
+
+    def notas_df(self):
+        """DataFrame ``matricula, nome, <códigos>`` sobre a matriz de notas."""
+        return self._como_dataframe(self.notas)
+
+    def faltas_df(self):
+        """DataFrame ``matricula, nome, <códigos>`` sobre a matriz de faltas."""
+        return self._como_dataframe(self.faltas)
+
+    def _como_dataframe(self, matriz):
+        # Um único bloco float32 construído sem cópia; as colunas de
+        # identificação entram como blocos separados (não há consolidação).
+        df = pd.DataFrame(matriz, columns=self.codigos, copy=False)
+        df.insert(0, 'nome', pd.Series(self.nomes, dtype=object))
+        df.insert(0, 'matricula', pd.Series(self.matriculas, dtype=object))
+        return df
+
+
+def para_float64(valores):
+    """Converte valores float32 para float64 pelo decimal mais curto que os
+    representa: o 15.6 gravado em float32 volta a ser o 15.6 (float64) lido
+    do mapa, não 15.600000381... Exato para valores com até 7 algarismos
+    significativos (notas e faltas); NaN continua NaN."""
+    return np.asarray(valores, dtype=np.float32).astype(str).astype(np.float64)
+
+
+def _matriz(df, disciplinas):
+    """Matriz float32 (linhas de ``df`` × ``disciplinas``), NaN onde faltar."""
+    matriz = np.full((len(df), len(disciplinas)), np.nan, dtype=np.float32)
+    for j, codigo in enumerate(disciplinas):
+        if codigo in df.columns:
+            matriz[:, j] = pd.to_numeric(df[codigo], errors='coerce').to_numpy(
+                dtype=np.float32, na_value=np.nan)
+    return matriz
@@ -3,6 +3,11 @@
 Cada relatório gerado com sucesso grava uma linha na planilha configurada.
 Falhas de logging são silenciosas — nunca interrompem o fluxo principal.
 
+``registrar_uso`` só enfileira a linha: uma thread por processo a grava em
+lotes (``append_rows``), com o cliente ``gspread`` autenticado uma vez e
+reaproveitado. Enquanto a planilha estiver inacessível, as linhas ficam num
+arquivo local (``USO_DIARIO``) e seguem no próximo lote que der certo.
+
 Configuração necessária em st.secrets (ou secrets.toml):
 
     GOOGLE_SHEETS_ID = "1ABC..."   # ID da planilha (da URL)
@@ -19,7 +24,15 @@ Configuração necessária em st.secrets (ou secrets.toml):
     auth_provider_x509_cert_url = "https://www.googleapis.com/oauth2/v1/certs"
     client_x509_cert_url = "..."
 """
+import atexit
 import datetime
+import importlib.util
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
 
 _SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -28,9 +41,25 @@ _SCOPES = [
 
 _HEADER = ["Data/Hora", "Curso(s)", "Bimestre", "E-mail do Coordenador"]
 
+# Linhas que ainda não chegaram à planilha (Sheets fora do ar, app encerrado
+# com a fila cheia), uma por linha em JSON; reenviadas no próximo lote.
+DIARIO_PADRAO = os.path.join(tempfile.gettempdir(), "gestao_eptnm_uso_pendente.jsonl")
+ESPERA_LOTE = 2.0      # segundos juntando linhas antes de cada append_rows
+ESPERA_FALHA = 30.0    # primeira espera depois de uma falha (dobra até ESPERA_FALHA_MAX)
+ESPERA_FALHA_MAX = 600.0
+
+_registros = {}
+_registros_lock = threading.Lock()
+
 
 def registrar_uso(cursos, bimestre, email_coordenador, secrets):
-    """Grava uma linha de uso na planilha Google Sheets.
+    """Registra uma linha de uso na planilha Google Sheets, sem esperar por ela.
+
+    A linha entra numa fila em memória e é gravada por uma thread em segundo
+    plano, em lotes (``append_rows``), com um cliente ``gspread`` autenticado
+    uma vez por processo. Se a planilha estiver inacessível, as linhas vão
+    para um arquivo local (``USO_DIARIO``, padrão na pasta temporária) e são
+    reenviadas no próximo lote.
 
     Parameters
     ----------
@@ -45,36 +74,168 @@ def registrar_uso(cursos, bimestre, email_coordenador, secrets):
         ``GOOGLE_SHEETS_ID`` e a seção ``[gcp_service_account]``.
     """
     try:
-        _gravar(cursos, bimestre, email_coordenador, secrets)
+        registro = _registro(secrets)
+        if registro is not None:
+            registro.registrar(_linha(cursos, bimestre, email_coordenador))
     except Exception:
         pass  # Logging nunca deve interromper o app principal
 
 
-def _gravar(cursos, bimestre, email_coordenador, secrets):
-    try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-    except ImportError:
-        return
+def _linha(cursos, bimestre, email_coordenador):
+    cursos_str = ", ".join(cursos) if isinstance(cursos, list) else str(cursos)
+    agora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    return [agora, cursos_str, str(bimestre or "—"), email_coordenador]
+
+
+def abridor_aba(secrets, titulo=None):
+    """Função sem argumentos que abre (autenticando) a aba ``titulo`` da
+    planilha configurada em ``secrets`` (None: a primeira aba), criando-a se
+    não existir; None se o registro não está configurado ou o gspread não
+    está instalado."""
+    if importlib.util.find_spec("gspread") is None:
+        return None
 
     sheet_id = secrets.get("GOOGLE_SHEETS_ID", "")
     if not sheet_id:
-        return
-
+        return None
     try:
         creds_info = dict(secrets["gcp_service_account"])
     except (KeyError, TypeError):
-        return
+        return None
+    return lambda: _abrir_aba(sheet_id, creds_info, titulo)
+
+
+def _registro(secrets):
+    """``RegistroUso`` do processo para a planilha configurada (None se o
+    registro não está configurado)."""
+    abrir_aba = abridor_aba(secrets)
+    if abrir_aba is None:
+        return None
+    sheet_id = secrets["GOOGLE_SHEETS_ID"]
+    diario = secrets.get("USO_DIARIO", "") or DIARIO_PADRAO
+
+    with _registros_lock:
+        registro = _registros.get(sheet_id)
+        if registro is None:
+            registro = _registros[sheet_id] = RegistroUso(abrir_aba, diario)
+        return registro
+
+
+def _abrir_aba(sheet_id, creds_info, titulo=None):
+    import gspread
+    from google.oauth2.service_account import Credentials
 
     creds = Credentials.from_service_account_info(creds_info, scopes=_SCOPES)
-    client = gspread.authorize(creds)
-    planilha = client.open_by_key(sheet_id)
-    aba = planilha.sheet1
+    planilha = gspread.authorize(creds).open_by_key(sheet_id)
+    if titulo is None:
+        return planilha.sheet1
+    try:
+        return planilha.worksheet(titulo)
+    except gspread.WorksheetNotFound:
+        return planilha.add_worksheet(title=titulo, rows=1, cols=26)
 
-    # Garante cabeçalho na primeira linha se a aba estiver vazia
-    if aba.row_count == 0 or not aba.row_values(1):
-        aba.append_row(_HEADER)
 
-    cursos_str = ", ".join(cursos) if isinstance(cursos, list) else str(cursos)
-    agora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-    aba.append_row([agora, cursos_str, str(bimestre or "—"), email_coordenador])
+class RegistroUso:
+    """Fila de linhas de uso + thread que as grava em lotes na planilha.
+
+    ``abrir_aba``: função que devolve a aba (``gspread.Worksheet`` ou algo com
+    ``row_values`` e ``append_rows``); chamada uma vez e de novo só depois
+    de uma falha. ``diario``: arquivo local das linhas ainda não gravadas.
+    """
+
+    def __init__(self, abrir_aba, diario, *, espera_lote=ESPERA_LOTE,
+                 espera_falha=ESPERA_FALHA, espera_falha_max=ESPERA_FALHA_MAX):
+        self._abrir_aba = abrir_aba
+        self.diario = diario
+        self.espera_lote = espera_lote
+        self.espera_falha = espera_falha
+        self.espera_falha_max = espera_falha_max
+        self._fila = queue.Queue()
+        self._aba = None
+        self._falhas = 0
+        self._lote = []  # linhas fora da fila e ainda não gravadas
+        self._thread = threading.Thread(target=self._laco, name="registro-uso", daemon=True)
+        self._thread.start()
+        atexit.register(self._salvar_fila)
+
+    def registrar(self, linha):
+        """Enfileira a linha (não bloqueia)."""
+        self._fila.put(linha)
+
+    def _laco(self):
+        while True:
+            linhas = self._lote = [self._fila.get()]
+            time.sleep(self.espera_lote)  # junta as linhas que chegarem nesse intervalo
+            linhas += self._drenar_fila()
+            self._gravar_ou_guardar(linhas)
+            while self._falhas:
+                # Planilha inacessível: tenta de novo com espera crescente,
+                # levando junto o que chegou nesse meio-tempo.
+                time.sleep(min(self.espera_falha * 2 ** (self._falhas - 1),
+                               self.espera_falha_max))
+                self._gravar_ou_guardar(self._drenar_fila())
+
+    def _drenar_fila(self):
+        linhas = []
+        while True:
+            try:
+                linhas.append(self._fila.get_nowait())
+            except queue.Empty:
+                return linhas
+
+    def _gravar_ou_guardar(self, linhas):
+        linhas = self._lote = self._tomar_diario() + linhas
+        try:
+            self._gravar(linhas)
+        except Exception:
+            self._aba = None  # reautentica na próxima tentativa
+            self._falhas += 1
+            self._guardar(linhas)
+        else:
+            self._falhas = 0
+        self._lote = []
+
+    def _gravar(self, linhas):
+        if not linhas:
+            return
+        if self._aba is None:
+            aba = self._abrir_aba()
+            # Garante cabeçalho na primeira linha se a aba estiver vazia
+            if not aba.row_values(1):
+                aba.append_rows([_HEADER])
+            self._aba = aba
+        self._aba.append_rows(linhas)
+
+    def _tomar_diario(self):
+        """Linhas do diário (de falhas anteriores, ou de outro processo),
+        removido ao ser lido: volta a ser escrito se a gravação falhar."""
+        temp = f"{self.diario}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.replace(self.diario, temp)
+        except OSError:
+            return []
+        try:
+            with open(temp, encoding="utf-8") as f:
+                linhas = [json.loads(l) for l in f if l.strip()]
+        except (OSError, ValueError):
+            return []
+        finally:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+        return linhas
+
+    def _guardar(self, linhas):
+        if not linhas:
+            return
+        try:
+            with open(self.diario, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(l, ensure_ascii=False) + "\n" for l in linhas)
+        except OSError:
+            pass
+
+    def _salvar_fila(self):
+        """No encerramento do processo: o lote em andamento e o que ainda está
+        na fila vão para o diário (sem esperar pela planilha)."""
+        self._guardar(self._lote + self._drenar_fila())
@@ -0,0 +1,77 @@
+"""Versão do app e identificação do build em execução (commit + data).
+
+``APP_VERSION`` é a versão "humana": incremente ao publicar mudanças
+relevantes. O commit do Git é o identificador exato do que está no ar e é
+gravado no deploy em ``core/_build.py`` (fora do repositório):
+
+    python -m core.versao
+
+Assim o app não precisa chamar o ``git`` ao subir. Sem o ``_build.py`` (ex.:
+Streamlit Community Cloud, que publica direto de um clone, sem etapa de
+build), ``build_info`` consulta o Git uma única vez.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+APP_VERSION = "1.1.0"
+
+_DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_BUILD = os.path.join(_DIRETORIO, '_build.py')
+
+
+def _build_do_git():
+    """(commit curto, data do commit) lidos do Git em uma chamada; ('', '')
+    se o Git não estiver disponível (ex.: fora de um repositório)."""
+    try:
+        saida = subprocess.check_output(
+            ["git", "log", "-1", "--format=%h %cd", "--date=short"],
+            cwd=os.path.dirname(_DIRETORIO), stderr=subprocess.DEVNULL, text=True, timeout=3,
+        ).strip()
+    except Exception:
+        return '', ''
+    commit, _, data_commit = saida.partition(' ')
+    return commit, data_commit
+
+
+def build_info():
+    """(commit, data do commit) do build em execução: do ``_build.py`` gerado
+    no deploy ou, na falta dele, do Git."""
+    try:
+        from ._build import COMMIT, DATA_COMMIT
+    except ImportError:
+        return _build_do_git()
+    return COMMIT, DATA_COMMIT
+
+
+def gravar_build(caminho=ARQUIVO_BUILD):
+    """Grava o módulo de build com o commit atual; devolve (commit, data)."""
+    commit, data_commit = _build_do_git()
+    if not commit:
+        raise RuntimeError("Não foi possível ler o commit atual (o Git está disponível?).")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('"""Gerado por ``python -m core.versao`` no deploy. Não edite."""\n'
+                f"COMMIT = {commit!r}\n"
+                f"DATA_COMMIT = {data_commit!r}\n")
+    return commit, data_commit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.versao',
+        description="Grava core/_build.py com o commit em produção (rode no deploy).")
+    parser.add_argument('-o', '--saida', default=ARQUIVO_BUILD,
+                        help="arquivo gerado (padrão: core/_build.py)")
+    args = parser.parse_args(argv)
+    try:
+        commit, data_commit = gravar_build(args.saida)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Versão {APP_VERSION} · commit {commit} · {data_commit} -> {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import os
+import time
+
+import pandas as pd
+
+from core.acumulado import apagar_antigos, chave_turma, main, registrar_e_resumir, turmas_guardadas
+
+DISCIPLINAS = {'MAT': 'MATEMÁTICA'}
+
+
+def _registrar(diretorio, turma, bimestre=1, **kwargs):
+    df_notas = pd.DataFrame({'matricula': ['101', '102'], 'nome': ['ANA', 'BRUNO'],
+                             'MAT': [18.0, 9.5]})
+    metadados = {'bimestre_num': bimestre, 'periodo_letivo': '2026', 'curso': 'Mecânica',
+                 'turma': turma}
+    return registrar_e_resumir(str(diretorio), df_notas, DISCIPLINAS, metadados, **kwargs)
+
+
+def _envelhecer(diretorio, turma, dias):
+    caminho = os.path.join(diretorio, chave_turma({'periodo_letivo': '2026', 'curso': 'Mecânica',
+                                                   'turma': turma}) + '.json')
+    quando = time.time() - dias * 86400
+    os.utime(caminho, (quando, quando))
+
+
+def test_soma_os_bimestres(tmp_path):
+    _registrar(tmp_path, '1A', 1)
+    resumo = _registrar(tmp_path, '1A', 2)
+    assert resumo['bimestres'] == [1, 2]
+    assert resumo['tendencia'][0]['medias_bimestre'] == {1: 13.75, 2: 13.75}
+
+
+def test_registro_apaga_turmas_paradas(tmp_path):
+    _registrar(tmp_path, '1A')
+    _registrar(tmp_path, '1B')
+    _envelhecer(tmp_path, '1A', 500)
+
+    _registrar(tmp_path, '1C', dias=400)
+
+    assert [chave for chave, _ in turmas_guardadas(tmp_path)] == ['2026_mecanica_1b',
+                                                                 '2026_mecanica_1c']
+    assert not [n for n in os.listdir(tmp_path) if n.startswith('2026_mecanica_1a')]
+
+
+def test_sem_prazo_guarda(tmp_path):
+    _registrar(tmp_path, '1A')
+    _envelhecer(tmp_path, '1A', 5000)
+    _registrar(tmp_path, '1B', dias=None)
+    assert len(turmas_guardadas(tmp_path)) == 2
+    assert apagar_antigos(tmp_path, 4000) == 1
+
+
+def test_linha_de_comando_apaga_todas(tmp_path, capsys):
+    _registrar(tmp_path, '1A')
+    assert main([str(tmp_path), '--apagar', '0']) == 0
+    assert '1 turma(s) apagada(s).' in capsys.readouterr().out
+    assert turmas_guardadas(tmp_path) == []
@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.agregados import (Momentos, Parcial, Sketch, carregar_parciais, consolidar,
+                            gravar_parcial)
+from core.relatorios import calcular_estatisticas
+
+DISCIPLINAS = {'MAT': 'MATEMÁTICA', 'POR': 'LÍNGUA PORTUGUESA'}
+
+
+def _notas(rng, n):
+    # Notas de uma casa decimal (como nos mapas), com algumas ausentes.
+    valores = np.round(rng.uniform(0, 25, n), 1)
+    valores[rng.random(n) < 0.1] = np.nan
+    return valores
+
+
+def _parcial(rng, curso, turma, bimestre, n=30):
+    matriculas = [f'{turma}{i:03d}' for i in range(n)]
+    df_notas = pd.DataFrame({'matricula': matriculas, 'nome': matriculas,
+                             'MAT': _notas(rng, n), 'POR': _notas(rng, n)})
+    df_faltas = pd.DataFrame({'matricula': matriculas, 'nome': matriculas,
+                              'MAT': rng.integers(0, 12, n).astype(float),
+                              'POR': rng.integers(0, 12, n).astype(float)})
+    metadados = {'bimestre_num': bimestre, 'periodo_letivo': '2026', 'curso': curso,
+                 'turma': turma, 'serie': 1}
+    estatisticas = calcular_estatisticas(df_notas, DISCIPLINAS, df_faltas, metadados)
+    return Parcial.da_turma(estatisticas, DISCIPLINAS, metadados), df_notas
+
+
+@pytest.mark.parametrize('q', [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0])
+def test_quantis_exatos_do_sketch(q):
+    rng = np.random.default_rng(1)
+    partes = [_notas(rng, n) for n in (17, 40, 8)]
+    sketch = Sketch.de_valores(partes[0])
+    for parte in partes[1:]:
+        sketch = sketch.mesclar(Sketch.de_valores(parte))
+    todos = np.concatenate(partes)
+
+    assert sketch.exato
+    assert sketch.n == np.count_nonzero(~np.isnan(todos))
+    assert sketch.quantil(q) == pytest.approx(np.nanquantile(todos, q), abs=1e-12)
+
+
+def test_sketch_comprimido_fica_proximo():
+    rng = np.random.default_rng(2)
+    valores = rng.normal(15, 4, 5000)
+    sketch = Sketch.de_valores(valores[:2500]).mesclar(Sketch.de_valores(valores[2500:]))
+    assert not sketch.exato
+    assert len(sketch.medias) <= 400
+    for q in (0.1, 0.5, 0.9):
+        assert sketch.quantil(q) == pytest.approx(np.quantile(valores, q), abs=0.1)
+
+
+def test_momentos_mesclados_iguais_aos_valores_juntos():
+    rng = np.random.default_rng(3)
+    partes = [_notas(rng, n) for n in (25, 1, 60)]
+    momentos = Momentos.de_valores(partes[0])
+    for parte in partes[1:]:
+        momentos = momentos.mesclar(Momentos.de_valores(parte))
+    todos = pd.Series(np.concatenate(partes))
+
+    assert momentos.n == todos.count()
+    assert momentos.media == pytest.approx(todos.mean(), rel=1e-12)
+    assert momentos.desvio == pytest.approx(todos.std(), rel=1e-9)  # ddof=1
+    assert (momentos.minimo, momentos.maximo) == (todos.min(), todos.max())
+
+
+def test_ida_e_volta_do_parcial(tmp_path):
+    rng = np.random.default_rng(4)
+    parcial, _ = _parcial(rng, 'Mecânica', '1A', 2)
+    caminho = gravar_parcial(str(tmp_path), parcial)
+
+    volta, = carregar_parciais([str(tmp_path)])
+    assert volta.para_dict() == parcial.para_dict()
+    with open(caminho, encoding='utf-8') as f:
+        assert Parcial.de_dict(json.load(f)).para_dict() == parcial.para_dict()
+    assert volta.media_aluno.sketch.quantil(0.5) == parcial.media_aluno.sketch.quantil(0.5)
+
+
+def test_consolidado_igual_aos_alunos_juntos():
+    rng = np.random.default_rng(5)
+    a, notas_a = _parcial(rng, 'Mecânica', '1A', 2)
+    b, notas_b = _parcial(rng, 'Mecânica', '1B', 2, n=45)
+
+    grupo = consolidar([a, b], 'curso')[('2026', 2)]['Mecânica']
+    mat = pd.concat([notas_a['MAT'], notas_b['MAT']])
+    assert grupo.alunos == 75
+    assert grupo.turmas == a.turmas + b.turmas
+    assert grupo.disciplinas['MAT']['notas'].momentos.media == pytest.approx(mat.mean())
+    assert grupo.disciplinas['MAT']['notas'].sketch.quantil(0.5) == pytest.approx(mat.median())
+
+
+def test_consolidar_nunca_mistura_bimestres():
+    rng = np.random.default_rng(6)
+    b1, _ = _parcial(rng, 'Mecânica', '1A', 1)
+    b2, _ = _parcial(rng, 'Mecânica', '1A', 2)
+    b2_outra, _ = _parcial(rng, 'Mecânica', '1B', 2)
+
+    consolidado = consolidar([b2, b1, b2_outra], 'campus')
+    assert list(consolidado) == [('2026', 1), ('2026', 2)]
+    assert consolidado[('2026', 1)]['Campus'].alunos == 30
+    assert consolidado[('2026', 2)]['Campus'].alunos == 60
+    assert consolidado[('2026', 1)]['Campus'].max_pts != consolidado[('2026', 2)]['Campus'].max_pts
+    with pytest.raises(ValueError):
+        b1.mesclar(b2)
@@ -0,0 +1,198 @@
+import email
+import os
+import socket
+import time
+from email import policy
+
+import pytest
+
+from core.caixa_saida import CaixaSaida, main
+from core.email_sender import SessaoSMTP
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+PDF = os.urandom(50_000) + b'\r\n.\r\n'  # inclui uma linha com "." (dot-stuffing)
+
+
+class Servidor:
+    """Handler do aiosmtpd: guarda as mensagens, conta as conexões (EHLO) e
+    recusa com 550 os destinatários que começam com ``recusa``."""
+
+    def __init__(self):
+        self.recebidas = []
+        self.conexoes = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.conexoes += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('recusa'):
+            return '550 5.1.1 destinatario inexistente'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recebidas.append(email.message_from_bytes(envelope.content, policy=policy.default))
+        return '250 OK'
+
+
+@pytest.fixture
+def porta():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def servidor(porta):
+    handler = Servidor()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=porta)
+    handler.iniciar, handler.parar = controller.start, controller.stop
+    yield handler
+    try:
+        controller.stop()
+    except AssertionError:  # nunca iniciado
+        pass
+
+
+def _caixa(diretorio, porta, **kwargs):
+    sessao = SessaoSMTP('rem@gmail.com', '', host='127.0.0.1', port=porta, usar_ssl=False,
+                        timeout=5)
+    kwargs = {'espera_base': 0.2, 'tentativas_max': 3, 'fechar_ociosa': 0.2, **kwargs}
+    return CaixaSaida(str(diretorio), sessao, **kwargs)
+
+
+def _esperar(condicao, limite=5):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'tempo esgotado'
+        time.sleep(0.02)
+
+
+def _anexo(mensagem):
+    return next(mensagem.iter_attachments()).get_payload(decode=True)
+
+
+def test_envia_a_fila_em_uma_conexao(tmp_path, porta, servidor):
+    servidor.iniciar()
+    caixa = _caixa(tmp_path, porta)
+    for i in range(3):
+        caixa.enfileirar(f'prof{i}@cefetmg.br', [(f'rel{i}.pdf', memoryview(PDF))], ['Curso'])
+
+    with caixa.sessao:
+        assert caixa.enviar_pendentes() is None
+
+    assert [m['To'] for m in servidor.recebidas] == [f'prof{i}@cefetmg.br' for i in range(3)]
+    assert all(_anexo(m) == PDF for m in servidor.recebidas)
+    assert servidor.conexoes == 1
+    assert caixa.situacao() == {'pendentes': [], 'falhas': []}
+
+
+def test_servidor_fora_espera_e_tenta_de_novo(tmp_path, porta, servidor):
+    caixa = _caixa(tmp_path, porta)
+    caixa.enfileirar('prof@cefetmg.br', [('rel.pdf', PDF)])
+
+    assert caixa.enviar_pendentes() == pytest.approx(0.2)
+    (_, mensagem), = caixa.situacao()['pendentes']
+    assert mensagem['tentativas'] == 1
+    assert mensagem['ultimo_erro'].startswith('ConnectionRefusedError')
+    # Ainda na espera: não tenta.
+    assert 0 < caixa.enviar_pendentes() <= 0.2
+
+    servidor.iniciar()
+    time.sleep(0.2)
+    with caixa.sessao:
+        assert caixa.enviar_pendentes() is None
+    assert len(servidor.recebidas) == 1
+    assert caixa.situacao()['pendentes'] == []
+
+
+def test_tentativas_esgotadas_vao_para_falhas(tmp_path, porta):
+    caixa = _caixa(tmp_path, porta, tentativas_max=2)
+    caixa.enfileirar('prof@cefetmg.br', [('rel.pdf', PDF)])
+    caixa.enviar_pendentes()
+    assert caixa.enviar_pendentes(ignorar_espera=True) is None
+    (_, mensagem), = caixa.situacao()['falhas']
+    assert mensagem['tentativas'] == 2
+
+
+def test_recusa_permanente_vai_para_falhas(tmp_path, porta, servidor):
+    servidor.iniciar()
+    caixa = _caixa(tmp_path, porta)
+    caixa.enfileirar('recusa@cefetmg.br', [('r.pdf', PDF)])
+    caixa.enfileirar('prof@cefetmg.br', [('p.pdf', PDF)])
+
+    with caixa.sessao:
+        caixa.enviar_pendentes()
+
+    assert [m['To'] for m in servidor.recebidas] == ['prof@cefetmg.br']
+    (id_falha, mensagem), = caixa.situacao()['falhas']
+    assert mensagem['tentativas'] == 1
+    assert 'SMTPRecipientsRefused' in mensagem['ultimo_erro']
+    assert sorted(os.listdir(tmp_path / 'falhas' / id_falha)) == ['anexo_0.pdf', 'mensagem.json']
+
+    assert caixa.reenviar_falhas() == 1
+    assert [i for i, _ in caixa.situacao()['pendentes']] == [id_falha]
+
+
+def test_pendentes_saem_depois_de_reiniciar(tmp_path, porta, servidor):
+    servidor.iniciar()
+    # Processo anterior: enfileirou e caiu antes de enviar.
+    _caixa(tmp_path, porta).enfileirar('prof@cefetmg.br', [('rel.pdf', PDF)], ['Curso'])
+
+    caixa = _caixa(tmp_path, porta).iniciar()
+    try:
+        _esperar(lambda: servidor.recebidas)
+        _esperar(lambda: caixa.sessao._server is None)  # fecha a conexão ociosa
+        caixa.enfileirar('outro@cefetmg.br', [('rel.pdf', PDF)])
+        _esperar(lambda: len(servidor.recebidas) == 2)
+    finally:
+        caixa.parar(5)
+    assert not caixa._thread.is_alive()
+    assert _anexo(servidor.recebidas[0]) == PDF
+    assert servidor.conexoes == 2
+    assert caixa.situacao()['pendentes'] == []
+
+
+def _falha(caixa, destinatario, dias_atras):
+    id_mensagem = caixa.enfileirar(destinatario, [('rel.pdf', PDF)])
+    caixa._mover_para_falhas(os.path.join(caixa.pendentes, id_mensagem))
+    quando = time.time() - dias_atras * 86400
+    os.utime(os.path.join(caixa.falhas, id_mensagem), (quando, quando))
+    return id_mensagem
+
+
+def test_falhas_expiram(tmp_path, porta):
+    caixa = _caixa(tmp_path, porta, falhas_dias=7)
+    _falha(caixa, 'velha@cefetmg.br', 8)
+    recente = _falha(caixa, 'recente@cefetmg.br', 1)
+
+    assert caixa._limpar_antigos() == 1
+    assert os.listdir(caixa.falhas) == [recente]
+
+
+def test_falhas_sem_prazo_ficam(tmp_path, porta):
+    caixa = _caixa(tmp_path, porta, falhas_dias=None)
+    _falha(caixa, 'velha@cefetmg.br', 365)
+    assert caixa._limpar_antigos() == 0
+    assert len(os.listdir(caixa.falhas)) == 1
+
+
+def test_thread_apaga_falhas_vencidas(tmp_path, porta):
+    caixa = _caixa(tmp_path, porta, falhas_dias=7)
+    _falha(caixa, 'velha@cefetmg.br', 8)
+    caixa.iniciar()
+    try:
+        _esperar(lambda: not os.listdir(caixa.falhas))
+    finally:
+        caixa.parar(5)
+
+
+def test_linha_de_comando_limpar(tmp_path, porta, capsys):
+    caixa = _caixa(tmp_path, porta)
+    _falha(caixa, 'a@cefetmg.br', 0)
+    assert main([str(tmp_path), '--limpar', '0']) == 0
+    assert '1 falha(s) apagada(s).' in capsys.readouterr().out
+    assert os.listdir(caixa.falhas) == []
@@ -0,0 +1,159 @@
+import math
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.acumulado import registrar_e_resumir
+from core.estatisticas import EstatisticasTurma
+from core.relatorios import calcular_estatisticas, get_simplified_name, tabela_resumo_faltas
+
+DISCIPLINAS = {'MAT': 'MATEMÁTICA', 'POR': 'LÍNGUA PORTUGUESA', 'ART': 'ARTE'}
+
+
+def _turma(bimestre, notas_mat, notas_por):
+    df_notas = pd.DataFrame({
+        'matricula': ['101', '102', '103'],
+        'nome': ['ANA', 'BRUNO', 'CARLA'],
+        'MAT': notas_mat,
+        'POR': notas_por,
+        'ART': [None, None, None],
+    })
+    df_faltas = pd.DataFrame({
+        'matricula': ['101', '102', '103'],
+        'nome': ['ANA', 'BRUNO', 'CARLA'],
+        'MAT': [0, 4, 12],
+        'POR': [2, None, 1],
+    })
+    metadados = {'bimestre_num': bimestre, 'periodo_letivo': '2026',
+                 'curso': 'Ensino Médio', 'turma': '1A'}
+    return df_notas, df_faltas, metadados
+
+
+def _estatisticas_com_acumulado(tmp_path):
+    for bimestre, mat, por in ((1, [20, 12, 7.5], [18, None, 10]),
+                               (2, [22, 15, 9], [None, None, None])):
+        df_notas, df_faltas, metadados = _turma(bimestre, mat, por)
+        acumulado = registrar_e_resumir(str(tmp_path), df_notas, DISCIPLINAS, metadados)
+    estatisticas = calcular_estatisticas(df_notas, DISCIPLINAS, df_faltas, metadados)
+    estatisticas.acumulado = acumulado
+    return estatisticas
+
+
+def _iguais(a, b):
+    """Igualdade campo a campo tratando NaN == NaN."""
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) and all(map(_iguais, a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_iguais(a[k], b[k]) for k in a)
+    if is_dataclass(a) and type(a) is type(b):
+        return all(_iguais(getattr(a, f.name), getattr(b, f.name))
+                   for f in fields(a) if f.compare)
+    return a == b
+
+
+def test_ida_e_volta_json_preserva_acumulado(tmp_path):
+    estatisticas = _estatisticas_com_acumulado(tmp_path)
+    tendencia = {item['codigo']: item for item in estatisticas.acumulado['tendencia']}
+    assert tendencia['MAT']['medias_bimestre'] == {1: 13.166666666666666, 2: 15.333333333333334}
+    assert tendencia['POR']['medias_bimestre'] == {1: 14.0, 2: None}
+
+    volta = EstatisticasTurma.de_json(estatisticas.para_json())
+
+    for campo in ('acumulado', 'resumo_disciplinas', 'faltas_disciplinas',
+                  'top_10_alunos_criticos', 'disciplinas_sem_dados', 'media_geral_turma'):
+        assert _iguais(getattr(volta, campo), getattr(estatisticas, campo)), campo
+    assert volta.acumulado == estatisticas.acumulado
+    assert _iguais(volta, estatisticas)
+    # Chaves inteiras, como o relatório consulta (``medias_bimestre.get(b)``).
+    item = volta.acumulado['tendencia'][0]
+    assert [item['medias_bimestre'].get(b) for b in volta.acumulado['bimestres']] == \
+        [tendencia[item['codigo']]['medias_bimestre'][b] for b in (1, 2)]
+
+
+def test_ida_e_volta_sem_acumulado(tmp_path):
+    df_notas, df_faltas, metadados = _turma(1, [20, 12, 7.5], [18, None, 10])
+    estatisticas = calcular_estatisticas(df_notas, DISCIPLINAS, df_faltas, metadados)
+    volta = EstatisticasTurma.de_json(estatisticas.para_json())
+    assert volta.acumulado is None
+    assert _iguais(volta, estatisticas)
+
+
+def _faltas_por_coluna(df_faltas, disciplinas_dict):
+    """Implementação anterior (uma disciplina por vez, em pandas), usada como
+    referência: (tabela de resumo, top-10 [(nome, total)])."""
+    numericas = {c: pd.to_numeric(df_faltas[c], errors='coerce')
+                 for c in disciplinas_dict if c in df_faltas.columns}
+    cols = [c for c, s in numericas.items() if s.notna().any()]
+    df_f = pd.DataFrame({c: numericas[c] for c in cols}, index=df_faltas.index)
+    summary = []
+    for col in cols:
+        s = df_f[col].dropna()
+        media, std, p90 = s.mean(), s.std(), s.quantile(0.90)
+        summary.append({
+            'Disciplina': get_simplified_name(col, disciplinas_dict),
+            'Média': f"{media:.1f}",
+            'Mediana': f"{s.median():.1f}",
+            'P90': f"{p90:.1f}",
+            'Desv. Padrão': f"{std:.1f}",
+            'Alunos > P90': int((s > p90).sum()),
+            'Alunos > μ+2σ': int((s > media + 2 * std).sum()),
+        })
+    total = df_faltas[['nome']].assign(**{'Total Faltas': df_f.sum(axis=1)})
+    top10 = total.sort_values(by='Total Faltas', ascending=False).head(10)
+    return pd.DataFrame(summary), list(zip(top10['nome'], top10['Total Faltas'].astype(int)))
+
+
+def _turma_faltas_pequena():
+    disciplinas = {'MAT': 'MATEMÁTICA', 'POR': 'LÍNGUA PORTUGUESA', 'ART': 'ARTE',
+                   'FIS': 'FÍSICA', 'QUI': 'QUÍMICA', 'HIS': 'HISTÓRIA'}
+    nomes = ['ANA', 'BRUNO', 'CARLA', 'DANIEL', 'ELISA']
+    df_notas = pd.DataFrame({'matricula': [str(101 + i) for i in range(5)], 'nome': nomes,
+                             'MAT': [20, 12, None, 7.5, 15], 'POR': [18, None, 10, 0, 9],
+                             'ART': [0, 0, 0, 0, 0], 'FIS': [None] * 5, 'QUI': [5, 6, 7, 8, 9]})
+    df_faltas = pd.DataFrame({'matricula': df_notas['matricula'], 'nome': nomes,
+                              'MAT': [0, 4, 12, None, 3],
+                              'POR': [2, None, '1', 'x', 30],   # texto vira NaN
+                              'ART': [0, 0, 0, 0, 0],            # só zeros
+                              'FIS': [None] * 5})                # nenhuma falta lançada
+    # QUI e HIS sem coluna de faltas.
+    return df_notas, df_faltas, disciplinas
+
+
+def _turma_faltas_aleatoria():
+    rng = np.random.default_rng(12)
+    n, k = 60, 8
+    codigos = [f'D{j}' for j in range(k)]
+    nomes = [f'ALUNO {i:02d}' for i in range(n)]
+    notas = rng.uniform(0, 20, (n, k))
+    faltas = rng.poisson(4, (n, k)).astype(float) + rng.uniform(0, 1, (n, k)).round(1)
+    faltas[rng.random((n, k)) < 0.15] = np.nan
+    faltas[:, 2] = 0
+    faltas[:, 5] = np.nan
+    df_notas = pd.DataFrame(notas, columns=codigos).assign(nome=nomes)
+    df_faltas = pd.DataFrame(faltas[:, :k - 1], columns=codigos[:-1]).assign(nome=nomes)
+    return df_notas, df_faltas, {c: f'DISCIPLINA {c}' for c in codigos}
+
+
+@pytest.mark.parametrize('turma', [_turma_faltas_pequena, _turma_faltas_aleatoria])
+def test_faltas_iguais_a_implementacao_por_coluna(turma):
+    df_notas, df_faltas, disciplinas = turma()
+    estatisticas = calcular_estatisticas(df_notas, disciplinas, df_faltas)
+    resumo, top10 = _faltas_por_coluna(df_faltas, disciplinas)
+
+    assert estatisticas.faltas_disponiveis
+    pd.testing.assert_frame_equal(tabela_resumo_faltas(estatisticas), resumo,
+                                  check_dtype=False)
+    assert estatisticas.top_10_faltosos == top10
+
+
+def test_faltas_sem_disciplina_lancada():
+    df_notas, df_faltas, disciplinas = _turma_faltas_pequena()
+    df_faltas = df_faltas.assign(MAT=None, POR=None, ART=None)
+    estatisticas = calcular_estatisticas(df_notas, disciplinas, df_faltas)
+    assert not estatisticas.faltas_disponiveis
+    assert tabela_resumo_faltas(estatisticas).empty
+    assert estatisticas.top_10_faltosos == []
@@ -0,0 +1,135 @@
+import sqlite3
+
+import pytest
+
+from core.historico import COLUNAS_PLANILHA, Cronometro, HistoricoJobs, main
+
+
+class AbaFalsa:
+    """Aba do gspread em memória; ``falhar_em``: número da chamada de
+    ``append_rows`` que falha (simula a planilha caindo no meio)."""
+
+    def __init__(self, falhar_em=None):
+        self.linhas = []
+        self.chamadas = 0
+        self.falhar_em = falhar_em
+
+    def row_values(self, i):
+        return self.linhas[i - 1] if len(self.linhas) >= i else []
+
+    def append_rows(self, linhas):
+        self.chamadas += 1
+        if self.chamadas == self.falhar_em:
+            raise ConnectionError('sem rede')
+        self.linhas += linhas
+
+
+def _registrar(historico, n, **kwargs):
+    for i in range(n):
+        historico.registrar(f'Curso {i}', bimestre=2, serie=1, turma='1A',
+                            email=f'p{i}@cefetmg.br', alunos=30, disciplinas=8,
+                            anexo_bytes=200 * 1024,
+                            duracoes=Cronometro({'pdf': 0.5, 'graficos': 1.0}).total(),
+                            **kwargs)
+
+
+def _nao_exportados(caminho):
+    with sqlite3.connect(caminho) as con:
+        return con.execute("SELECT COUNT(*) FROM jobs WHERE exportado = 0").fetchone()[0]
+
+
+def test_registra_jobs_e_etapas(tmp_path):
+    historico = HistoricoJobs(str(tmp_path / 'h.db'))
+    _registrar(historico, 3)
+    historico.registrar('Curso 0', bimestre=2, erro='ArquivoInvalidoError: vazio')
+
+    assert historico.por_curso_bimestre() == [('Curso 0', 2, 2, 1), ('Curso 1', 2, 1, 0),
+                                              ('Curso 2', 2, 1, 0)]
+    assert historico.percentil('total', 0.95) == pytest.approx(1.5)
+    n, media, p50, _ = historico.resumo_etapas()['graficos']
+    assert (n, media, p50) == (3, pytest.approx(1.0), pytest.approx(1.0))
+    assert historico.por_dia()[0][1] == 4
+
+
+def test_exporta_em_lotes_sem_repetir(tmp_path):
+    caminho = str(tmp_path / 'h.db')
+    historico = HistoricoJobs(caminho)
+    _registrar(historico, 5)
+    aba = AbaFalsa()
+
+    assert historico.exportar(aba, lote=2) == 5
+    assert aba.linhas[0] == COLUNAS_PLANILHA
+    assert [linha[2] for linha in aba.linhas[1:]] == [f'Curso {i}' for i in range(5)]
+    assert aba.linhas[1][8:10] == [200, 1.5]
+    assert not any('@' in str(c) for linha in aba.linhas for c in linha)  # sem e-mail
+    assert aba.chamadas == 1 + 3
+
+    assert historico.exportar(aba) == 0
+    _registrar(historico, 1)
+    assert historico.exportar(aba) == 1
+    assert len(aba.linhas) == 7
+
+
+def test_falha_no_meio_da_exportacao_nao_duplica(tmp_path):
+    caminho = str(tmp_path / 'h.db')
+    historico = HistoricoJobs(caminho)
+    _registrar(historico, 5)
+    # Cabeçalho (1), primeiro lote (2) e o segundo lote falha (3).
+    aba = AbaFalsa(falhar_em=3)
+
+    with pytest.raises(ConnectionError):
+        historico.exportar(aba, lote=2)
+    assert len(aba.linhas) == 3
+    assert _nao_exportados(caminho) == 3  # o lote que falhou voltou à fila
+
+    # O banco continua gravável (a transação do lote foi desfeita).
+    _registrar(historico, 1)
+    assert historico.exportar(aba, lote=2) == 4
+    assert [linha[2] for linha in aba.linhas[1:]] == \
+        [f'Curso {i}' for i in range(5)] + ['Curso 0']
+    assert _nao_exportados(caminho) == 0
+
+
+def test_emails_antigos_sao_apagados(tmp_path):
+    caminho = str(tmp_path / 'h.db')
+    historico = HistoricoJobs(caminho, email_dias=30)
+    _registrar(historico, 2)
+    with sqlite3.connect(caminho) as con:
+        con.execute("UPDATE jobs SET criado_em = '2020-01-01 10:00:00' WHERE curso = 'Curso 0'")
+
+    _registrar(historico, 1)  # cada gravação aplica o prazo
+
+    with sqlite3.connect(caminho) as con:
+        emails = con.execute("SELECT curso, email FROM jobs ORDER BY id").fetchall()
+    assert emails == [('Curso 0', None), ('Curso 1', 'p1@cefetmg.br'),
+                      ('Curso 0', 'p0@cefetmg.br')]
+    assert historico.por_curso_bimestre()[0][2] == 2  # o job continua contado
+
+
+def test_linha_de_comando(tmp_path, capsys):
+    caminho = str(tmp_path / 'h.db')
+    _registrar(HistoricoJobs(caminho, email_dias=None), 2)
+    assert main([caminho, '--apagar-emails', '0']) == 0
+    saida = capsys.readouterr().out
+    assert 'E-mail apagado de 2 job(s).' in saida
+    assert 'Curso 1' in saida
+    assert main([str(tmp_path / 'nao_existe.db')]) == 1
+
+
+def test_falha_ao_marcar_nao_envia(tmp_path):
+    caminho = str(tmp_path / 'h.db')
+    historico = HistoricoJobs(caminho)
+    _registrar(historico, 2)
+    with sqlite3.connect(caminho) as con:
+        con.execute("CREATE TRIGGER falha BEFORE UPDATE OF exportado ON jobs"
+                    " BEGIN SELECT RAISE(ABORT, 'disco cheio'); END")
+    aba = AbaFalsa()
+
+    with pytest.raises(sqlite3.DatabaseError):
+        historico.exportar(aba)
+    assert aba.linhas == [COLUNAS_PLANILHA]  # nada enviado sem a marcação
+
+    with sqlite3.connect(caminho) as con:
+        con.execute("DROP TRIGGER falha")
+    assert historico.exportar(aba) == 2
+    assert len(aba.linhas) == 3
@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import io
+import os
+import smtplib
+import tracemalloc
+
+import pytest
+
+from core import email_sender
+
+REMETENTE, DESTINATARIO = 'relatorios@gmail.com', 'coordenador@cefetmg.br'
+TAMANHO_ANEXO = 24 * 2**20
+PICO_MAX = 2 * 2**20  # o envio não pode guardar o anexo (nem o base64 dele) inteiro
+
+
+class ServidorNulo(smtplib.SMTP):
+    """SMTP sem conexão: aceita os comandos e só resume o que recebe (bytes e
+    SHA-256 do anexo decodificado, parte a parte), sem guardar a mensagem."""
+
+    def __init__(self):
+        super().__init__()
+        self.recebidos = 0
+        self.sha_anexo = hashlib.sha256()
+        self._em_data = False
+        self._no_anexo = False
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def send(self, s):
+        self.recebidos += len(s)
+        if s.startswith(b'\r\n--'):
+            # Fronteira: começa a parte do PDF ou termina a mensagem.
+            self._no_anexo = b'application/pdf' in s
+        elif self._no_anexo:
+            self.sha_anexo.update(base64.b64decode(s))
+
+    def putcmd(self, cmd, args=""):
+        self._em_data = cmd.lower() == 'data'
+
+    def getreply(self):
+        if self._em_data:
+            self._em_data = False
+            return 354, b'Manda'
+        return 250, b'OK'
+
+
+@pytest.fixture(scope='module')
+def anexo(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('anexo') / 'relatorio.pdf'
+    sha = hashlib.sha256()
+    with open(caminho, 'wb') as f:
+        for _ in range(TAMANHO_ANEXO // 2**20):
+            bloco = os.urandom(2**20)
+            sha.update(bloco)
+            f.write(bloco)
+    return caminho, sha.hexdigest()
+
+
+def _pico_do_envio(buffer):
+    servidor = ServidorNulo()
+    tracemalloc.start()
+    try:
+        partes = email_sender._partes_mensagem(REMETENTE, DESTINATARIO, 'Relatório',
+                                               'Segue em anexo.', [('relatorio.pdf', buffer)])
+        email_sender._enviar_partes(servidor, REMETENTE, DESTINATARIO, partes)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico, servidor
+
+
+def test_anexo_em_arquivo_enviado_em_blocos(anexo):
+    caminho, sha = anexo
+    with open(caminho, 'rb') as f:
+        pico, servidor = _pico_do_envio(f)
+    assert servidor.sha_anexo.hexdigest() == sha
+    assert servidor.recebidos > TAMANHO_ANEXO * 4 / 3
+    assert pico < PICO_MAX, f"pico de {pico / 2**20:.1f} MB"
+
+
+def test_anexo_em_memoria_sem_copia(anexo):
+    caminho, sha = anexo
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    # O anexo já está na memória (fora da medição): só o envio conta.
+    for buffer in (dados, memoryview(dados), io.BytesIO(dados)):
+        pico, servidor = _pico_do_envio(buffer)
+        assert servidor.sha_anexo.hexdigest() == sha
+        assert pico < PICO_MAX, f"{type(buffer).__name__}: pico de {pico / 2**20:.1f} MB"
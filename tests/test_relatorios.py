@@ -0,0 +1,106 @@
+import io
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+from reportlab.pdfgen.canvas import Canvas
+
+from core import relatorios
+
+
+class PoolFalso:
+    """``ProcessPoolExecutor`` sem processos: guarda ``max_workers`` e quebra
+    no primeiro desenho (como um processo filho morto)."""
+    criados = []
+
+    def __init__(self, max_workers, **_):
+        self.max_workers = max_workers
+        PoolFalso.criados.append(self)
+
+    def submit(self, funcao, *args):
+        if funcao is relatorios._png_de_spec and len(PoolFalso.criados) == 1:
+            raise BrokenProcessPool('processo filho morreu')
+        futuro = Future()
+        futuro.set_result(funcao(*args))
+        return futuro
+
+    def shutdown(self, **_):
+        pass
+
+
+@pytest.fixture
+def pool_falso(monkeypatch):
+    relatorios.encerrar_graficos()
+    PoolFalso.criados = []
+    monkeypatch.setattr(relatorios, 'ProcessPoolExecutor', PoolFalso)
+    monkeypatch.setattr(relatorios, '_png_de_spec', lambda spec, backend, paleta: b'png')
+    monkeypatch.setattr(relatorios, '_processos_graficos', None)
+    yield
+    relatorios.encerrar_graficos()
+
+
+def test_pool_recriado_apos_quebra_mantem_processos(pool_falso):
+    relatorios.preaquecer_graficos(2, backend='matplotlib')
+
+    # Primeira renderização: o pool quebra e o desenho é feito aqui mesmo.
+    assert relatorios._renderizar_em_paralelo({'a': object(), 'b': None}, 'matplotlib') == \
+        {'a': b'png', 'b': None}
+    assert relatorios._pool_graficos is None
+
+    # A seguinte recria o pool com o número de processos configurado.
+    assert relatorios._renderizar_em_paralelo({'a': object()}, 'matplotlib') == {'a': b'png'}
+    assert [p.max_workers for p in PoolFalso.criados] == [2, 2]
+
+
+def test_pool_real_recusa_backend_desconhecido(monkeypatch):
+    # Sem falsos: o processo filho não inicia, o pool quebra e o desenho
+    # feito aqui mesmo recusa o backend.
+    relatorios.encerrar_graficos()
+    monkeypatch.setattr(relatorios, '_processos_graficos', 1)
+    spec = relatorios._spec_histograma(np.arange(3.0), 3, '', '')
+    try:
+        with pytest.raises(ValueError, match='desconhecido'):
+            relatorios._renderizar_em_paralelo({'a': spec}, 'mpl')
+    finally:
+        relatorios.encerrar_graficos()
+
+
+LOGO = os.path.join(os.path.dirname(__file__), os.pardir, 'assets', 'logo_cefet.png')
+
+
+def _pdf_com_logo(logo):
+    saida = io.BytesIO()
+    canvas = Canvas(saida)
+    relatorios._desenhar_logo(canvas, logo, 50, 700, 60)
+    canvas.save()
+    return saida.getvalue()
+
+
+def test_logo_pelo_atalho_do_reportlab():
+    relatorios._logo_pdf.cache_clear()
+    leitor, imagem, mascara = relatorios._logo_pdf(LOGO)
+    assert imagem is not None
+    assert b'/Subtype /Image' in _pdf_com_logo((leitor, imagem, mascara))
+
+
+def test_logo_pelo_drawimage_sem_o_atalho(monkeypatch):
+    # Um reportlab sem os detalhes internos usados pelo atalho.
+    class CanvasSemDoc(Canvas):
+        @property
+        def _doc(self):
+            raise AttributeError('_doc')
+
+        @_doc.setter
+        def _doc(self, valor):
+            pass
+
+    relatorios._logo_pdf.cache_clear()
+    monkeypatch.setattr(relatorios, 'Canvas', CanvasSemDoc)
+    logo = relatorios._logo_pdf(LOGO)
+    relatorios._logo_pdf.cache_clear()
+
+    leitor, imagem, mascara = logo
+    assert imagem is None and mascara is None
+    assert b'/Subtype /Image' in _pdf_com_logo(logo)
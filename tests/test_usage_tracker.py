@@ -0,0 +1,143 @@
+import json
+import time
+
+import pytest
+
+from core import usage_tracker
+from core.usage_tracker import RegistroUso, _HEADER, _linha
+
+
+class AbaFalsa:
+    """Aba do gspread em memória; com ``fora`` ligado, simula a planilha
+    inacessível."""
+
+    def __init__(self):
+        self.linhas = []
+        self.chamadas = 0
+        self.fora = False
+
+    def row_values(self, i):
+        if self.fora:
+            raise ConnectionError('sem rede')
+        return self.linhas[i - 1] if len(self.linhas) >= i else []
+
+    def append_rows(self, linhas):
+        if self.fora:
+            raise ConnectionError('sem rede')
+        self.chamadas += 1
+        self.linhas += linhas
+
+
+class Abridor:
+    """``abrir_aba`` que conta as autenticações (a primeira é lenta)."""
+
+    def __init__(self, aba, demora=0.0):
+        self.aba = aba
+        self.demora = demora
+        self.aberturas = 0
+
+    def __call__(self):
+        self.aberturas += 1
+        time.sleep(self.demora)
+        return self.aba
+
+
+@pytest.fixture
+def saidas(monkeypatch):
+    """``atexit.register`` de ``usage_tracker`` só anota (não registra de verdade)."""
+    registradas = []
+    monkeypatch.setattr(usage_tracker.atexit, 'register', registradas.append)
+    return registradas
+
+
+def _esperar(condicao, limite=5):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'tempo esgotado'
+        time.sleep(0.02)
+
+
+def _diario(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return [json.loads(l) for l in f]
+
+
+def _linhas(n, prefixo='p'):
+    return [_linha(['Trânsito'], 2, f'{prefixo}{i}@cefetmg.br') for i in range(n)]
+
+
+def test_lote_em_um_append_rows_com_uma_autenticacao(tmp_path, saidas):
+    aba = AbaFalsa()
+    abrir = Abridor(aba, demora=0.1)
+    registro = RegistroUso(abrir, str(tmp_path / 'uso.jsonl'), espera_lote=0.2)
+
+    inicio = time.perf_counter()
+    for linha in _linhas(5):
+        registro.registrar(linha)
+    assert time.perf_counter() - inicio < 0.05  # registrar não espera a planilha
+
+    _esperar(lambda: len(aba.linhas) == 6)
+    assert aba.linhas == [_HEADER] + _linhas(5)
+    assert aba.chamadas == 2  # cabeçalho + um lote
+
+    for linha in _linhas(3, 'q'):
+        registro.registrar(linha)
+    _esperar(lambda: len(aba.linhas) == 9)
+    assert aba.chamadas == 3
+    assert abrir.aberturas == 1  # cliente autenticado reaproveitado
+    assert not (tmp_path / 'uso.jsonl').exists()
+
+
+def test_queda_da_planilha_vai_para_o_diario_e_volta(tmp_path, saidas):
+    aba = AbaFalsa()
+    abrir = Abridor(aba)
+    diario = tmp_path / 'uso.jsonl'
+    registro = RegistroUso(abrir, str(diario), espera_lote=0.05, espera_falha=0.5)
+    registro.registrar(_linha('Estradas', 1, 'a@cefetmg.br'))
+    _esperar(lambda: len(aba.linhas) == 2)
+
+    aba.fora = True
+    for linha in _linhas(3):
+        registro.registrar(linha)
+    _esperar(lambda: diario.exists())
+    assert _diario(diario) == _linhas(3)
+    assert registro._falhas >= 1
+
+    aba.fora = False
+    registro.registrar(_linha('Estradas', 3, 'b@cefetmg.br'))
+    _esperar(lambda: len(aba.linhas) == 6)
+    assert aba.linhas[2:] == _linhas(3) + [_linha('Estradas', 3, 'b@cefetmg.br')]
+    assert registro._falhas == 0
+    assert abrir.aberturas == 2  # reautentica uma vez depois da falha
+    assert not diario.exists()
+
+
+def test_encerramento_grava_o_pendente_no_diario(tmp_path, saidas):
+    aba = AbaFalsa()
+    diario = tmp_path / 'uso.jsonl'
+    # Lote longo: a primeira linha fica no lote em andamento, as demais na fila.
+    registro = RegistroUso(Abridor(aba), str(diario), espera_lote=60)
+    assert saidas == [registro._salvar_fila]
+
+    linhas = _linhas(4)
+    for linha in linhas:
+        registro.registrar(linha)
+    _esperar(lambda: registro._lote)
+    registro._salvar_fila()
+    assert _diario(diario) == linhas
+    assert aba.linhas == []
+
+    # O próximo processo reenvia o diário no primeiro lote.
+    seguinte = RegistroUso(Abridor(aba), str(diario), espera_lote=0.05)
+    seguinte.registrar(_linha('Estradas', 4, 'z@cefetmg.br'))
+    _esperar(lambda: len(aba.linhas) == 6)
+    assert aba.linhas == [_HEADER] + linhas + [_linha('Estradas', 4, 'z@cefetmg.br')]
+    assert aba.chamadas == 2
+    assert not diario.exists()
+
+
+def test_registrar_uso_sem_configuracao_nao_faz_nada(monkeypatch):
+    monkeypatch.setattr(usage_tracker, '_registros', {})
+    usage_tracker.registrar_uso(['Trânsito'], 2, 'a@cefetmg.br', {})
+    usage_tracker.registrar_uso(['Trânsito'], 2, 'a@cefetmg.br', {'GOOGLE_SHEETS_ID': 'x'})
+    assert usage_tracker._registros == {}